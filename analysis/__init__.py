@@ -0,0 +1,41 @@
+"""Numerical helpers for LGAD run data.
+
+Submodules are imported on first attribute access so that importing one
+helper (e.g. from a Dash callback) does not load the others.
+"""
+import importlib
+
+_EXPORTS = {
+    "downsample": ".downsample",
+    "lttb_indices": ".downsample",
+    "minmax_indices": ".downsample",
+    "breakdown_voltage": ".figures_of_merit",
+    "depletion_voltages": ".figures_of_merit",
+    "screen_cv": ".figures_of_merit",
+    "screen_iv": ".figures_of_merit",
+    "stack_curves": ".figures_of_merit",
+    "normalise_current": ".temperature",
+    "normalise_runs": ".temperature",
+    "scale_factor": ".temperature",
+}
+
+__all__ = [
+    "downsample",
+    "lttb_indices",
+    "minmax_indices",
+    "breakdown_voltage",
+    "depletion_voltages",
+    "screen_cv",
+    "screen_iv",
+    "stack_curves",
+    "normalise_current",
+    "normalise_runs",
+    "scale_factor",
+]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+
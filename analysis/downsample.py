@@ -0,0 +1,118 @@
+"""Downsampling of long series before they are handed to Plotly.
+
+Both methods return *indices* into the input so callers can subset any
+number of aligned columns. Inputs are assumed sorted by ``x``.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+
+def _bucket_matrix(starts: np.ndarray, ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return padded ``(n_buckets, width)`` index matrix and validity mask."""
+    lengths = ends - starts
+    columns = np.arange(int(lengths.max()))
+    valid = columns[None, :] < lengths[:, None]
+    index = np.where(valid, starts[:, None] + columns[None, :], starts[:, None])
+    return index, valid
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection of ``n_out`` points.
+
+    Bucket layout, next-bucket centroids and candidate triangles are built
+    with array operations; only the chain through the previously selected
+    point is walked bucket by bucket, so the cost is O(n) with an
+    O(n_out) Python loop.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Centroid of the following bucket; the last bucket looks at the final point.
+    next_starts = np.append(starts[1:], n - 1)
+    next_ends = np.append(ends[1:], n)
+    csum_x = np.concatenate(([0.0], np.cumsum(x)))
+    csum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = next_ends - next_starts
+    avg_x = (csum_x[next_ends] - csum_x[next_starts]) / counts
+    avg_y = (csum_y[next_ends] - csum_y[next_starts]) / counts
+
+    index, valid = _bucket_matrix(starts, ends)
+    bucket_x = x[index]
+    bucket_y = y[index]
+
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for b in range(len(starts)):
+        ax, ay = x[anchor], y[anchor]
+        area = np.abs((ax - avg_x[b]) * (bucket_y[b] - ay) - (ax - bucket_x[b]) * (avg_y[b] - ay))
+        area[~valid[b]] = -1.0
+        anchor = index[b, int(np.argmax(area))]
+        selected[b + 1] = anchor
+    return selected
+
+
+def minmax_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Keep the first/last point and the min and max of ``y`` per bucket.
+
+    Fully vectorised; preserves the envelope (spikes, dropouts) exactly.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    n_buckets = (n_out - 2) // 2
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.intp)
+    index, valid = _bucket_matrix(edges[:-1], edges[1:])
+    values = y[index]
+    lows = np.where(valid, values, np.inf).argmin(axis=1)
+    highs = np.where(valid, values, -np.inf).argmax(axis=1)
+    rows = np.arange(n_buckets)
+    picked = np.concatenate(([0, n - 1], index[rows, lows], index[rows, highs]))
+    return np.unique(picked)
+
+
+_METHODS = {
+    "lttb": lttb_indices,
+    "minmax": minmax_indices,
+}
+
+
+def downsample(
+    x,
+    y,
+    n_out: int,
+    method: str = "lttb",
+    x_range: tuple[float, float] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Reduce ``(x, y)`` to at most ``n_out`` visually representative points.
+
+    ``x_range`` restricts the selection to the visible window first, so a
+    zoomed view is re-sampled at full resolution for that window. Non-finite
+    samples are dropped.
+    """
+    try:
+        select = _METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unsupported downsampling method: {method}") from None
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    if x_range is not None:
+        lo, hi = sorted(x_range)
+        keep &= (x >= lo) & (x <= hi)
+    if not keep.all():
+        x, y = x[keep], y[keep]
+
+    picked = select(x, y, n_out)
+    return x[picked], y[picked]
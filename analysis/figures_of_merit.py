@@ -0,0 +1,327 @@
+"""Breakdown and depletion voltages for many runs at once.
+
+Curves are handled as ``(n_runs, n_points)`` arrays padded with NaN (see
+:func:`stack_curves`), sorted by ``|V|`` along each row. Every estimator
+returns a value and a one-sigma uncertainty per run, NaN where the
+feature is not present in the sweep.
+
+* Breakdown (I–V): the relative-derivative method, ``K = d ln I / d ln V``,
+  with ``V_bd`` where ``K`` first crosses a threshold; or the knee of a
+  two-segment linear fit to ``log10 |I|``.
+* Depletion (C–V): a three-segment linear fit to ``1/C²``; the first knee
+  is the gain-layer depletion voltage, the second full depletion.
+
+Segment fits evaluate every split point from prefix sums, so the cost is
+a handful of array operations regardless of the number of runs.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:  # pandas 只在批量筛选时才加载
+    import pandas as pd
+
+DEFAULT_K_THRESHOLD = 10.0
+MIN_SEGMENT_POINTS = 3
+# Runs processed together in the three-segment fit; bounds peak memory.
+_CHUNK_RUNS = 64
+
+
+def stack_curves(curves: Iterable[tuple[np.ndarray, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+    """Pad ``(x, y)`` pairs of different length into NaN-filled 2-D arrays sorted by ``|x|``."""
+    curves = [(np.abs(np.asarray(x, dtype=float)), np.asarray(y, dtype=float)) for x, y in curves]
+    width = max((len(x) for x, _ in curves), default=0)
+    xs = np.full((len(curves), width), np.nan)
+    ys = np.full((len(curves), width), np.nan)
+    for row, (x, y) in enumerate(curves):
+        order = np.argsort(x, kind="stable")
+        xs[row, :len(x)] = x[order]
+        ys[row, :len(y)] = y[order]
+    return xs, ys
+
+
+def _as_2d(x, y) -> tuple[np.ndarray, np.ndarray, bool]:
+    x = np.abs(np.asarray(x, dtype=float))
+    y = np.asarray(y, dtype=float)
+    single = x.ndim == 1
+    if single:
+        x, y = x[None, :], y[None, :]
+    # 分段拟合假定每行按 |V| 递增（C–V 汇总按 V 排序，负偏压时顺序相反）；NaN 排在末尾
+    order = np.argsort(x, axis=1, kind="stable")
+    return np.take_along_axis(x, order, axis=1), np.take_along_axis(y, order, axis=1), single
+
+
+def _unwrap(single: bool, *arrays: np.ndarray):
+    return tuple(a[0] for a in arrays) if single else arrays
+
+
+def _compact(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Move valid points of each row to the front; return (x, y, valid)."""
+    valid = np.isfinite(x) & np.isfinite(y)
+    order = np.argsort(~valid, axis=1, kind="stable")
+    x = np.take_along_axis(x, order, axis=1)
+    y = np.take_along_axis(y, order, axis=1)
+    valid = np.take_along_axis(valid, order, axis=1)
+    return np.where(valid, x, 0.0), np.where(valid, y, 0.0), valid
+
+
+# --------------------------------------------------------------------------
+# Breakdown voltage
+# --------------------------------------------------------------------------
+def breakdown_voltage(
+    voltage,
+    current,
+    method: str = "derivative",
+    k_threshold: float = DEFAULT_K_THRESHOLD,
+):
+    """Breakdown voltage and uncertainty for one curve or a stack of curves.
+
+    ``method="derivative"`` interpolates the first crossing of
+    ``K = d ln|I| / d ln|V|`` above ``k_threshold``; the uncertainty is half
+    the local voltage step. ``method="fit"`` returns the knee of a
+    two-segment fit to ``log10 |I|`` with the propagated fit uncertainty.
+    """
+    v, i, single = _as_2d(voltage, current)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_i = np.log(np.abs(i))
+    log_i[~np.isfinite(log_i)] = np.nan
+
+    if method == "fit":
+        v_bd, sigma = _two_segment_knee(v, log_i / np.log(10))
+        return _unwrap(single, v_bd, sigma)
+    if method != "derivative":
+        raise ValueError(f"Unsupported breakdown method: {method}")
+
+    v, log_i, valid = _compact(v, log_i)
+    n = v.shape[1]
+    k_factor = np.full(v.shape, np.nan)
+    if n >= 3:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dlog_i = (log_i[:, 2:] - log_i[:, :-2]) / (v[:, 2:] - v[:, :-2])
+            k_factor[:, 1:-1] = v[:, 1:-1] * dlog_i
+        k_factor[:, 1:-1][~(valid[:, 2:] & valid[:, :-2])] = np.nan
+
+    above = np.nan_to_num(k_factor, nan=-np.inf) > k_threshold
+    found = above.any(axis=1)
+    j = np.argmax(above, axis=1)
+    rows = np.arange(v.shape[0])
+    jp = np.maximum(j - 1, 0)
+    k_lo, k_hi = k_factor[rows, jp], k_factor[rows, j]
+    v_lo, v_hi = v[rows, jp], v[rows, j]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(np.isfinite(k_lo) & (k_hi != k_lo), (k_threshold - k_lo) / (k_hi - k_lo), 1.0)
+    frac = np.clip(frac, 0.0, 1.0)
+    v_bd = np.where(found, v_lo + frac * (v_hi - v_lo), np.nan)
+    sigma = np.where(found, np.abs(v_hi - v_lo) / 2, np.nan)
+    return _unwrap(single, v_bd, sigma)
+
+
+# --------------------------------------------------------------------------
+# Depletion voltages
+# --------------------------------------------------------------------------
+def depletion_voltages(voltage, capacitance):
+    """Gain-layer and full depletion voltages from ``1/C²`` knees.
+
+    Returns ``(v_gl, sigma_gl, v_fd, sigma_fd)``, the knees ordered by
+    ``|V|`` whatever the order of the points. Capacitance may be in any
+    unit; the knees do not depend on scale.
+    """
+    v, c, single = _as_2d(voltage, capacitance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_c2 = 1.0 / np.square(c)
+    inv_c2[~np.isfinite(inv_c2)] = np.nan
+
+    results = [np.full(v.shape[0], np.nan) for _ in range(4)]
+    for start in range(0, v.shape[0], _CHUNK_RUNS):
+        chunk = slice(start, start + _CHUNK_RUNS)
+        for out, value in zip(results, _three_segment_knees(v[chunk], inv_c2[chunk])):
+            out[chunk] = value
+    return _unwrap(single, *results)
+
+
+# --------------------------------------------------------------------------
+# Piecewise-linear fits
+# --------------------------------------------------------------------------
+def _normalise(x: np.ndarray, y: np.ndarray):
+    """Centre x and scale y per row so prefix sums stay well conditioned."""
+    x, y, valid = _compact(x, y)
+    counts = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(counts > 0, x.sum(axis=1) / counts, 0.0)
+        y_scale = np.max(np.abs(y), axis=1)
+    y_scale = np.where(y_scale > 0, y_scale, 1.0)
+    x = np.where(valid, x - x_mean[:, None], 0.0)
+    y = np.where(valid, y / y_scale[:, None], 0.0)
+    return x, y, valid.astype(float), x_mean
+
+
+def _inside(x_knee: np.ndarray, x: np.ndarray, w: np.ndarray) -> np.ndarray:
+    """Knees outside the measured span are extrapolation artefacts."""
+    x_lo = np.where(w > 0, x, np.inf).min(axis=1)
+    x_hi = np.where(w > 0, x, -np.inf).max(axis=1)
+    return (x_knee >= x_lo) & (x_knee <= x_hi)
+
+
+def _prefix_sums(x: np.ndarray, y: np.ndarray, w: np.ndarray) -> dict[str, np.ndarray]:
+    def cum(a):
+        return np.concatenate((np.zeros((a.shape[0], 1)), np.cumsum(a, axis=1)), axis=1)
+
+    return {
+        "n": cum(w), "x": cum(x * w), "y": cum(y * w),
+        "xx": cum(x * x * w), "xy": cum(x * y * w), "yy": cum(y * y * w),
+    }
+
+
+def _segment_fit(prefix: dict[str, np.ndarray], lo, hi):
+    """Least-squares line on points ``[lo, hi)``; arrays broadcast over splits."""
+    def seg(key):
+        return prefix[key][:, hi] - prefix[key][:, lo]
+
+    n, sx, sy, sxx, sxy, syy = (seg(k) for k in ("n", "x", "y", "xx", "xy", "yy"))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sxx_c = sxx - sx * sx / n
+        sxy_c = sxy - sx * sy / n
+        syy_c = syy - sy * sy / n
+        slope = sxy_c / sxx_c
+        intercept = (sy - slope * sx) / n
+        sse = np.maximum(syy_c - slope * sxy_c, 0.0)
+        x_mean = sx / n
+    return {"n": n, "slope": slope, "intercept": intercept, "sse": sse, "sxx_c": sxx_c, "x_mean": x_mean}
+
+
+def _knee(left, right, s2):
+    """Intersection of two fitted lines and its propagated uncertainty."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dm = left["slope"] - right["slope"]
+        db = right["intercept"] - left["intercept"]
+        x_knee = db / dm
+        variance = np.zeros_like(x_knee)
+        for seg, sign in ((left, 1.0), (right, -1.0)):
+            var_m = s2 / seg["sxx_c"]
+            var_b = s2 * (1.0 / seg["n"] + seg["x_mean"] ** 2 / seg["sxx_c"])
+            cov_mb = -s2 * seg["x_mean"] / seg["sxx_c"]
+            # x = (b_r - b_l) / (m_l - m_r)
+            g_m = -sign * db / dm**2
+            g_b = -sign / dm
+            variance += g_m**2 * var_m + g_b**2 * var_b + 2 * g_m * g_b * cov_mb
+    return x_knee, np.sqrt(np.maximum(variance, 0.0))
+
+
+def _two_segment_knee(x: np.ndarray, y: np.ndarray, min_points: int = MIN_SEGMENT_POINTS):
+    x, y, w, x_mean = _normalise(x, y)
+    n_rows, n_cols = x.shape
+    total = w.sum(axis=1)
+    splits = np.arange(min_points, n_cols - min_points + 1)
+    if splits.size == 0:
+        return np.full(n_rows, np.nan), np.full(n_rows, np.nan)
+
+    prefix = _prefix_sums(x, y, w)
+    left = _segment_fit(prefix, np.zeros_like(splits), splits)
+    right = _segment_fit(prefix, splits, np.full_like(splits, n_cols))
+    sse = left["sse"] + right["sse"]
+    ok = (left["n"] >= min_points) & (right["n"] >= min_points) & np.isfinite(sse)
+    sse = np.where(ok, sse, np.inf)
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(n_rows)
+    pick = lambda seg: {k: v[rows, best] for k, v in seg.items()}  # noqa: E731
+    dof = total - 4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s2 = np.where(dof > 0, sse[rows, best] / dof, np.nan)
+    x_knee, sigma = _knee(pick(left), pick(right), s2)
+
+    found = np.isfinite(sse[rows, best]) & _inside(x_knee, x, w)
+    x_knee = np.where(found, x_knee + x_mean, np.nan)
+    return x_knee, np.where(found, sigma, np.nan)
+
+
+def _three_segment_knees(x: np.ndarray, y: np.ndarray, min_points: int = MIN_SEGMENT_POINTS):
+    x, y, w, x_mean = _normalise(x, y)
+    n_rows, n_cols = x.shape
+    nan = np.full(n_rows, np.nan)
+    k1, k2 = np.triu_indices(n_cols + 1, k=min_points)
+    keep = (k1 >= min_points) & (k2 <= n_cols - min_points)
+    k1, k2 = k1[keep], k2[keep]
+    if k1.size == 0:
+        return nan, nan, nan, nan
+
+    prefix = _prefix_sums(x, y, w)
+    first = _segment_fit(prefix, np.zeros_like(k1), k1)
+    middle = _segment_fit(prefix, k1, k2)
+    last = _segment_fit(prefix, k2, np.full_like(k2, n_cols))
+    sse = first["sse"] + middle["sse"] + last["sse"]
+    ok = (
+        (first["n"] >= min_points) & (middle["n"] >= min_points) & (last["n"] >= min_points)
+        & np.isfinite(sse)
+    )
+    sse = np.where(ok, sse, np.inf)
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(n_rows)
+    pick = lambda seg: {k: v[rows, best] for k, v in seg.items()}  # noqa: E731
+    dof = w.sum(axis=1) - 6
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s2 = np.where(dof > 0, sse[rows, best] / dof, np.nan)
+    first, middle, last = pick(first), pick(middle), pick(last)
+    v_gl, sigma_gl = _knee(first, middle, s2)
+    v_fd, sigma_fd = _knee(middle, last, s2)
+
+    found = np.isfinite(sse[rows, best])
+    found_gl = found & _inside(v_gl, x, w)
+    found_fd = found & _inside(v_fd, x, w)
+    return (
+        np.where(found_gl, v_gl + x_mean, np.nan),
+        np.where(found_gl, sigma_gl, np.nan),
+        np.where(found_fd, v_fd + x_mean, np.nan),
+        np.where(found_fd, sigma_fd, np.nan),
+    )
+
+
+# --------------------------------------------------------------------------
+# Batch screening on loader tables
+# --------------------------------------------------------------------------
+def _pivot(means: pd.DataFrame, column: str) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    import pandas as pd
+
+    means = means.assign(**{"|V|": means["Voltage(V)"].abs()}).sort_values(["Run", "|V|"])
+    runs = means["Run"].astype(str)
+    position = means.groupby(runs, sort=False).cumcount().to_numpy()
+    index = pd.Index(pd.unique(runs), name="Run")
+    row = index.get_indexer(runs)
+    width = int(position.max()) + 1 if len(position) else 0
+    xs = np.full((len(index), width), np.nan)
+    ys = np.full((len(index), width), np.nan)
+    xs[row, position] = means["|V|"].to_numpy(dtype=float)
+    ys[row, position] = means[column].to_numpy(dtype=float)
+    return index, xs, ys
+
+
+def screen_iv(
+    table: pd.DataFrame,
+    stab_time: float,
+    method: str = "derivative",
+    k_threshold: float = DEFAULT_K_THRESHOLD,
+) -> pd.DataFrame:
+    """Breakdown voltage for every run of a :func:`runs.loader.load_runs` table."""
+    import pandas as pd
+    from runs.loader import stable_means
+
+    index, xs, ys = _pivot(stable_means(table, "Current(A)", stab_time), "Current(A)")
+    v_bd, sigma = breakdown_voltage(xs, ys, method=method, k_threshold=k_threshold)
+    return pd.DataFrame({"V_bd(V)": v_bd, "V_bd_err(V)": sigma}, index=index)
+
+
+def screen_cv(table: pd.DataFrame, stab_time: float, column: Optional[str] = None) -> pd.DataFrame:
+    """Gain-layer and full depletion voltages for every run of a loader table."""
+    import pandas as pd
+    from runs.loader import stable_means
+
+    column = column or ("Cp(F)" if "Cp(F)" in table.columns else "Cp(uF)")
+    index, xs, ys = _pivot(stable_means(table, column, stab_time), column)
+    v_gl, sigma_gl, v_fd, sigma_fd = depletion_voltages(xs, ys)
+    return pd.DataFrame(
+        {"V_gl(V)": v_gl, "V_gl_err(V)": sigma_gl, "V_fd(V)": v_fd, "V_fd_err(V)": sigma_fd},
+        index=index,
+    )
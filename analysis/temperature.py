@@ -0,0 +1,68 @@
+"""Scale silicon leakage current to a reference temperature.
+
+Bulk generation current follows
+
+    I(T_ref) = I(T) * (T_ref / T)^2 * exp(-Eg / (2 k) * (1 / T_ref - 1 / T))
+
+with temperatures in kelvin and ``Eg`` the effective band gap (1.21 eV
+is the usual value for irradiated and unirradiated silicon sensors).
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:  # pandas 只在批量归一化时才加载
+    import pandas as pd
+
+K_BOLTZMANN_EV = 8.617333262e-5  # eV / K
+DEFAULT_BAND_GAP = 1.21  # eV
+DEFAULT_REFERENCE_TEMPERATURE = 20.0  # °C
+ZERO_CELSIUS = 273.15
+
+TEMPERATURE_COLUMN = "Temperature(°C)"
+
+
+def scale_factor(temperature, reference=DEFAULT_REFERENCE_TEMPERATURE, band_gap=DEFAULT_BAND_GAP):
+    """Factor taking a current measured at ``temperature`` (°C) to ``reference`` (°C).
+
+    Broadcasts over array inputs; NaN temperatures give NaN.
+    """
+    t = np.asarray(temperature, dtype=float) + ZERO_CELSIUS
+    t_ref = np.asarray(reference, dtype=float) + ZERO_CELSIUS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (t_ref / t) ** 2 * np.exp(-band_gap / (2 * K_BOLTZMANN_EV) * (1 / t_ref - 1 / t))
+
+
+def normalise_current(current, temperature, reference=DEFAULT_REFERENCE_TEMPERATURE, band_gap=DEFAULT_BAND_GAP):
+    """``current`` measured at ``temperature`` (°C), scaled to ``reference`` (°C)."""
+    return np.asarray(current, dtype=float) * scale_factor(temperature, reference, band_gap)
+
+
+def normalise_runs(
+    table: pd.DataFrame,
+    stab_time: float,
+    reference: float = DEFAULT_REFERENCE_TEMPERATURE,
+    band_gap: float = DEFAULT_BAND_GAP,
+    column: str = "Current(A)",
+) -> pd.DataFrame:
+    """Stable step currents of every run in a :func:`runs.loader.load_runs` table, normalised.
+
+    Each sample is scaled with its own recorded temperature before the
+    stable-window mean, so drifts within a step are corrected too.
+    Returns ``Run``, ``Voltage(V)``, ``column``, ``Temperature(°C)`` and
+    ``<column> @ <reference>°C``; steps without a temperature get NaN.
+    """
+    from runs.loader import stable_means
+
+    normalised_column = f"{column} @ {reference:g}°C"
+    if TEMPERATURE_COLUMN in table.columns:
+        temperature = table[TEMPERATURE_COLUMN].to_numpy(dtype=float)
+    else:
+        temperature = np.full(len(table), np.nan)
+    work = table[["Run", "Voltage(V)", "Time(s)", column]].copy()
+    work[TEMPERATURE_COLUMN] = temperature
+    work[normalised_column] = normalise_current(work[column].to_numpy(dtype=float), temperature, reference, band_gap)
+
+    return stable_means(work, [column, TEMPERATURE_COLUMN, normalised_column], stab_time)
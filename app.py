@@ -7,34 +7,58 @@ from callbacks.env_status import register_env_status_callback
 from callbacks.iv_control import register_iv_control_callbacks
 from callbacks.iv_plot import register_iv_plot_callback
 from callbacks.cv_plot import register_cv_plot_callback
+from callbacks.live_stream import register_live_stream_route
+from callbacks.metrics import register_metrics_route
+from callbacks.api import register_api_routes
+from jobs import JobQueue
+from state import create_state_backend
+from sensors.sampler import EnvironmentSampler
+from runs import RunCatalog
+from runs.summary_cache import RunSummaryCache
+from telemetry.logs import setup_logging
 import threading
 
 import dash_bootstrap_components as dbc
 
+# 测量与驱动日志：热路径只入队，JSON 写入 outputs/logs/lgad.jsonl
+setup_logging()
+
 # 初始化 Dash 应用
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])  # 可替换为其他主题
 app.layout = generate_layout
+server = app.server  # gunicorn app:server
 
-# 全局共享状态（可变对象）
-shared_status = {
-    "voltage": None,
-    "current": None,
-    "time": None,
-    "parallel-resistance": None,
-    "parallel-capacitance": None,
-    "temperature": None,   # ✅ 新增
-    "humidity": None,       # ✅ 新增
-}
-time_series = []
-current_series = []
-iv_curve = []
-stop_event = threading.Event()
+# 共享状态：默认进程内对象；多 worker 部署时设置 LGAD_STATE_BACKEND=manager，
+# 由 state.broker 进程统一保存（见 README）
+state = create_state_backend()
+shared_status = state.status
+time_series = state.time_series
+current_series = state.current_series
+iv_curve = state.iv_curve
+stop_event = state.stop_event
+live_broadcaster = state.broadcaster
+# 后台线程独占 I²C 总线，回调和测量循环只读缓存；多 worker 时只有一个进程采样
+env_sampler = EnvironmentSampler(shared_status=shared_status, broadcaster=live_broadcaster)
+if state.claim("env-sampler"):
+    env_sampler.start()
+run_catalog = RunCatalog("outputs")
+summary_cache = RunSummaryCache(run_catalog, root="outputs")
+# 后台一次性登记早于数据库的历史运行目录
+threading.Thread(target=run_catalog.sync_directory, daemon=True).start()
+# HTTP API 提交的测量任务排队执行；多 worker 时只有一个进程接受任务
+job_queue = None
+if state.claim("job-queue"):
+    job_queue = JobQueue(shared_status, time_series, current_series, iv_curve, stop_event,
+                         live_broadcaster, run_catalog, env_sampler, station=state.station)
 
-register_iv_control_callbacks(app, shared_status, time_series, current_series, iv_curve, stop_event)
-register_env_status_callback(app, shared_status)
+register_iv_control_callbacks(app, shared_status, time_series, current_series, iv_curve, stop_event, live_broadcaster, run_catalog, env_sampler, state.station)
+register_live_stream_route(app, live_broadcaster)
+register_metrics_route(app, shared_status, env_sampler, live_broadcaster)
+register_api_routes(app, shared_status, live_broadcaster, job_queue, run_catalog, summary_cache)
+register_env_status_callback(app, env_sampler)
 register_graph_callback(app, shared_status, time_series, current_series)
-register_iv_plot_callback(app)
-register_cv_plot_callback(app)
+register_iv_plot_callback(app, run_catalog, summary_cache)
+register_cv_plot_callback(app, run_catalog, summary_cache)
 # ========== 启动 App ==========
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8050)
@@ -0,0 +1,142 @@
+// assets/live_stream.js
+// 通过 Server-Sent Events 接收测量数据，取代每秒轮询。
+// 连接正常时关闭 'interval' 定时器；断开时重新启用作为兜底。
+(function () {
+    'use strict';
+
+    var STREAM_URL = '/stream/live';
+    var REFRESH_THROTTLE_MS = 250;
+    var POINTS_PER_PIXEL = 2;  // 与 ui/viewport.py 保持一致
+    var lastRefresh = 0;
+
+    function setProps(id, props) {
+        var dc = window.dash_clientside;
+        if (dc && typeof dc.set_props === 'function') {
+            dc.set_props(id, props);
+        }
+    }
+
+    function liveGraph() {
+        var container = document.getElementById('live-graph');
+        return container ? container.querySelector('.js-plotly-plot') : null;
+    }
+
+    function formatExp(value) {
+        // 与 Python 的 f"{x:.3e}" 保持一致（指数至少两位）
+        return value.toExponential(3).replace(/e([+-])(\d)$/, 'e$10$2');
+    }
+
+    function statusText(sample) {
+        var voltage = sample.v === null || sample.v === undefined ? 'N/A' : sample.v.toFixed(2) + ' V';
+        var time = sample.t === null || sample.t === undefined ? 'N/A' : sample.t.toFixed(1) + ' s';
+        var current = sample.i === null || sample.i === undefined ? 'N/A' : formatExp(sample.i) + ' A';
+        return 'Voltage: ' + voltage + ' | Time: ' + time + ' | Current: ' + current;
+    }
+
+    function envText(env) {
+        // 与 callbacks/env_status.py 的格式保持一致
+        var temperature = env.temperature === null || env.temperature === undefined ? 'N/A' : env.temperature.toFixed(1) + ' °C';
+        var humidity = env.humidity === null || env.humidity === undefined ? 'N/A' : env.humidity.toFixed(1) + ' %';
+        return 'Temperature: ' + temperature + ' | Humidity: ' + humidity;
+    }
+
+    function pointBudget() {
+        var container = document.getElementById('live-graph');
+        var width = container ? container.clientWidth : window.innerWidth;
+        return Math.max(width * POINTS_PER_PIXEL, 500);
+    }
+
+    function reportViewport() {
+        setProps('viewport-width', {data: window.innerWidth});
+    }
+
+    function requestRefresh() {
+        // 让服务器端 update_graph 重新生成完整图像（节流，避免重复请求）
+        var now = Date.now();
+        if (now - lastRefresh < REFRESH_THROTTLE_MS) {
+            return;
+        }
+        lastRefresh = now;
+        setProps('live-refresh', {data: now});
+    }
+
+    function connect() {
+        if (!window.EventSource) {
+            return;  // 旧浏览器：保留定时轮询
+        }
+        var source = new EventSource(STREAM_URL);
+        var pendingX = [];
+        var pendingY = [];
+        var lastSample = null;
+        var scheduled = false;
+
+        function flush() {
+            scheduled = false;
+            var gd = liveGraph();
+            if (!gd || !gd.data || gd.data.length === 0 || !window.Plotly) {
+                pendingX = [];
+                pendingY = [];
+                requestRefresh();
+                return;
+            }
+            if (pendingX.length) {
+                window.Plotly.extendTraces(gd, {x: [pendingX], y: [pendingY]}, [0]);
+                pendingX = [];
+                pendingY = [];
+                // 追加点数超过预算时由服务器重新降采样
+                if (gd.data[0].x.length > 1.5 * pointBudget()) {
+                    requestRefresh();
+                }
+            }
+            if (lastSample) {
+                setProps('live-status', {children: statusText(lastSample)});
+            }
+        }
+
+        function schedule() {
+            if (!scheduled) {
+                scheduled = true;
+                window.requestAnimationFrame(flush);
+            }
+        }
+
+        source.onopen = function () {
+            setProps('interval', {disabled: true});
+            setProps('env-interval', {disabled: true});
+            requestRefresh();
+        };
+        source.onerror = function () {
+            // EventSource 会自动重连；期间恢复轮询
+            setProps('interval', {disabled: false});
+            setProps('env-interval', {disabled: false});
+        };
+        source.addEventListener('sample', function (e) {
+            var sample = JSON.parse(e.data);
+            pendingX.push(sample.t);
+            pendingY.push(sample.i);
+            lastSample = sample;
+            schedule();
+        });
+        source.addEventListener('env', function (e) {
+            setProps('env-status', {children: envText(JSON.parse(e.data))});
+        });
+        // trend：I–t 运行每分钟刷新一次聚合包络
+        ['step', 'status', 'reset', 'trend'].forEach(function (name) {
+            source.addEventListener(name, function () {
+                pendingX = [];
+                pendingY = [];
+                requestRefresh();
+            });
+        });
+    }
+
+    var resizeTimer = null;
+    window.addEventListener('resize', function () {
+        window.clearTimeout(resizeTimer);
+        resizeTimer = window.setTimeout(reportViewport, 300);
+    });
+    window.addEventListener('load', function () {
+        reportViewport();
+        connect();
+    });
+})();
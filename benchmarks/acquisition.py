@@ -0,0 +1,213 @@
+"""Acquisition-side benchmarks on the virtual instruments.
+
+- ``iv_samples_per_s``: achievable sample rate of ``perform_measurement``
+  with the sampling interval set to (almost) zero
+- ``iv_jitter_mean_ms`` / ``iv_jitter_p99_ms``: deviation of the sample
+  spacing from a 10 ms interval
+- ``ramp_overhead_ms`` / ``ramp_default_s``: ``ramp_voltage`` over
+  0 → -200 V without and with the engine's 50 ms settle delay
+- ``step_csv_write_ms_<n>``: writing one step file of ``n`` samples
+- ``run_record_ms``: ``IV_Curve.csv`` plus the run catalog entry
+- ``simulated_sweep_s``: wall time of the default 16-step sweep
+  (20 s per step) on the simulated clock
+- ``dut_gl_error_v`` / ``dut_fd_error_v``: how far the C–V analysis lands
+  from the LGAD model's gain-layer and full-depletion voltages, and
+  ``dut_cv_sweep_s`` the wall time of that simulated 41-step sweep
+- ``faulty_*``: sample rate, missing-sample fraction and p99 spacing
+  error with ``FAULTY_INSTRUMENTS`` (USB-like latency, garbled replies,
+  timeouts and short disconnects)
+"""
+from __future__ import annotations
+
+import glob
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import median_time, quiet, scratch_dir
+
+STEP_SIZES = (100, 1_000, 10_000)
+
+FAULTY_INSTRUMENTS = {
+    "hv_source": "virtual",
+    "picoammeter": "virtual",
+    "hv_options": {"faults": {"latency": 0.002, "jitter": 0.001, "distribution": "lognormal", "seed": 1}},
+    "pico_options": {"faults": {
+        "latency": 0.004, "jitter": 0.002, "distribution": "lognormal",
+        "garble_rate": 0.01, "timeout_rate": 0.002, "timeout": 0.1,
+        "disconnect_rate": 0.002, "disconnect_duration": 0.2, "seed": 2,
+    }},
+}
+
+
+def _config(**overrides):
+    from iv_control.config import MeasurementConfig
+
+    values = {
+        "start_voltage": -2,
+        "stop_voltage": -4,
+        "step_voltage": 2,
+        "measurement_duration": 1.0,
+        "sample_interval": 0.01,
+        "stabilization_time": 0.5,
+        "maximum_current": 100,
+        **overrides,
+    }
+    return MeasurementConfig.from_dict(values)
+
+
+def _run_iv(config, column: str = "Time(s)") -> list[np.ndarray]:
+    from iv_control.measurement import perform_measurement
+    from runs import RunCatalog
+
+    with scratch_dir():
+        with quiet():
+            perform_measurement(
+                {}, [], [], [], threading.Event(),
+                catalog=RunCatalog("outputs"),
+                config=config,
+            )
+        files = sorted(glob.glob(os.path.join("outputs", "iv_results_*", "results_*V.csv")))
+        return [pd.read_csv(path)[column].to_numpy() for path in files]
+
+
+def bench_sample_rate(duration: float = 1.0) -> dict[str, float]:
+    steps = _run_iv(_config(measurement_duration=duration, sample_interval=1e-6))
+    return {"iv_samples_per_s": float(np.mean([len(t) for t in steps]) / duration)}
+
+
+def bench_jitter(interval: float = 0.01) -> dict[str, float]:
+    steps = _run_iv(_config(sample_interval=interval))
+    deviation = np.abs(np.concatenate([np.diff(t) for t in steps]) - interval)
+    return {
+        "iv_jitter_mean_ms": float(deviation.mean() * 1e3),
+        "iv_jitter_p99_ms": float(np.percentile(deviation, 99) * 1e3),
+    }
+
+
+def bench_simulated_sweep() -> dict[str, float]:
+    config = _config(
+        start_voltage=-20, stop_voltage=-50, step_voltage=2,
+        measurement_duration=20, sample_interval=0.5, stabilization_time=5,
+        clock="simulated",
+    )
+    start = time.perf_counter()
+    steps = _run_iv(config)
+    assert len(steps) == 16 and all(len(t) == 40 for t in steps), "simulated sweep took the wrong samples"
+    return {"simulated_sweep_s": time.perf_counter() - start}
+
+
+def bench_dut_analysis() -> dict[str, float]:
+    from analysis.figures_of_merit import depletion_voltages
+    from cv_control.measurement import perform_cv_measurement
+    from instruments.dut import LGADModel
+    from runs import RunCatalog
+    from runs.summary_cache import RunSummaryCache
+
+    model = LGADModel()
+    config = _config(
+        start_voltage=0, stop_voltage=-80, step_voltage=2,
+        measurement_duration=2, sample_interval=0.5, stabilization_time=1,
+        clock="simulated",
+        instruments={"hv_source": "virtual", "picoammeter": "virtual", "lcr_meter": "virtual", "dut": {"seed": 0}},
+    )
+    with scratch_dir():
+        catalog = RunCatalog("outputs")
+        start = time.perf_counter()
+        with quiet():
+            perform_cv_measurement({}, [], [], [], threading.Event(), catalog=catalog, config=config)
+        elapsed = time.perf_counter() - start
+        # 与 C–V 图页相同的输入：汇总缓存按 V 排序（负偏压时 −80 … 0）
+        (record,), _ = catalog.query("cv")
+        voltages, capacitances = RunSummaryCache(catalog, "outputs").cv_curve(record.path)
+    v_gl, _, v_fd, _ = depletion_voltages(voltages, capacitances)
+    return {
+        "dut_gl_error_v": float(abs(v_gl - model.gain_layer_voltage)),
+        "dut_fd_error_v": float(abs(v_fd - model.full_depletion_voltage)),
+        "dut_cv_sweep_s": elapsed,
+    }
+
+
+def bench_faults(interval: float = 0.01) -> dict[str, float]:
+    config = _config(sample_interval=interval, instruments=FAULTY_INSTRUMENTS)
+    frames = _run_iv(config, column=["Time(s)", "Current(A)"])
+    times = [f[:, 0] for f in frames]
+    currents = np.concatenate([f[:, 1] for f in frames])
+    deviation = np.abs(np.concatenate([np.diff(t) for t in times]) - interval)
+    return {
+        "faulty_samples_per_s": float(np.mean([len(t) for t in times]) / config.measurement_duration),
+        "faulty_nan_fraction": float(np.isnan(currents).mean()),
+        "faulty_jitter_p99_ms": float(np.percentile(deviation, 99) * 1e3),
+    }
+
+
+def bench_ramp() -> dict[str, float]:
+    from instruments.hv_sources import VirtualHVSource
+    from instruments.picoammeters import VirtualPicoAmmeter
+    from iv_control.measurement import ramp_voltage
+
+    hv = VirtualHVSource()
+    hv.connect()
+    pico = VirtualPicoAmmeter(hv_source=hv)
+    pico.connect()
+
+    def ramp(delay):
+        hv.set_voltage(0.0)
+        with quiet():
+            ramp_voltage(hv, pico, -200.0, step=30.0, delay=delay, maximum_current=1e-3)
+
+    return {
+        "ramp_overhead_ms": median_time(lambda: ramp(0.0), repeat=20) * 1e3,
+        "ramp_default_s": median_time(lambda: ramp(0.05), repeat=1),
+    }
+
+
+def bench_writes() -> dict[str, float]:
+    from runs import RunCatalog, RunRecord
+
+    results = {}
+    rng = np.random.default_rng(0)
+    with scratch_dir():
+        os.makedirs("outputs/iv_results_bench", exist_ok=True)
+        for n in STEP_SIZES:
+            frame = pd.DataFrame({
+                "Time(s)": np.arange(n) * 0.01,
+                "Current(A)": rng.normal(1e-9, 1e-11, n),
+                "Temperature(°C)": np.full(n, 21.3),
+                "Humidity(%RH)": np.full(n, 40.1),
+                "SourceCurrent(A)": rng.normal(1e-9, 1e-11, n),
+            })
+            path = f"outputs/iv_results_bench/results_-{n}.00V.csv"
+            results[f"step_csv_write_ms_{n}"] = median_time(lambda: frame.to_csv(path, index=False), repeat=9) * 1e3
+
+        catalog = RunCatalog("outputs")
+        curve = pd.DataFrame({"Voltage(V)": -np.arange(100.0), "Current(A)": np.logspace(-10, -6, 100)})
+
+        def record():
+            curve.to_csv("outputs/iv_results_bench/IV_Curve.csv", index=False)
+            catalog.record(RunRecord(
+                path="outputs/iv_results_bench",
+                run_type="iv",
+                started_at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                status="finished",
+                config=dict(_config().raw),
+                summary={"n_steps": 100},
+            ))
+
+        results["run_record_ms"] = median_time(record, repeat=9) * 1e3
+    return results
+
+
+def run(quick: bool = False) -> dict[str, float]:
+    results = {}
+    results.update(bench_sample_rate(0.5 if quick else 1.0))
+    results.update(bench_jitter())
+    results.update(bench_simulated_sweep())
+    results.update(bench_dut_analysis())
+    results.update(bench_faults())
+    results.update(bench_ramp())
+    results.update(bench_writes())
+    return results
@@ -0,0 +1,82 @@
+"""Shared helpers for the benchmark modules."""
+from __future__ import annotations
+
+import contextlib
+import io
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Callable, Iterator
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextlib.contextmanager
+def scratch_dir() -> Iterator[str]:
+    """Run inside a temporary working directory holding a copy of ``configs/``.
+
+    The app and the engines use paths relative to the working directory
+    (``configs/config.yaml``, ``outputs/``), so benchmarks never touch the
+    checkout's own outputs.
+    """
+    path = tempfile.mkdtemp(prefix="lgad-bench-")
+    shutil.copytree(os.path.join(REPO_ROOT, "configs"), os.path.join(path, "configs"))
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield path
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def quiet() -> Iterator[None]:
+    """Silence the engines' progress output and log records while timing them."""
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def median_time(func: Callable[[], object], repeat: int = 5) -> float:
+    """Median wall time of ``func()`` in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def dash_update(client, outputs, inputs, state=()):
+    """POST one callback to ``/_dash-update-component`` as the browser does.
+
+    ``outputs`` is a list of ``(id, property)``; ``inputs`` and ``state``
+    are lists of ``(id, property, value)``. Returns the Flask response.
+    """
+    def spec(items):
+        return [{"id": i, "property": p, "value": v} for i, p, v in items]
+
+    if len(outputs) > 1:
+        output = "..{}..".format("...".join(f"{i}.{p}" for i, p in outputs))
+        output_spec = [{"id": i, "property": p} for i, p in outputs]
+    else:
+        output = "{}.{}".format(*outputs[0])
+        output_spec = {"id": outputs[0][0], "property": outputs[0][1]}
+    payload = {
+        "output": output,
+        "outputs": output_spec,
+        "inputs": spec(inputs),
+        "state": spec(state),
+        "changedPropIds": [f"{i}.{p}" for i, p, _ in inputs[:1]],
+    }
+    response = client.post("/_dash-update-component", json=payload)
+    if response.status_code not in (200, 204):
+        raise RuntimeError(f"{output}: HTTP {response.status_code} {response.data[:200]!r}")
+    return response
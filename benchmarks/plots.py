@@ -0,0 +1,133 @@
+"""Plot-callback benchmarks over synthetic data of increasing size.
+
+Requests go through the Flask test client exactly as the browser sends
+them, so the figures include Dash's JSON serialisation. For each size:
+
+- ``live_<n>_ms`` / ``live_<n>_kb``: ``update_graph`` with ``n`` points
+  in the live series
+- ``iv_<n>_cold_ms`` / ``iv_<n>_warm_ms`` / ``iv_<n>_kb``: ``plot_iv_curve``
+  adding a run of ``n`` voltage steps, first uncached (a freshly
+  written run folder) and then from the summary cache
+- ``cv_<n>_cold_ms`` / ``cv_<n>_warm_ms`` / ``cv_<n>_kb``: the same for
+  ``plot_cv_curve``
+"""
+from __future__ import annotations
+
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import REPO_ROOT, dash_update, median_time, quiet, scratch_dir
+
+LIVE_SIZES = (1_000, 10_000, 100_000)
+STEP_COUNTS = (20, 100, 400)
+QUICK_STEP_COUNTS = (20, 100)
+SAMPLES_PER_STEP = 100
+
+
+def _write_run(path: str, n_steps: int, kind: str, rng) -> None:
+    """A run folder shaped like the engines' output."""
+    os.makedirs(path, exist_ok=True)
+    voltages = -np.linspace(0, 2 * n_steps, n_steps)
+    times = np.arange(SAMPLES_PER_STEP) * 0.1
+    curve = []
+    for v in voltages:
+        current = 1e-10 * (1 + abs(v) / 50) * np.exp(max(abs(v) - 1.6 * n_steps, 0) / 20)
+        columns = {
+            "Time(s)": times,
+            "Current(A)": rng.normal(current, current * 0.01, SAMPLES_PER_STEP),
+        }
+        if kind == "cv":
+            capacitance = 5e-11 / np.sqrt(1 + abs(v) / 10)
+            columns["Cp(F)"] = rng.normal(capacitance, capacitance * 0.005, SAMPLES_PER_STEP)
+            columns["Rp(ohm)"] = np.full(SAMPLES_PER_STEP, 1e9)
+        columns["Temperature(°C)"] = rng.normal(21.0, 0.05, SAMPLES_PER_STEP)
+        columns["Humidity(%RH)"] = rng.normal(40.0, 0.2, SAMPLES_PER_STEP)
+        pd.DataFrame(columns).to_csv(os.path.join(path, f"results_{v:.2f}V.csv"), index=False)
+        curve.append((v, current))
+    if kind == "iv":
+        pd.DataFrame(curve, columns=["Voltage(V)", "Current(A)"]).to_csv(
+            os.path.join(path, "IV_Curve.csv"), index=False)
+
+
+def _import_app():
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    with quiet():
+        import app
+    return app
+
+
+def bench_live(app, client) -> dict[str, float]:
+    results = {}
+    for n in LIVE_SIZES:
+        app.time_series[:] = list(np.arange(n) * 0.5)
+        app.current_series[:] = list(1e-9 + 1e-11 * np.sin(np.arange(n) / 50))
+
+        def request():
+            return dash_update(
+                client,
+                [("live-graph", "figure"), ("live-status", "children")],
+                [("interval", "n_intervals", 1), ("live-refresh", "data", None), ("live-graph", "relayoutData", None)],
+                [("viewport-width", "data", 1920)],
+            )
+
+        results[f"live_{n}_ms"] = median_time(request, repeat=9) * 1e3
+        results[f"live_{n}_kb"] = len(request().data) / 1024
+    app.time_series[:] = []
+    app.current_series[:] = []
+    return results
+
+
+def _bench_run_plot(app, client, kind: str, n_steps: int, rng, cold_repeat: int = 3) -> dict[str, float]:
+    if kind == "iv":
+        def request(path):
+            return dash_update(
+                client,
+                [("iv-graph", "figure")],
+                [("iv-directory-dropdown", "value", path), ("iv-graph", "relayoutData", None),
+                 ("iv-temperature-normalise", "value", []), ("iv-reference-temperature", "value", 20)],
+                [("iv-graph", "figure", {"data": [], "layout": {}}), ("viewport-width", "data", 1920)],
+            )
+    else:
+        def request(path):
+            return dash_update(
+                client,
+                [("cv-graph", "figure")],
+                [("cv-directory-dropdown", "value", path), ("cv-graph", "relayoutData", None)],
+                [("viewport-width", "data", 1920)],
+            )
+
+    # 每次冷测量都用新写出的运行目录：内存与磁盘摘要缓存都未命中
+    cold = []
+    for r in range(cold_repeat):
+        path = f"outputs/{kind}_results_bench_{n_steps}_{r}"
+        _write_run(path, n_steps, kind, rng)
+        start = time.perf_counter()
+        with quiet():
+            response = request(path)
+        cold.append(time.perf_counter() - start)
+    with quiet():
+        warm = median_time(lambda: request(path), repeat=9)
+    return {
+        f"{kind}_{n_steps}_cold_ms": statistics.median(cold) * 1e3,
+        f"{kind}_{n_steps}_warm_ms": warm * 1e3,
+        f"{kind}_{n_steps}_kb": len(response.data) / 1024,
+    }
+
+
+def run(quick: bool = False) -> dict[str, float]:
+    rng = np.random.default_rng(0)
+    results = {}
+    with scratch_dir():
+        app = _import_app()
+        client = app.server.test_client()
+        results.update(bench_live(app, client))
+        for n_steps in (QUICK_STEP_COUNTS if quick else STEP_COUNTS):
+            for kind in ("iv", "cv"):
+                results.update(_bench_run_plot(app, client, kind, n_steps, rng))
+    return results
@@ -0,0 +1,115 @@
+"""Run the benchmark suites and compare against stored baselines.
+
+Everything runs offline on the virtual instruments. Usage::
+
+    python -m benchmarks.run                 # compare with benchmarks/baselines.json
+    python -m benchmarks.run --update        # record new baselines
+    python -m benchmarks.run --suite plots --quick
+
+A metric regresses when it is worse than its baseline by more than
+``--tolerance`` (relative) and by more than a small absolute floor, so
+sub-millisecond noise does not fail the run. Metrics ending in ``_per_s``
+are higher-is-better; all others are lower-is-better. The exit status is
+1 when anything regressed.
+
+Baselines are machine-specific: refresh them with ``--update`` after
+moving to another machine or after an intended change in performance.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks import acquisition, plots, startup
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+SUITES = {
+    "startup": lambda quick: startup.measure(repeat=2 if quick else 5),
+    "acquisition": acquisition.run,
+    "plots": plots.run,
+}
+
+# 绝对噪声下限：差值小于此值时不算退化
+ABSOLUTE_FLOOR = {"_ms": 1.0, "_s": 0.001, "_kb": 0.5, "_per_s": 0.0}
+
+
+def _floor(name: str) -> float:
+    for suffix, floor in ABSOLUTE_FLOOR.items():
+        if name.endswith(suffix):
+            return floor
+    return 0.0
+
+
+def run_suites(names, quick: bool = False) -> dict[str, dict[str, float]]:
+    results = {}
+    for name in names:
+        start = time.perf_counter()
+        metrics = SUITES[name](quick)
+        results[name] = {k: float(v) for k, v in metrics.items() if isinstance(v, (int, float))}
+        print(f"✅ {name}: {len(results[name])} metrics in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return results
+
+
+def compare(results, baselines, tolerance: float) -> list[str]:
+    """Print a table of results against baselines; return the regressed metric names."""
+    regressions = []
+    for suite, metrics in results.items():
+        reference = baselines.get(suite, {})
+        print(f"\n[{suite}]")
+        for name, value in metrics.items():
+            base = reference.get(name)
+            if base is None:
+                print(f"  {name:<28} {value:12.4g}   (no baseline)")
+                continue
+            higher_is_better = name.endswith("_per_s")
+            worse_by = (base - value) if higher_is_better else (value - base)
+            change = (value - base) / base * 100 if base else 0.0
+            regressed = worse_by > max(abs(base) * tolerance, _floor(name))
+            flag = "  ⚠️ REGRESSION" if regressed else ""
+            print(f"  {name:<28} {value:12.4g}   baseline {base:12.4g}   {change:+7.1f}%{flag}")
+            if regressed:
+                regressions.append(f"{suite}.{name}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the acquisition loop and plot callbacks.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="run only this suite (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions and smaller inputs")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown (default 0.5)")
+    parser.add_argument("--baselines", default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    results = run_suites(args.suite or list(SUITES), quick=args.quick)
+
+    stored = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            stored = json.load(f)
+
+    if args.update:
+        stored.setdefault("suites", {}).update(results)
+        stored["machine"] = f"{platform.node()} {platform.machine()} Python {platform.python_version()}"
+        stored["recorded_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(args.baselines, "w") as f:
+            json.dump(stored, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Baselines written to {args.baselines}")
+        return 0
+
+    regressions = compare(results, stored.get("suites", {}), args.tolerance)
+    if regressions:
+        print(f"\n⚠️ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Cold-start benchmark: ``import app`` and the first page render.
+
+Each repetition runs in a fresh interpreter (so module caches are cold)
+inside a scratch working directory with a copy of ``configs/``, and
+reports:
+
+- ``import_s``: wall time of ``import app``
+- ``layout_s``: ``GET /`` + ``/_dash-layout`` + ``/_dash-dependencies``
+- ``first_callbacks_s``: the initial live-graph, environment and I–V
+  plot callbacks, as the browser fires them on first load
+- ``modules``: modules loaded after the first render; heavy optional
+  libraries (pandas, pyarrow, drivers) should not appear here
+
+Usage::
+
+    python -m benchmarks.startup [--repeat 5] [--importtime]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WATCHED_MODULES = (
+    "numpy", "pandas", "pyarrow", "usbtmc", "usb", "serial", "smbus2",
+    "instruments.hv_sources", "instruments.picoammeters", "instruments.lcr_meters",
+    "iv_control.measurement", "cv_control.measurement",
+)
+
+_CHILD = r"""
+import json, sys, time
+sys.path.insert(0, {repo_root!r})
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+
+client = app.server.test_client()
+for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+    assert client.get(path).status_code == 200, path
+t2 = time.perf_counter()
+
+def fire(outputs, inputs, state=()):
+    def spec(items):
+        return [{{"id": i, "property": p, "value": v}} for i, p, v in items]
+    output = "...".join(f"{{i}}.{{p}}" for i, p in outputs)
+    payload = {{
+        "output": f"..{{output}}.." if len(outputs) > 1 else output,
+        "outputs": [{{"id": i, "property": p}} for i, p in outputs] if len(outputs) > 1 else {{"id": outputs[0][0], "property": outputs[0][1]}},
+        "inputs": spec(inputs),
+        "state": spec(state),
+        "changedPropIds": [],
+    }}
+    response = client.post("/_dash-update-component", json=payload)
+    assert response.status_code in (200, 204), (outputs, response.status_code, response.data[:200])
+
+fire([("live-graph", "figure"), ("live-status", "children")],
+     [("interval", "n_intervals", 0), ("live-refresh", "data", None), ("live-graph", "relayoutData", None)],
+     [("viewport-width", "data", None)])
+fire([("env-status", "children")], [("env-interval", "n_intervals", 0)])
+fire([("iv-graph", "figure")],
+     [("iv-directory-dropdown", "value", None), ("iv-graph", "relayoutData", None),
+      ("iv-temperature-normalise", "value", []), ("iv-reference-temperature", "value", 20)],
+     [("iv-graph", "figure", None), ("viewport-width", "data", None)])
+t3 = time.perf_counter()
+
+print(json.dumps({{
+    "import_s": t1 - t0,
+    "layout_s": t2 - t1,
+    "first_callbacks_s": t3 - t2,
+    "modules": sorted(m for m in {watched!r} if m in sys.modules),
+}}))
+"""
+
+
+def _scratch_dir() -> str:
+    path = tempfile.mkdtemp(prefix="lgad-startup-")
+    shutil.copytree(os.path.join(REPO_ROOT, "configs"), os.path.join(path, "configs"))
+    return path
+
+
+def run_once(importtime: bool = False) -> dict:
+    cwd = _scratch_dir()
+    try:
+        cmd = [sys.executable]
+        if importtime:
+            cmd += ["-X", "importtime"]
+        cmd += ["-c", _CHILD.format(repo_root=REPO_ROOT, watched=WATCHED_MODULES)]
+        proc = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=300)
+        if proc.returncode != 0:
+            raise RuntimeError(f"startup child failed:\n{proc.stderr[-2000:]}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if importtime:
+            result["slowest_imports"] = _slowest_imports(proc.stderr)
+        return result
+    finally:
+        shutil.rmtree(cwd, ignore_errors=True)
+
+
+def _slowest_imports(stderr: str, top: int = 15) -> list[tuple[str, float]]:
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            # 名称前的缩进表示嵌套层级；只看 app 的直接导入，避免父子模块重复计时
+            name = parts[2].rstrip()[1:]
+            if name.startswith("  ") and not name.startswith("   "):
+                rows.append((name.strip(), int(parts[1]) / 1e6))
+        except (IndexError, ValueError):
+            continue
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def measure(repeat: int = 5) -> dict:
+    """Median timings over ``repeat`` cold starts."""
+    runs = [run_once() for _ in range(repeat)]
+    summary = {
+        key: statistics.median(r[key] for r in runs)
+        for key in ("import_s", "layout_s", "first_callbacks_s")
+    }
+    summary["total_s"] = summary["import_s"] + summary["layout_s"] + summary["first_callbacks_s"]
+    summary["modules"] = runs[-1]["modules"]
+    return summary
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="also list the slowest direct imports of app")
+    args = parser.parse_args(argv)
+
+    summary = measure(args.repeat)
+    print(f"import app          {summary['import_s'] * 1e3:8.1f} ms")
+    print(f"layout requests     {summary['layout_s'] * 1e3:8.1f} ms")
+    print(f"first callbacks     {summary['first_callbacks_s'] * 1e3:8.1f} ms")
+    print(f"cold start total    {summary['total_s'] * 1e3:8.1f} ms")
+    print(f"loaded: {', '.join(summary['modules']) or '-'}")
+    if args.importtime:
+        print("\nslowest direct imports of app:")
+        for name, seconds in run_once(importtime=True)["slowest_imports"]:
+            print(f"  {seconds * 1e3:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# callbacks/api.py
+
+import functools
+import hmac
+import json
+import math
+import os
+
+from flask import Response, jsonify, request, send_from_directory, stream_with_context
+
+from iv_control.config import ConfigError
+from jobs import JobSpec
+
+API_PREFIX = '/api/v1'
+KEEPALIVE_SECONDS = 15
+RUN_FILE_SUFFIXES = ('.csv', '.json')
+
+
+def _clean(value):
+    # NaN/inf 不是合法 JSON，按 null 输出
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _clean(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(item) for item in value]
+    return value
+
+
+def _error(status, message):
+    return jsonify({'error': message}), status
+
+
+def register_api_routes(app, shared_status, broadcaster, job_queue=None, catalog=None, summary_cache=None, token=None):
+    """Serve the HTTP control and data API under ``/api/v1``.
+
+    Jobs go through ``job_queue`` (``None`` in workers that do not own the
+    station, which then answer 503). With ``token`` set (default
+    ``$LGAD_API_TOKEN``) every request needs ``Authorization: Bearer <token>``.
+    """
+    token = token if token is not None else os.environ.get('LGAD_API_TOKEN') or None
+
+    def route(rule, **options):
+        def decorator(view):
+            @functools.wraps(view)
+            def guarded(*args, **kwargs):
+                if token is not None:
+                    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+                    if not hmac.compare_digest(supplied.encode(), token.encode()):
+                        return _error(401, 'missing or invalid API token')
+                return view(*args, **kwargs)
+
+            return app.server.route(API_PREFIX + rule, endpoint=f'api_{view.__name__}', **options)(guarded)
+
+        return decorator
+
+    def job_dict(job):
+        data = job.as_dict()
+        if job.state == 'queued':
+            data['ahead'] = job_queue.queued_ahead(job)
+        return data
+
+    # —— 状态与任务 ---------------------------------------------------------
+    @route('/status')
+    def status():
+        current = job_queue.current if job_queue is not None else None
+        return jsonify(_clean({
+            'status': shared_status.copy(),
+            'job': current.as_dict() if current is not None else None,
+            'accepts_jobs': job_queue is not None,
+        }))
+
+    @route('/jobs', methods=['GET', 'POST'])
+    def jobs():
+        if job_queue is None:
+            return _error(503, 'this worker does not run measurement jobs')
+        if request.method == 'GET':
+            return jsonify({'jobs': [job_dict(job) for job in job_queue.jobs()]})
+
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return _error(400, 'expected a JSON object')
+        # 配置文件路径不接受远程指定，只能覆盖其中的键
+        if set(body) - {'kind', 'set', 'name'}:
+            return _error(400, 'allowed keys: kind, set, name')
+        if body.get('set') is not None and not isinstance(body['set'], dict):
+            return _error(400, "'set' must be an object of config keys")
+        try:
+            spec = JobSpec.from_dict(body)
+            spec.config()
+        except (ValueError, ConfigError, OSError) as exc:
+            return _error(400, str(exc))
+        # 仪表盘上的测量或回放正在使用仪器时拒绝；排在其他任务之后的照常排队
+        holder = job_queue.station.holder
+        if holder is not None and not holder.startswith(job_queue.OWNER_PREFIX):
+            return _error(409, f'station busy: {holder}')
+        job = job_queue.submit(spec)
+        return jsonify(job_dict(job)), 202, {'Location': f'{API_PREFIX}/jobs/{job.id}'}
+
+    @route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+    def job(job_id):
+        if job_queue is None:
+            return _error(503, 'this worker does not run measurement jobs')
+        found = job_queue.cancel(job_id) if request.method == 'DELETE' else job_queue.get(job_id)
+        if found is None:
+            return _error(404, f'unknown job {job_id}')
+        return jsonify(job_dict(found))
+
+    # —— 实时数据（NDJSON） --------------------------------------------------
+    @route('/stream')
+    def stream():
+        """One JSON object per line: ``{"event": ..., "data": {...}}``.
+
+        ``?events=sample,step`` limits the event types; a ``keepalive``
+        line is sent after 15 s without events.
+        """
+        wanted = {name for name in request.args.get('events', '').split(',') if name}
+
+        def generate():
+            with broadcaster.subscribe() as subscription:
+                yield json.dumps({'event': 'snapshot', 'data': _clean(shared_status.copy())}) + '\n'
+                while True:
+                    message = subscription.get(timeout=KEEPALIVE_SECONDS)
+                    if message is None:
+                        yield '{"event": "keepalive"}\n'
+                        continue
+                    event, data = message
+                    # reset 表示客户端落后、事件被丢弃，始终转发
+                    if wanted and event not in wanted and event != 'reset':
+                        continue
+                    yield json.dumps({'event': event, 'data': _clean(data)}) + '\n'
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='application/x-ndjson',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
+
+    # —— 运行记录与原始数据 --------------------------------------------------
+    def find_run(name):
+        if catalog is None or '/' in name or name.startswith('.'):
+            return None
+        return catalog.get(f'{catalog.root}/{name}')
+
+    def record_dict(record):
+        return {
+            'name': record.name,
+            'run_type': record.run_type,
+            'started_at': record.started_at,
+            'finished_at': record.finished_at,
+            'status': record.status,
+            'sensor_id': record.sensor_id,
+            'summary': record.summary,
+        }
+
+    @route('/runs')
+    def runs():
+        if catalog is None:
+            return _error(503, 'no run catalog')
+        try:
+            limit = min(int(request.args.get('limit', 50)), 500)
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return _error(400, 'limit and offset must be integers')
+        records, total = catalog.query(
+            run_type=request.args.get('type') or None,
+            search=request.args.get('search') or None,
+            limit=limit,
+            offset=offset,
+        )
+        return jsonify(_clean({'total': total, 'runs': [record_dict(r) for r in records]}))
+
+    @route('/runs/<name>')
+    def run(name):
+        record = find_run(name)
+        if record is None or not os.path.isdir(record.path):
+            return _error(404, f'unknown run {name}')
+        data = record_dict(record)
+        data['config'] = record.config
+        data['instruments'] = record.instruments
+        data['files'] = sorted(f for f in os.listdir(record.path) if f.endswith(RUN_FILE_SUFFIXES))
+        data['curve'] = None
+        if summary_cache is not None and record.run_type != 'it':
+            points = summary_cache.cv_curve(record.path) if record.run_type == 'cv' else summary_cache.iv_curve(record.path)
+            if points is not None:
+                data['curve'] = {'voltage': points[0].tolist(), 'value': points[1].tolist()}
+            # 组合运行另附 C–V 曲线（Cp，pF）
+            if record.run_type == 'ivcv':
+                points = summary_cache.cv_curve(record.path)
+                data['cv_curve'] = {'voltage': points[0].tolist(), 'value': points[1].tolist()} if points is not None else None
+        return jsonify(_clean(data))
+
+    @route('/runs/<name>/files/<filename>')
+    def run_file(name, filename):
+        record = find_run(name)
+        if record is None or not filename.endswith(RUN_FILE_SUFFIXES):
+            return _error(404, f'unknown file {name}/{filename}')
+        # send_from_directory 拒绝目录穿越，支持条件请求与 Range
+        return send_from_directory(os.path.abspath(record.path), filename, conditional=True)
@@ -1,52 +1,72 @@
-import os
-import pandas as pd
 import plotly.graph_objs as go
 import dash
 from dash import Input, Output, State, ctx, dcc
-from iv_control.config import load_config
+import numpy as np
+from analysis.downsample import downsample
+from analysis.figures_of_merit import depletion_voltages
+from ui.run_options import catalog_page
+from ui.viewport import is_zoom_event, point_budget, relayout_xrange
 
 font_family='Raleway'
-def register_cv_plot_callback(app):
+# 组合 I–V + C–V 运行同样含有 C–V 数据
+CV_RUN_TYPES = ('cv', 'ivcv')
+
+
+def register_cv_plot_callback(app, catalog, summary_cache):
 
     # —— 合并“显示”和“隐藏 iv-config-panel”到一个回调
     @app.callback(
         Output('cv-config-panel', 'style'),
         Output('cv-directory-dropdown', 'options'),
+        Output('cv-catalog-page', 'data'),
+        Output('cv-page-label', 'children'),
         Input('plot-cv-button', 'n_clicks'),
         Input('cv-hide-button', 'n_clicks'),
+        Input('cv-directory-dropdown', 'search_value'),
+        Input('cv-page-prev', 'n_clicks'),
+        Input('cv-page-next', 'n_clicks'),
+        State('cv-catalog-page', 'data'),
+        State('cv-directory-dropdown', 'value'),
         prevent_initial_call=True
     )
-    def toggle_iv_panel(plot_nclicks, hide_nclicks):
+    def toggle_cv_panel(plot_nclicks, hide_nclicks, search_value, prev_nclicks, next_nclicks, page, selected):
         triggered_id = ctx.triggered_id
 
-        # --------- 如果是“Plot I–V”按钮被按下
-        if triggered_id == 'plot-cv-button':
-            # 列出所有 outputs/iv_results_* 文件夹
-            try:
-                folders = sorted(
-                    [f"outputs/{d}" for d in os.listdir("outputs")
-                     if d.startswith("cv_results_") and os.path.isdir(os.path.join("outputs", d))],
-                    reverse=True
-                )
-            except FileNotFoundError:
-                folders = []
-            options = [{'label': f, 'value': f} for f in folders]
-            # 显示面板 + 填充下拉菜单
-            return {'display': 'block'}, options
-
         # --------- 如果是“收起下拉菜单”按钮被按下
-        elif triggered_id == 'cv-hide-button':
+        if triggered_id == 'cv-hide-button':
             # 隐藏面板，不改变 options
-            return {'display': 'none'}, dash.no_update
+            return {'display': 'none'}, dash.no_update, dash.no_update, dash.no_update
 
-        # --------- 其他情况（虽然 prevent_initial_call=True，但写个兜底）
-        return dash.no_update, dash.no_update
+        # --------- 翻页 / 搜索：从运行目录数据库分页查询，而不是扫描 outputs/
+        if triggered_id == 'cv-page-prev':
+            page = (page or 0) - 1
+        elif triggered_id == 'cv-page-next':
+            page = (page or 0) + 1
+        else:
+            page = 0
+        try:
+            options, page, label = catalog_page(catalog, CV_RUN_TYPES, search_value, page, selected)
+        except Exception as e:
+            print(f"⚠️ Run catalog error: {e}")
+            options, label = [], "Run catalog unavailable"
+
+        if triggered_id == 'plot-cv-button':
+            # 显示面板 + 填充下拉菜单
+            return {'display': 'block'}, options, page, label
+        return dash.no_update, options, page, label
 
     @app.callback(
         Output('cv-graph', 'figure'),
-        Input('cv-directory-dropdown', 'value')
+        Input('cv-directory-dropdown', 'value'),
+        Input('cv-graph', 'relayoutData'),
+        State('viewport-width', 'data'),
     )
-    def plot_cv_curve(selected_path):
+    def plot_cv_curve(selected_path, relayout_data, viewport_width):
+        # 仅响应缩放/平移，忽略 autosize 等其他 relayout 事件
+        zoomed = ctx.triggered_id == 'cv-graph'
+        if zoomed and not is_zoom_event(relayout_data):
+            return dash.no_update
+
         fig = go.Figure()
 
         fig.update_layout(
@@ -57,7 +77,8 @@ def register_cv_plot_callback(app):
             paper_bgcolor='lightseagreen',
             xaxis_title='Voltage (V)',
             yaxis_title='Capacitance (pF)',
-            autosize=True
+            autosize=True,
+            uirevision=selected_path,  # 重新取样时保留用户缩放
         )
         fig.update_yaxes(
             linewidth=2,
@@ -70,44 +91,18 @@ def register_cv_plot_callback(app):
             title_font=dict(family=font_family,size=20,shadow='1 1 2px midnightblue',weight=500),
             tickfont=dict(family=font_family,size=18,weight=400)
         )
-        data_points = []
         if not selected_path:
             return fig
         try:
-            files = sorted([
-                f for f in os.listdir(selected_path)
-                if f.endswith(".csv")
-                and (f.startswith("results_") or f.startswith("reuslts_"))
-            ])
-            cfg = load_config()
-            stab_time = cfg.get("stabilization_time", 2)
-            for fname in files:
-                voltage_str = fname.split('_')[-1].replace('V.csv', '')
-                voltage = float(voltage_str)
-                df = pd.read_csv(os.path.join(selected_path, fname))
-
-                if "Cp(F)" in df.columns:
-                    cap_series = df["Cp(F)"]
-                    scale_to_pf = 1e12
-                elif "Cp(uF)" in df.columns:
-                    cap_series = df["Cp(uF)"]
-                    scale_to_pf = 1e6
-                else:
-                    continue
-
-                last_seconds = df[df["Time(s)"] > df["Time(s)"].max() - stab_time]
-                window = cap_series.loc[last_seconds.index]
-                if window.empty:
-                    window = cap_series
-
-                avg_cap_pf = window.mean() * scale_to_pf
-                data_points.append((voltage, avg_cap_pf))
-
-            if not data_points:
+            points = summary_cache.cv_curve(selected_path)
+            if points is None:
                 return fig
 
-            data_points.sort()
-            voltages, capacitances = zip(*data_points)
+            voltages, capacitances = downsample(
+                *points,
+                point_budget(viewport_width),
+                x_range=relayout_xrange(relayout_data) if zoomed else None,
+            )
 
             fig.add_trace(go.Scatter(
                 x=voltages,
@@ -119,7 +114,26 @@ def register_cv_plot_callback(app):
                 line=dict(color='orange',width=4),
             ))
 
-            if capacitances and min(capacitances) > 0:
+            # —— 增益层 / 全耗尽电压标注（按 1/C² 拐点提取，坐标沿用扫描极性）
+            v_gl, sigma_gl, v_fd, sigma_fd = depletion_voltages(*points)
+            polarity = -1.0 if np.nanmedian(points[0]) < 0 else 1.0
+            for label, value, sigma, position in (
+                ('V_gl', v_gl, sigma_gl, 'top left'),
+                ('V_fd', v_fd, sigma_fd, 'top right'),
+            ):
+                if value != value:
+                    continue
+                text = f"{label} = {polarity * value:.1f}"
+                text += f" ± {sigma:.1f} V" if sigma == sigma else " V"
+                fig.add_vline(
+                    x=polarity * value,
+                    line=dict(color='black', width=2, dash='dash'),
+                    annotation_text=text,
+                    annotation_position=position,
+                    annotation_font=dict(family=font_family, size=14, color='black'),
+                )
+
+            if len(capacitances) and min(capacitances) > 0:
                 ratio = max(capacitances)/min(capacitances) if min(capacitances) else 0
                 fig.update_layout(
                     yaxis_type='log' if ratio > 1e2 else 'linear',
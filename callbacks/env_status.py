@@ -1,22 +1,22 @@
 # callbacks/env_status.py
 
 from dash import Output, Input
-from sensors.sht35 import read_sht35
 
-def register_env_status_callback(app, shared_status):
+
+def register_env_status_callback(app, env_sampler):
     @app.callback(
         Output('env-status', 'children'),
-        Input('interval', 'n_intervals')
+        Input('env-interval', 'n_intervals')
     )
     def update_env_status(n):
-        temperature, humidity = read_sht35()
-
-        # ✅ 更新共享状态
-        shared_status["temperature"] = temperature
-        shared_status["humidity"] = humidity
+        # 只读取后台采样线程的缓存，不在 Web 线程访问 I²C 总线
+        reading = env_sampler.latest()
+        temperature, humidity = reading.temperature, reading.humidity
+        # 采样线程停止或卡住时不显示过期读数
+        if not reading.age <= 5 * env_sampler.period:
+            temperature = humidity = None
 
         temperature_display = f"{temperature:.1f} °C" if temperature is not None else "N/A"
         humidity_display = f"{humidity:.1f} %" if humidity is not None else "N/A"
 
-        return f"Temperature: {temperature_display} | Humidity: {humidity_display}"
-
+        return f"Temperature: {temperature_display} | Humidity: {humidity_display}"
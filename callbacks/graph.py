@@ -1,7 +1,12 @@
 # ========== 图形更新回调 ==========
+import dash
 import numpy as np
 import plotly.graph_objs as go
-from dash import Output, Input
+from dash import Output, Input, State, ctx
+
+from analysis.downsample import downsample
+from telemetry import CALLBACKS
+from ui.viewport import is_zoom_event, point_budget, relayout_xrange
 
 font_family='Raleway'
 def register_graph_callback(app, _shared_status, _time_series, _current_series):
@@ -13,9 +18,17 @@ def register_graph_callback(app, _shared_status, _time_series, _current_series):
     @app.callback(
         Output('live-graph', 'figure'),
         Output('live-status', 'children'),
-        Input('interval', 'n_intervals')
+        Input('interval', 'n_intervals'),
+        Input('live-refresh', 'data'),
+        Input('live-graph', 'relayoutData'),
+        State('viewport-width', 'data'),
     )
-    def update_graph(n):
+    @CALLBACKS.timed('update_graph')
+    def update_graph(n, refresh, relayout_data, viewport_width):
+        # 仅响应缩放/平移，忽略 autosize 等其他 relayout 事件
+        if ctx.triggered_id == 'live-graph' and not is_zoom_event(relayout_data):
+            return dash.no_update, dash.no_update
+
         fig = go.Figure()
     
         fig.update_layout(
@@ -25,7 +38,8 @@ def register_graph_callback(app, _shared_status, _time_series, _current_series):
             paper_bgcolor='lightseagreen',
             xaxis_title='Time (s)',
             yaxis_title='Current (A)',
-            autosize=True
+            autosize=True,
+            uirevision='live',  # 刷新时保留用户缩放
         )
         fig.update_yaxes(
             linewidth=2,
@@ -38,34 +52,64 @@ def register_graph_callback(app, _shared_status, _time_series, _current_series):
             title_font=dict(family=font_family,size=20,shadow='1 1 2px midnightblue',weight=500),
             tickfont=dict(family=font_family,size=18,weight=400)
         )
-        if time_series and current_series:
-            y_min = np.nanmin(np.abs(current_series))
-            y_max = np.nanmax(np.abs(current_series))
+        # 测量线程可能正在追加数据，先各取一次快照再截成等长
+        times = np.asarray(time_series[:], dtype=float)
+        currents = np.asarray(current_series[:], dtype=float)
+        if len(times) and len(currents):
+            n_points = min(len(times), len(currents))
+            times = times[:n_points]
+            currents = currents[:n_points]
+
+            y_min = np.nanmin(np.abs(currents))
+            y_max = np.nanmax(np.abs(currents))
             span = y_max / y_min if y_min > 0 else 0
     
             yaxis_type = 'log' if span > 1e2 else 'linear'
+
+            # 按视口宽度降采样；缩放时只对可见区间重新取样（全分辨率）
+            x_plot, y_plot = downsample(
+                times,
+                currents,
+                point_budget(viewport_width),
+                x_range=relayout_xrange(relayout_data),
+            )
     
             fig.add_trace(go.Scatter(
-                x=time_series,
-                y=current_series,
+                x=x_plot,
+                y=y_plot,
                 marker=dict(color='gold',symbol='square',size=5),
                 marker_line=dict(color='wheat',width=3),
                 mode='lines+markers',
                 name='Current',
                 #line=dict(color='blue')
             ))
-    
+
+            status = shared_status.copy()  # 多进程后端下一次取回
+            # I–t 稳定性运行：整段运行的滚动聚合（包络 + 均值），实时样本只覆盖最近窗口
+            aggregate = status.get('it_series')
+            if aggregate and aggregate['t']:
+                label = f"{aggregate['width']:g} s"
+                fig.add_trace(go.Scatter(x=aggregate['t'], y=aggregate['max'], mode='lines',
+                                         line=dict(color='wheat', width=0), showlegend=False, hoverinfo='skip'))
+                fig.add_trace(go.Scatter(x=aggregate['t'], y=aggregate['min'], mode='lines', fill='tonexty',
+                                         line=dict(color='wheat', width=0), name=f'Min/Max ({label})'))
+                fig.add_trace(go.Scatter(x=aggregate['t'], y=aggregate['mean'], mode='lines',
+                                         line=dict(color='white', width=2), name=f'Mean ({label})'))
+
             fig.update_layout(
                 title_text='Live I–t Measurement',
                 autosize=True
             )
     
             #status_text = f"Voltage: {voltage_now} V Time: {time_now:.1f} s Current: {current_now:.3e} A"
-            voltage_display = f"{shared_status['voltage']:.2f} V" if shared_status["voltage"] is not None else "N/A"
-            time_display = f"{shared_status['time']:.1f} s" if shared_status["time"] is not None else "N/A"
-            current_display = f"{shared_status['current']:.3e} A" if shared_status["current"] is not None else "N/A"
+            voltage_display = f"{status['voltage']:.2f} V" if status.get("voltage") is not None else "N/A"
+            time_display = f"{status['time']:.1f} s" if status.get("time") is not None else "N/A"
+            current_display = f"{status['current']:.3e} A" if status.get("current") is not None else "N/A"
             
             status_text = f"Voltage: {voltage_display} | Time: {time_display} | Current: {current_display}"
+            trend = status.get('it')
+            if aggregate and trend:
+                status_text += f" | Drift: {trend['drift_A_per_h']:+.2e} A/h | Jumps: {trend['jumps']}"
     
         else:
             fig.update_layout(
@@ -1,40 +1,108 @@
 # callbacks/config_controls.py
 
+import importlib
 import threading
-import yaml
 import dash
 from dash import Input, Output, State, callback_context as ctx
-from iv_control.measurement import perform_measurement
+from iv_control.config import ConfigError, get_config, save_config
+from jobs.spec import ENGINES
+from state import Station
+from state.broker import StationLock
 
-def register_iv_control_callbacks(app, _shared_status, _time_series, _current_series, _iv_curve, _stop_event):
+# 启动按钮 → 运行类型（见 jobs.spec.ENGINES）
+START_BUTTONS = {'start-button': 'iv', 'start-ivcv-button': 'ivcv', 'start-it-button': 'it'}
+
+
+def _start_on_station(station, owner, target, args, kwargs):
+    # 运行结束（包括异常退出）后释放仪器
+    def run():
+        try:
+            target(*args, **kwargs)
+        finally:
+            station.release(owner)
+
+    threading.Thread(target=run).start()
+
+
+def register_iv_control_callbacks(app, _shared_status, _time_series, _current_series, _iv_curve, _stop_event, _broadcaster=None, _catalog=None, _env_sampler=None, _station=None):
     shared_status = _shared_status
     time_series = _time_series
     current_series = _current_series
     iv_curve = _iv_curve
     stop_event = _stop_event
+    broadcaster = _broadcaster
+    catalog = _catalog
+    env_sampler = _env_sampler
+    station = _station or Station(StationLock())
 
     # 控制按钮 Start / Stop
     @app.callback(
         Output('start-button', 'disabled'),
         Output('stop-button', 'disabled'),
+        Output('start-ivcv-button', 'disabled'),
+        Output('start-it-button', 'disabled'),
+        Output('replay-button', 'disabled'),
+        Output('control-status', 'children'),
         Input('start-button', 'n_clicks'),
         Input('stop-button', 'n_clicks'),
+        Input('replay-button', 'n_clicks'),
+        Input('start-ivcv-button', 'n_clicks'),
+        Input('start-it-button', 'n_clicks'),
+        State('iv-directory-dropdown', 'value'),
+        State('replay-speed', 'value'),
         prevent_initial_call=True
     )
-    def control_buttons(start_clicks, stop_clicks):
+    def control_buttons(start_clicks, stop_clicks, replay_clicks, start_ivcv_clicks, start_it_clicks, run_dir, replay_speed):
         print("🟢 [control_buttons] triggered")
-        if ctx.triggered_id == 'start-button':
+        if ctx.triggered_id in START_BUTTONS:
+            # 启动时固定配置快照，测量过程中修改配置不影响本次运行
+            try:
+                config = get_config()
+            except (ConfigError, OSError) as e:
+                print(f"⚠️ Invalid configuration, measurement not started: {e}")
+                return False, True, False, False, False, f"Invalid configuration: {e}"
+            # 测量引擎（pandas、仪器驱动）首次启动时才加载
+            kind = START_BUTTONS[ctx.triggered_id]
+            module, function = ENGINES[kind]
+            engine = getattr(importlib.import_module(module), function)
+
+            # API 任务或其他 worker 的测量正在使用仪器时不启动
+            owner = f"dashboard {kind}"
+            if not station.acquire(owner):
+                print(f"⚠️ Station busy ({station.holder}), measurement not started")
+                return (*[dash.no_update] * 5, f"Station busy: {station.holder}")
             stop_event.clear()
-            threading.Thread(
-                target=perform_measurement,
-                args=(shared_status, time_series, current_series, iv_curve, stop_event)
-            ).start()
-            return True, False
+            _start_on_station(
+                station, owner, engine,
+                (shared_status, time_series, current_series, iv_curve, stop_event),
+                {'broadcaster': broadcaster, 'catalog': catalog, 'env_sampler': env_sampler, 'config': config},
+            )
+            return True, False, True, True, True, ""
+        elif ctx.triggered_id == 'replay-button':
+            if not run_dir:
+                print("⚠️ Select a run folder to replay.")
+                return (*[dash.no_update] * 5, "Select a run folder to replay.")
+            from runs.replay import replay_run
+
+            # 回放走与测量相同的 shared_status / 序列 / 广播路径（会清空 iv_curve），
+            # 因此与测量一样先占用测量台；Stop 同样有效
+            if not station.acquire('replay'):
+                print(f"⚠️ Station busy ({station.holder}), replay not started")
+                return (*[dash.no_update] * 5, f"Station busy: {station.holder}")
+            stop_event.clear()
+            _start_on_station(
+                station, 'replay', replay_run,
+                (run_dir, shared_status, time_series, current_series, iv_curve, stop_event),
+                {'speed': replay_speed or 0, 'broadcaster': broadcaster},
+            )
+            return True, False, True, True, True, ""
         elif ctx.triggered_id == 'stop-button':
             stop_event.set()
+            if broadcaster is not None:
+                broadcaster.publish('status', {'state': 'stopping'})
             #instr.write("OUTP OFF")
-            return False, True
-        return dash.no_update, dash.no_update
+            return False, True, False, False, False, ""
+        return (dash.no_update,) * 6
 
     # 配置面板显示开关
     @app.callback(
@@ -62,6 +130,7 @@ def register_iv_control_callbacks(app, _shared_status, _time_series, _current_se
         Output('input-maximum-current', 'value'),
         Output('input-ac-voltage', 'value'),
         Output('input-ac-frequency', 'value'),
+        Output('input-sensor-id', 'value'),
         Input('config-button', 'n_clicks'),
         Input('confirm-config', 'n_clicks'),
         State('input-start-voltage', 'value'),
@@ -73,11 +142,12 @@ def register_iv_control_callbacks(app, _shared_status, _time_series, _current_se
         State('input-maximum-current', 'value'),
         State('input-ac-voltage', 'value'),
         State('input-ac-frequency', 'value'),
+        State('input-sensor-id', 'value'),
         State('config-store', 'data'),
         prevent_initial_call=True
     )
     def unified_config_handler(config_clicks, confirm_clicks,
-                               sv, ev, step, dur, si, stab, maxc, acv, acf,
+                               sv, ev, step, dur, si, stab, maxc, acv, acf, sensor_id,
                                current_store):
         triggered_id = ctx.triggered_id
 
@@ -93,10 +163,13 @@ def register_iv_control_callbacks(app, _shared_status, _time_series, _current_se
                 current_store['maximum_current'],
                 current_store['ac_voltage'],
                 current_store['ac_frequency'],
+                current_store.get('sensor_id'),
             )
 
         elif triggered_id == 'confirm-config':
+            # 保留 instruments 等其他配置项
             updated = {
+                **(current_store or {}),
                 'start_voltage': sv,
                 'stop_voltage': ev,
                 'step_voltage': step,
@@ -106,11 +179,10 @@ def register_iv_control_callbacks(app, _shared_status, _time_series, _current_se
                 'maximum_current': maxc,
                 'ac_voltage' : acv,
                 'ac_frequency' : acf,
+                'sensor_id': sensor_id or None,
             }
-            with open("configs/config.yaml", "w") as f:
-                print("save")
-                yaml.safe_dump(updated, f)
-            return (updated, sv, ev, step, dur, si, stab, maxc, acv, acf)
+            save_config(updated)
+            return (updated, sv, ev, step, dur, si, stab, maxc, acv, acf, sensor_id)
 
-        return dash.no_update, *([dash.no_update] * 9)
+        return dash.no_update, *([dash.no_update] * 10)
 
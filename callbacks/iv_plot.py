@@ -1,52 +1,130 @@
-import os
-import pandas as pd
+import numpy as np
 import plotly.graph_objs as go
 import dash
 from dash import Input, Output, State, ctx, dcc
+from analysis.downsample import downsample
+from analysis.figures_of_merit import breakdown_voltage
+from analysis.temperature import DEFAULT_BAND_GAP, DEFAULT_REFERENCE_TEMPERATURE, normalise_current
 from iv_control.config import load_config
+from ui.run_options import catalog_page
+from ui.viewport import is_zoom_event, point_budget, relayout_xrange
 
 font_family='Raleway'
-def register_iv_plot_callback(app):
+# 组合 I–V + C–V 运行同样含有 I–V 数据
+IV_RUN_TYPES = ('iv', 'ivcv')
+
+
+def _yaxis_type(traces):
+    return 'log' if any(t.y is not None and len(t.y) and max(t.y)/min(t.y) > 1e2 for t in traces) else 'linear'
+
+
+def _format_voltage(value, sigma):
+    if sigma == sigma:  # 非 NaN
+        return f"{value:.1f} ± {sigma:.1f} V"
+    return f"{value:.1f} V"
+
+
+def _current_axis_title(reference):
+    if reference is None:
+        return 'Current (A)'
+    return f'Current at {reference:g} °C (A)'
+
+
+def register_iv_plot_callback(app, catalog, summary_cache):
+
+    def run_points(path, reference, band_gap):
+        """Full-resolution (|V|, |I|) of a run and whether it could be normalised."""
+        points = summary_cache.iv_curve(path)
+        if points is None or reference is None:
+            return points, True
+        env = summary_cache.iv_temperature(path)
+        if env is None:
+            return points, False
+        voltages, currents = points
+        temperature = np.interp(voltages, *env)
+        return (voltages, normalise_current(currents, temperature, reference, band_gap)), True
+
     # —— 合并“显示”和“隐藏 iv-config-panel”到一个回调
     @app.callback(
         Output('iv-config-panel', 'style'),
         Output('iv-directory-dropdown', 'options'),
+        Output('iv-catalog-page', 'data'),
+        Output('iv-page-label', 'children'),
         Input('plot-iv-button', 'n_clicks'),
         Input('iv-hide-button', 'n_clicks'),
+        Input('iv-directory-dropdown', 'search_value'),
+        Input('iv-page-prev', 'n_clicks'),
+        Input('iv-page-next', 'n_clicks'),
+        State('iv-catalog-page', 'data'),
+        State('iv-directory-dropdown', 'value'),
         prevent_initial_call=True
     )
-    def toggle_iv_panel(plot_nclicks, hide_nclicks):
+    def toggle_iv_panel(plot_nclicks, hide_nclicks, search_value, prev_nclicks, next_nclicks, page, selected):
         triggered_id = ctx.triggered_id
 
-        # --------- 如果是“Plot I–V”按钮被按下
-        if triggered_id == 'plot-iv-button':
-            # 列出所有 outputs/iv_results_* 文件夹
-            try:
-                folders = sorted(
-                    [f"outputs/{d}" for d in os.listdir("outputs")
-                     if d.startswith("iv_results_") and os.path.isdir(os.path.join("outputs", d))],
-                    reverse=True
-                )
-            except FileNotFoundError:
-                folders = []
-            options = [{'label': f, 'value': f} for f in folders]
-            # 显示面板 + 填充下拉菜单
-            return {'display': 'block'}, options
-
         # --------- 如果是“收起下拉菜单”按钮被按下
-        elif triggered_id == 'iv-hide-button':
+        if triggered_id == 'iv-hide-button':
             # 隐藏面板，不改变 options
-            return {'display': 'none'}, dash.no_update
+            return {'display': 'none'}, dash.no_update, dash.no_update, dash.no_update
 
-        # --------- 其他情况（虽然 prevent_initial_call=True，但写个兜底）
-        return dash.no_update, dash.no_update
+        # --------- 翻页 / 搜索：从运行目录数据库分页查询，而不是扫描 outputs/
+        if triggered_id == 'iv-page-prev':
+            page = (page or 0) - 1
+        elif triggered_id == 'iv-page-next':
+            page = (page or 0) + 1
+        else:
+            page = 0
+        try:
+            options, page, label = catalog_page(catalog, IV_RUN_TYPES, search_value, page, selected)
+        except Exception as e:
+            print(f"⚠️ Run catalog error: {e}")
+            options, label = [], "Run catalog unavailable"
+
+        if triggered_id == 'plot-iv-button':
+            # 显示面板 + 填充下拉菜单
+            return {'display': 'block'}, options, page, label
+        return dash.no_update, options, page, label
 
     @app.callback(
         Output('iv-graph', 'figure'),
         Input('iv-directory-dropdown', 'value'),
+        Input('iv-graph', 'relayoutData'),
+        Input('iv-temperature-normalise', 'value'),
+        Input('iv-reference-temperature', 'value'),
         State('iv-graph', 'figure'),
+        State('viewport-width', 'data'),
     )
-    def plot_iv_curve(selected_path, existing_figure):
+    def plot_iv_curve(selected_path, relayout_data, normalise, reference_temperature, existing_figure, viewport_width):
+        budget = point_budget(viewport_width)
+        reference = None
+        if normalise and 'on' in normalise:
+            reference = DEFAULT_REFERENCE_TEMPERATURE if reference_temperature is None else float(reference_temperature)
+        band_gap = float(load_config().get('band_gap_energy', DEFAULT_BAND_GAP)) if reference is not None else DEFAULT_BAND_GAP
+
+        # —— 缩放 / 切换温度归一化：以全分辨率重新取样已有曲线
+        if ctx.triggered_id in ('iv-graph', 'iv-temperature-normalise', 'iv-reference-temperature'):
+            if not existing_figure:
+                return dash.no_update
+            x_range = None
+            if ctx.triggered_id == 'iv-graph':
+                if not is_zoom_event(relayout_data):
+                    return dash.no_update
+                x_range = relayout_xrange(relayout_data)
+            fig = go.Figure(existing_figure)
+            try:
+                for trace in fig.data:
+                    if not trace.meta:
+                        continue
+                    points, normalised = run_points(trace.meta, reference, band_gap)
+                    if points is None:
+                        continue
+                    trace.x, trace.y = downsample(*points, budget, x_range=x_range)
+                    trace.name = trace.meta.split("/")[-1] + ("" if normalised else " (no temperature data)")
+            except Exception as e:
+                print(f"⚠️ Plot error: {e}")
+                return dash.no_update
+            fig.update_layout(yaxis_title=_current_axis_title(reference))
+            return fig
     
         if not selected_path or not existing_figure:
             fig = go.Figure()
@@ -57,8 +135,9 @@ def register_iv_plot_callback(app):
                 plot_bgcolor='royalblue',
                 paper_bgcolor='lightseagreen',
                 xaxis_title='Voltage (V)',
-                yaxis_title='Current (A)',
-                autosize=True
+                yaxis_title=_current_axis_title(reference),
+                autosize=True,
+                uirevision='iv',  # 重新取样时保留用户缩放
             )
             fig.update_yaxes(
                 linewidth=2,
@@ -75,30 +154,10 @@ def register_iv_plot_callback(app):
         fig = go.Figure(existing_figure)  # ← 从已有图像初始化
     
         try:
-            files = sorted([
-                f for f in os.listdir(selected_path)
-                if f.endswith(".csv")
-                and (f.startswith("results_") or f.startswith("reuslts_"))
-            ])
-            if not files:
+            points, normalised = run_points(selected_path, reference, band_gap)
+            if points is None:
                 return go.Figure(existing_figure)
-            cfg = load_config()
-            stab_time = cfg.get("stabilization_time", 2)
-            data_points = []
-    
-            for fname in files:
-                voltage_str = fname.split('_')[-1].replace('V.csv', '')
-                voltage = float(voltage_str)
-                df = pd.read_csv(os.path.join(selected_path, fname))
-                last_seconds = df[df["Time(s)"] > df["Time(s)"].max() - stab_time]
-                if last_seconds.empty:
-                    avg_current = df["Current(A)"].mean()
-                else:
-                    avg_current = last_seconds["Current(A)"].mean()
-                data_points.append((abs(voltage), abs(avg_current)))
-    
-            data_points.sort()
-            voltages, currents = zip(*data_points)
+            voltages, currents = downsample(*points, budget)
     
             color_idx = len(fig.data)
             #color_palette = ['red', 'blue', 'green', 'orange', 'purple', 'brown', 'gold']
@@ -109,14 +168,25 @@ def register_iv_plot_callback(app):
                 x=voltages,
                 y=currents,
                 mode='markers+lines',
-                name=selected_path.split("/")[-1],
+                name=selected_path.split("/")[-1] + ("" if normalised else " (no temperature data)"),
+                meta=selected_path,  # 缩放时据此重新加载
                 marker=dict(color=color, symbol='square', size=8),
                 line=dict(color=color, width=3),
                 marker_line=dict(color=color, width=3),
             ))
+
+            # —— 击穿电压标注（在完整分辨率数据上提取）
+            v_bd, sigma_bd = breakdown_voltage(*points)
+            if v_bd == v_bd:
+                fig.add_vline(
+                    x=v_bd,
+                    line=dict(color=color, width=2, dash='dash'),
+                    annotation_text=f"V_bd = {_format_voltage(v_bd, sigma_bd)}",
+                    annotation_font=dict(family=font_family, size=14, color=color),
+                )
     
             fig.update_layout(
-                yaxis_type='log' if any(t.y and max(t.y)/min(t.y) > 1e2 for t in fig.data if t.y) else 'linear',
+                yaxis_type=_yaxis_type(fig.data),
                 autosize=True,
                 legend=dict(
                     font=dict(
@@ -132,4 +202,3 @@ def register_iv_plot_callback(app):
         except Exception as e:
             print(f"⚠️ Plot error: {e}")
             return go.Figure(existing_figure)
-    
@@ -0,0 +1,44 @@
+# callbacks/live_stream.py
+
+import json
+import math
+
+from flask import Response, stream_with_context
+
+KEEPALIVE_SECONDS = 15
+
+
+def _encode(data):
+    # NaN/inf 不是合法 JSON，浏览器端按缺失值处理
+    return json.dumps({
+        key: None if isinstance(value, float) and not math.isfinite(value) else value
+        for key, value in data.items()
+    })
+
+
+def register_live_stream_route(app, broadcaster):
+    """Serve measurement events as Server-Sent Events on ``/stream/live``.
+
+    Each viewer holds one blocked subscription; nothing runs for it until the
+    measurement engine publishes, so idle tabs cost no callbacks.
+    """
+
+    @app.server.route('/stream/live')
+    def live_stream():
+        def generate():
+            with broadcaster.subscribe() as subscription:
+                yield "retry: 2000\n\n"
+                while True:
+                    message = subscription.get(timeout=KEEPALIVE_SECONDS)
+                    if message is None:
+                        # 注释行保持连接，同时让服务器发现已断开的客户端
+                        yield ": keep-alive\n\n"
+                        continue
+                    event, data = message
+                    yield f"event: {event}\ndata: {_encode(data)}\n\n"
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+        )
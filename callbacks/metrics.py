@@ -0,0 +1,37 @@
+# callbacks/metrics.py
+
+import math
+
+from flask import Response
+
+from telemetry import ACQUISITION, CALLBACKS, CONTENT_TYPE, Exposition
+
+
+def register_metrics_route(app, shared_status, env_sampler=None, broadcaster=None, acquisition=ACQUISITION, callbacks=CALLBACKS):
+    """Serve acquisition health in the Prometheus text format on ``/metrics``.
+
+    Bias, current and sensor age come from the shared state; loop and
+    instrument counters come from the engines running in this process.
+    """
+
+    @app.server.route('/metrics')
+    def metrics():
+        out = Exposition()
+        status = shared_status.copy()  # 多进程后端下一次取回
+        out.gauge('lgad_bias_voltage_volts', 'Bias voltage of the latest sample.', status.get('voltage'))
+        out.gauge('lgad_current_amperes', 'Current of the latest sample.', status.get('current'))
+
+        if env_sampler is not None:
+            reading = env_sampler.latest()
+            age = reading.age if not math.isnan(reading.timestamp) else None
+            out.gauge('lgad_env_reading_age_seconds', 'Age of the latest temperature/humidity reading.', age)
+            out.gauge('lgad_env_temperature_celsius', 'Latest SHT35 temperature.', reading.temperature)
+            out.gauge('lgad_env_humidity_percent', 'Latest SHT35 relative humidity.', reading.humidity)
+
+        if broadcaster is not None:
+            out.gauge('lgad_live_subscribers', 'Connected live-stream viewers in this process.', broadcaster.subscriber_count)
+            out.gauge('lgad_live_queue_depth', 'Largest backlog of queued live events among viewers.', broadcaster.queue_depth)
+
+        acquisition.expose(out)
+        callbacks.expose(out)
+        return Response(out.text(), mimetype=None, content_type=CONTENT_TYPE)
@@ -1,18 +1,26 @@
+import logging
 import os
-import time
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
-from instruments import InstrumentSettings, create_instrument_suite
+from instruments import create_instrument_suite
 from instruments.base import LCRMeter
 from instruments.hv_sources import VirtualHVSource
 from instruments.picoammeters import VirtualPicoAmmeter
-from iv_control.config import load_config
+from instruments.clock import REAL_CLOCK, clock_for
+from iv_control.config import get_config
+from runs.catalog import new_run_dir, record_run
+from sensors.env_channel import EnvironmentChannel
+from state import push_sample
+from telemetry import ACQUISITION
+from telemetry.logs import bind_run, set_step, unbind_run
 
+logger = logging.getLogger(__name__)
 
-def perform_cv_measurement(shared_status, time_series, current_series, cv_curve, stop_event):
+
+def perform_cv_measurement(shared_status, time_series, current_series, cv_curve, stop_event, broadcaster=None, catalog=None, env_sampler=None, config=None, clock=None, metrics=None, output_root="outputs"):
     """
     Control Keithley 2470 (DC bias) and LCR meter (Cp, Rp measurement) in parallel to measure C-V curve.
     Save data for each DC bias step including capacitance and resistance.
@@ -22,24 +30,30 @@ def perform_cv_measurement(shared_status, time_series, current_series, cv_curve,
         time_series, current_series: list, data series for plotting
         cv_curve: list, stores (V, Cp, Rp)
         stop_event: threading.Event, allows external interruption
+        broadcaster: optional streaming.LiveBroadcaster for live samples and status
+        catalog: optional runs.RunCatalog the finished run is recorded in
+        env_sampler: optional sensors.sampler.EnvironmentSampler; shared_status is polled without it
+        config: optional iv_control.config.MeasurementConfig snapshot (defaults to the current config)
+        clock: optional instruments.clock.Clock for timing and waits (defaults to the configured clock mode)
+        metrics: optional telemetry.AcquisitionMetrics behind /metrics (defaults to telemetry.ACQUISITION)
+        output_root: folder the run folder is created in (defaults to outputs)
     """
-    timestamp = datetime.now().strftime("%m%d%H%M")
-    output_dir = f"outputs/cv_results_{timestamp}"
-    os.makedirs(output_dir, exist_ok=True)
-
-    cfg = load_config()
-    start_voltage = cfg['start_voltage']
-    stop_voltage = cfg['stop_voltage']
-    step_voltage = cfg['step_voltage']
-    measurement_duration = cfg['measurement_duration']
-    sample_interval = cfg['sample_interval']
-    stabilization_time = cfg['stabilization_time']
-    maximum_current = cfg['maximum_current'] * 1e-6
-
-    voltages = np.arange(start_voltage, stop_voltage + step_voltage, step_voltage)
-
-    instruments_cfg = InstrumentSettings.from_config(cfg)
-    suite = create_instrument_suite(instruments_cfg)
+    started_at = datetime.now().isoformat(timespec="seconds")
+    output_dir = new_run_dir("cv", output_root)
+    run_id = os.path.basename(output_dir)
+    bind_run(run_id, "cv")
+
+    cfg = config or get_config()
+    clock = clock or clock_for(cfg.instruments, cfg.clock, cfg.clock_scale)
+    metrics = metrics or ACQUISITION
+    measurement_duration = cfg.measurement_duration
+    sample_interval = cfg.sample_interval
+    stabilization_time = cfg.stabilization_time
+    maximum_current = cfg.maximum_current * 1e-6
+    voltages = cfg.sweep_voltages()
+
+    instruments_cfg = cfg.instruments
+    suite = create_instrument_suite(instruments_cfg, clock)
     hv_source = _ensure_hv_source(suite, instruments_cfg.hv_options)
     lcr_meter = suite.lcr_meter
 
@@ -49,81 +63,99 @@ def perform_cv_measurement(shared_status, time_series, current_series, cv_curve,
     suite.picoammeter = _ensure_picoammeter(suite.picoammeter, suite, hv_source, instruments_cfg.pico_options)
     lcr_meter.connect()
 
-    print(
-        "▶️ Starting CV measurement using",
+    logger.info(
+        "▶️ Starting CV measurement using %s HV, %s ammeter, and %s",
         hv_source.__class__.__name__,
-        "HV,",
         suite.picoammeter.__class__.__name__,
-        "ammeter, and",
         lcr_meter.__class__.__name__,
     )
 
     cv_curve.clear()
+    _publish(broadcaster, "status", {"state": "running", "mode": "cv", "run": run_id})
+    recorder = metrics.start_run("cv", suite.profiler, sample_interval, ("hv_source", "lcr_meter"))
+    run_state = "failed"
+    env_channel = EnvironmentChannel(env_sampler, shared_status, clock=clock)
+    run_t0 = clock.time()
 
     try:
         for v in voltages:
             if stop_event.is_set():
-                print("🔴 Measurement stopped.")
+                logger.info("Measurement stopped.")
                 return
 
+            set_step(v)
             hv_source.enable_output(True)
             hv_source.set_voltage(v)
 
             time_series.clear()
             current_series.clear()
+            _publish(broadcaster, "step", {"voltage": float(v)})
             timestamps = []
             current_data = []
             cp_list = []
             rp_list = []
 
-            humi = []
-            temp = []
-
-            start_time = time.perf_counter()
+            start_time = clock.monotonic()
+            # 样本时间映射到温湿度读数所用的系统时钟
+            start_wall = clock.time()
+            env_channel.poll()
+            recorder.new_step()
 
-            while (time.perf_counter() - start_time) < measurement_duration:
+            while (clock.monotonic() - start_time) < measurement_duration:
                 if stop_event.is_set():
                     return
-                loop_start = time.perf_counter()
+                loop_start = clock.monotonic()
                 elapsed = loop_start - start_time
 
                 try:
                     current = float(hv_source.measure_current())
                 except Exception as e:
-                    print(f"⚠️ Read error: {e}")
+                    logger.warning("Read error: %s", e, extra={"instrument": "hv_source"})
                     current = np.nan
+                source_done = clock.monotonic()
 
                 if _over_limit(current, maximum_current):
-                    print(f"⚠️ Over-current! {current:.3e} A > {maximum_current:.3e} A")
+                    logger.error(
+                        "Over-current! %.3e A > %.3e A", current, maximum_current,
+                        extra={"current": current, "limit": maximum_current},
+                    )
                     stop_event.set()
                     return
 
-                humidity = shared_status.get("humidity", "N/A")
-                temperature = shared_status.get("temperature", "N/A")
+                env_channel.poll()
 
+                lcr_start = clock.monotonic()
                 cp, rp = _fetch_cprp(lcr_meter)
+                lcr_done = clock.monotonic()
                 cp_list.append(cp)
                 rp_list.append(rp)
                 timestamps.append(elapsed)
                 current_data.append(current)
-                humi.append(humidity)
-                temp.append(temperature)
-                time_series.append(elapsed)
-                current_series.append(current)
-
-                shared_status["voltage"] = v
-                shared_status["current"] = current
-                shared_status["parallel-resistance"] = rp
-                shared_status["parallel-capacitance"] = cp
-                shared_status["time"] = elapsed
-
-                loop_duration = time.perf_counter() - loop_start
+
+                push_sample(
+                    shared_status, time_series, current_series, broadcaster, elapsed, current,
+                    {"voltage": v, "current": current, "parallel-resistance": rp, "parallel-capacitance": cp, "time": elapsed},
+                    {"t": elapsed, "i": current, "v": float(v), "cp": cp, "rp": rp},
+                )
+
+                loop_end = clock.monotonic()
+                recorder.sample(loop_start, loop_end, source_done - loop_start, lcr_done - lcr_start, current, cp)
+                loop_duration = loop_end - loop_start
                 sleep_time = sample_interval - loop_duration
                 if sleep_time > 0:
-                    time.sleep(sleep_time)
+                    clock.sleep(sleep_time)
 
             hv_source.enable_output(False)
 
+            stable = [k for k, t in enumerate(timestamps) if t > (measurement_duration - stabilization_time)]
+            if stable:
+                cv_curve.append((
+                    v,
+                    float(np.nanmean([cp_list[k] for k in stable])),
+                    float(np.nanmean([rp_list[k] for k in stable])),
+                ))
+
+            temp, humi = env_channel.align(start_wall + np.asarray(timestamps, dtype=float))
             df = pd.DataFrame({
                 'Time(s)': timestamps,
                 'Current(A)': current_data,
@@ -132,12 +164,54 @@ def perform_cv_measurement(shared_status, time_series, current_series, cv_curve,
                 'Temperature(°C)': temp,
                 'Humidity(%RH)': humi
             })
+            write_start = REAL_CLOCK.monotonic()
             df.to_csv(f"{output_dir}/results_{v:.2f}V.csv", index=False)
+            metrics.step_written(REAL_CLOCK.monotonic() - write_start)
+            _publish_transport(suite, shared_status, broadcaster)
 
-        print("✅ C–V measurement complete.")
+        logger.info("✅ C–V measurement complete.")
+        run_state = "finished"
     finally:
         hv_source.enable_output(False)
         suite.shutdown_all()
+        if stop_event.is_set():
+            run_state = "stopped"
+        if env_channel.has_data:
+            env_channel.to_frame(run_t0).to_csv(f"{output_dir}/Environment.csv", index=False)
+        if suite.profiler is not None:
+            logger.info("%s", suite.profiler.report())
+        record_run(output_dir, "cv", started_at, run_state, cfg.as_dict(), suite, _cv_summary(cv_curve), catalog)
+        metrics.end_run("cv", run_state)
+        unbind_run()
+        _publish(broadcaster, "status", {"state": run_state, "mode": "cv", "run": run_id, "path": output_dir})
+
+
+def _cv_summary(cv_curve) -> dict:
+    if not cv_curve:
+        return {"n_steps": 0}
+    voltages = np.array([row[0] for row in cv_curve], dtype=float)
+    caps = np.array([row[1] for row in cv_curve], dtype=float)
+    return {
+        "n_steps": len(cv_curve),
+        "min_voltage": float(voltages.min()),
+        "max_voltage": float(voltages.max()),
+        "min_cp": float(np.nanmin(caps)) if np.isfinite(caps).any() else None,
+        "max_cp": float(np.nanmax(caps)) if np.isfinite(caps).any() else None,
+    }
+
+
+def _publish(broadcaster, event: str, data: dict) -> None:
+    if broadcaster is not None:
+        broadcaster.publish(event, data)
+
+
+def _publish_transport(suite, shared_status, broadcaster) -> None:
+    # 每个电压点结束后更新一次传输层统计（需 instruments.profile: true）
+    if suite.profiler is None:
+        return
+    transport = suite.profiler.summary()
+    shared_status["transport"] = transport
+    _publish(broadcaster, "transport", transport)
 
 
 def _over_limit(value: float, limit: float) -> bool:
@@ -147,7 +221,12 @@ def _over_limit(value: float, limit: float) -> bool:
 
 
 def _fetch_cprp(lcr_meter: LCRMeter) -> tuple[float, float]:
-    cp, rp = lcr_meter.fetch_cprp()
+    # 单次读数失败记为 NaN，与电流读数一致，不中断整条扫描
+    try:
+        cp, rp = lcr_meter.fetch_cprp()
+    except Exception as e:
+        logger.warning("LCR read error: %s", e, extra={"instrument": "lcr_meter"})
+        return float("nan"), float("nan")
     return cp, rp
 
 
@@ -157,7 +236,7 @@ def _ensure_hv_source(suite, hv_options):
         hv_source.connect()
         return hv_source
     except Exception as exc:
-        print(f"⚠️ HV source unavailable for CV measurement ({exc}); switching to virtual source.")
+        logger.warning("HV source unavailable for CV measurement (%s); switching to virtual source.", exc)
         fallback = VirtualHVSource(
             noise=hv_options.get("noise", 5e-12),
             load_resistance=hv_options.get("virtual_dut_resistance", hv_options.get("load_resistance", 1e7)),
@@ -175,7 +254,7 @@ def _ensure_picoammeter(picoammeter, suite, hv_source, pico_options):
             picoammeter.set_resistance(pico_options.get("virtual_dut_resistance", pico_options.get("load_resistance", 1e7)))
         return picoammeter
     except Exception as exc:
-        print(f"⚠️ Picoammeter unavailable for CV measurement ({exc}); using virtual DUT (10MΩ).")
+        logger.warning("Picoammeter unavailable for CV measurement (%s); using virtual DUT (10MΩ).", exc)
         fallback = VirtualPicoAmmeter(
             noise=pico_options.get("noise", 2e-12),
             hv_source=hv_source,
@@ -1,5 +1,7 @@
 """Instrument factory helpers."""
 from .base import HVSource, PicoAmmeter, LCRMeter
+from .faults import FaultModel, InstrumentFault
+from .profiler import TransportProfiler
 from .factory import InstrumentSuite, InstrumentSettings, create_instrument_suite
 
 __all__ = [
@@ -9,4 +11,7 @@ __all__ = [
     "InstrumentSuite",
     "InstrumentSettings",
     "create_instrument_suite",
+    "FaultModel",
+    "InstrumentFault",
+    "TransportProfiler",
 ]
@@ -0,0 +1,114 @@
+"""Clocks for the measurement loops and the virtual instruments.
+
+The engines, ``ramp_voltage`` and the virtual instruments' fault model
+take every timestamp and every wait from a :class:`Clock`, so a sweep on
+virtual instruments can run faster than real time:
+
+- ``real``: ``time.perf_counter`` / ``time.sleep``; required with hardware
+- ``scaled``: time runs ``scale`` times faster than the wall clock
+- ``simulated``: discrete-event time that only advances when something
+  sleeps, so a sweep finishes as fast as the CPU allows
+
+Timestamps, sample counts and (with seeded virtual instruments) the
+recorded data are the same in every mode.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+CLOCK_MODES = ("real", "scaled", "simulated")
+
+logger = logging.getLogger(__name__)
+
+
+class Clock:
+    """Real time. ``time()`` is the wall clock, ``monotonic()`` the interval clock."""
+
+    is_real = True
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class ScaledClock(Clock):
+    """Runs ``scale`` times faster than real time (``scale < 1`` slows it down)."""
+
+    is_real = False
+
+    def __init__(self, scale: float) -> None:
+        if scale <= 0:
+            raise ValueError("clock scale must be positive")
+        self.scale = float(scale)
+        self._wall0 = time.time()
+        self._real0 = time.perf_counter()
+
+    def monotonic(self) -> float:
+        return (time.perf_counter() - self._real0) * self.scale
+
+    def time(self) -> float:
+        return self._wall0 + self.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds / self.scale)
+
+
+class SimulatedClock(Clock):
+    """Discrete-event clock: ``sleep`` advances time instantly; nothing else does.
+
+    Like an OS sleep, each ``sleep`` overshoots by ``overshoot`` seconds, so
+    ``while elapsed < duration`` loops take as many samples as in real time
+    instead of one extra from floating-point round-off.
+    """
+
+    is_real = False
+
+    def __init__(self, start: float | None = None, overshoot: float = 1e-6) -> None:
+        self._wall0 = time.time() if start is None else float(start)
+        self._overshoot_ns = round(overshoot * 1e9)
+        # 以整数纳秒计时，长时间运行也不累积浮点误差
+        self._now_ns = 0
+        self._lock = threading.Lock()
+
+    def monotonic(self) -> float:
+        return self._now_ns / 1e9
+
+    def time(self) -> float:
+        return self._wall0 + self.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self._now_ns += round(seconds * 1e9) + self._overshoot_ns
+
+
+REAL_CLOCK = Clock()
+
+
+def create_clock(mode: str = "real", scale: float = 1.0) -> Clock:
+    mode = (mode or "real").lower()
+    if mode == "real":
+        return REAL_CLOCK
+    if mode == "scaled":
+        return ScaledClock(scale)
+    if mode == "simulated":
+        return SimulatedClock()
+    raise ValueError(f"Unknown clock mode: {mode!r} (expected one of {', '.join(CLOCK_MODES)})")
+
+
+def clock_for(settings, mode: str = "real", scale: float = 1.0, include_lcr: bool = True) -> Clock:
+    """The clock a run uses; real time whenever real hardware is configured."""
+    clock = create_clock(mode, scale)
+    if not clock.is_real and not settings.is_virtual(include_lcr=include_lcr):
+        logger.warning("Clock mode '%s' needs virtual instruments; running in real time.", mode)
+        return REAL_CLOCK
+    return clock
@@ -0,0 +1,208 @@
+"""Vectorised LGAD device model shared by the virtual instruments.
+
+Enable it with a ``dut`` block in the ``instruments`` section::
+
+    instruments:
+      hv_source: virtual
+      picoammeter: virtual
+      lcr_meter: virtual
+      dut:
+        breakdown_voltage: 220      # V at the reference temperature
+        gain_layer_voltage: 25      # V, gain-layer depletion
+        full_depletion_voltage: 45  # V, bulk depletion
+        temperature: -20            # °C
+
+The HV source sets the bias; the picoammeter, the HV source's own
+current reading and the LCR meter all read the same device:
+
+- ``I(V, T, t)``: bulk generation current scaled by the depleted width,
+  multiplied by the gain-layer gain and the avalanche term
+  ``1 / (1 - (V/V_bd)^n)``, plus surface leakage. The generation current
+  follows the usual ``T² exp(-Eg/2kT)`` law and ``V_bd`` rises by
+  ``breakdown_temperature_coefficient`` per kelvin. After every bias
+  step the current relaxes to its steady value with ``settle_time``.
+- ``C(V, f)``: ``ε A / w(V)``, with a thin depletion region until the gain
+  layer is depleted, ``w ∝ √V`` in the bulk and ``w = thickness`` at
+  full depletion, so ``1/C²`` shows both knees. A series resistance
+  rolls the measured value off with frequency.
+
+All functions broadcast over NumPy arrays; instrument reads draw their
+noise from pre-generated buffers.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Any, Mapping, Optional
+
+import numpy as np
+
+from analysis.temperature import scale_factor
+
+from .clock import REAL_CLOCK, Clock
+
+EPSILON_SI = 11.7 * 8.8541878128e-12  # F/m
+BUILT_IN_VOLTAGE = 0.7  # V
+
+_NOISE_BUFFER = 4096
+
+
+@dataclass
+class LGADModel:
+    area: float = 1.3e-3 ** 2  # m²
+    thickness: float = 50e-6  # m
+    gain_layer_depth: float = 1e-6  # m
+    gain_layer_voltage: float = 25.0  # V
+    full_depletion_voltage: float = 45.0  # V
+    breakdown_voltage: float = 220.0  # V at reference_temperature
+    breakdown_temperature_coefficient: float = 0.8  # V/K
+    breakdown_exponent: float = 4.0
+    gain: float = 15.0  # gain-layer multiplication well below breakdown
+    generation_current: float = 2e-10  # A, fully depleted, unity gain, reference_temperature
+    surface_resistance: float = 1e12  # Ω
+    series_resistance: float = 1e3  # Ω, sets the C(f) roll-off
+    settle_time: float = 2.0  # s
+    relaxation: float = 0.5  # transient amplitude as a fraction of the current step
+    temperature: float = 20.0  # °C
+    reference_temperature: float = 20.0  # °C
+    band_gap: float = 1.21  # eV
+    noise: float = 0.01  # relative current noise
+    noise_floor: float = 2e-12  # A
+    capacitance_noise: float = 0.002  # relative
+    seed: Optional[int] = 0
+    clock: Clock = field(default=REAL_CLOCK, repr=False)
+
+    def __post_init__(self) -> None:
+        if not 0 < self.gain_layer_voltage < self.full_depletion_voltage < self.breakdown_voltage:
+            raise ValueError("need 0 < gain_layer_voltage < full_depletion_voltage < breakdown_voltage")
+        self._rng = np.random.default_rng(self.seed)
+        self._lock = threading.Lock()
+        self._noise = np.empty(0)
+        self._noise_pos = 0
+        self._bias = 0.0
+        self._step_time = self.clock.monotonic()
+        self._transient = 0.0
+
+    @classmethod
+    def from_options(cls, spec: Any, clock: Clock = REAL_CLOCK) -> Optional["LGADModel"]:
+        """``None`` for a missing/false spec; defaults for ``true`` or ``"lgad"``."""
+        if not spec:
+            return None
+        if not isinstance(spec, Mapping):
+            return cls(clock=clock)
+        spec = {k: v for k, v in spec.items() if k != "model"}
+        known = {f.name for f in fields(cls)} - {"clock"}
+        unknown = set(spec) - known
+        if unknown:
+            raise ValueError(f"Unknown DUT options: {', '.join(sorted(unknown))}")
+        return cls(clock=clock, **{k: (None if v is None else (int(v) if k == "seed" else float(v))) for k, v in spec.items()})
+
+    # —— 稳态物理量（可广播） ---------------------------------------------
+    def breakdown_at(self, temperature=None):
+        t = self.temperature if temperature is None else np.asarray(temperature, dtype=float)
+        return self.breakdown_voltage + self.breakdown_temperature_coefficient * (t - self.reference_temperature)
+
+    def depletion_width(self, voltage):
+        """Depleted depth (m) at reverse bias ``|voltage|``."""
+        v = np.abs(np.asarray(voltage, dtype=float))
+        v_gl, v_fd = self.gain_layer_voltage, self.full_depletion_voltage
+        below = self.gain_layer_depth * np.sqrt((v + BUILT_IN_VOLTAGE) / (v_gl + BUILT_IN_VOLTAGE))
+        bulk = self.gain_layer_depth + (self.thickness - self.gain_layer_depth) * np.sqrt(
+            np.clip((v - v_gl) / (v_fd - v_gl), 0.0, 1.0))
+        return np.where(v < v_gl, below, bulk)
+
+    def multiplication(self, voltage, temperature=None):
+        v = np.abs(np.asarray(voltage, dtype=float))
+        # 增益层耗尽后才有倍增；随偏压从 1 平滑过渡到额定增益
+        s = np.clip((v - self.gain_layer_voltage) / (self.full_depletion_voltage - self.gain_layer_voltage), 0.0, 1.0)
+        base = 1.0 + (self.gain - 1.0) * s * s * (3.0 - 2.0 * s)
+        v_bd = self.breakdown_at(temperature)
+        denominator = 1.0 - (v / v_bd) ** self.breakdown_exponent
+        # 分母降到 1e-3 之后改为指数增长（每 5 V 增大 e 倍），曲线保持连续
+        v_knee = v_bd * (1.0 - 1e-3) ** (1 / self.breakdown_exponent)
+        floor = 1e-3 * np.exp(-np.maximum(v - v_knee, 0.0) / 5.0)
+        return base / np.maximum(denominator, floor)
+
+    def steady_current(self, voltage, temperature=None):
+        """Steady-state leakage current (A), with the sign of ``voltage``."""
+        voltage = np.asarray(voltage, dtype=float)
+        t = self.temperature if temperature is None else np.asarray(temperature, dtype=float)
+        v = np.abs(voltage)
+        generation = self.generation_current / scale_factor(t, self.reference_temperature, self.band_gap)
+        bulk = generation * self.depletion_width(v) / self.thickness * self.multiplication(v, t)
+        return np.sign(voltage) * (bulk + v / self.surface_resistance)
+
+    def capacitance(self, voltage, frequency=1e4):
+        """Capacitance (F) an LCR meter in Cp mode reads at ``frequency`` (Hz)."""
+        c = EPSILON_SI * self.area / self.depletion_width(voltage)
+        omega_rc = 2 * np.pi * np.asarray(frequency, dtype=float) * self.series_resistance * c
+        return c / (1.0 + omega_rc ** 2)
+
+    def depletion_charge(self, voltage) -> float:
+        """Depletion-region charge ``∫₀^V C dV`` (C), with the sign of ``voltage``."""
+        grid = np.linspace(0.0, float(voltage), 65)
+        c = self.capacitance(grid, 0.0)
+        return float(np.sum((c[1:] + c[:-1]) * np.diff(grid)) / 2)
+
+    def parallel_resistance(self, voltage):
+        v = np.abs(np.asarray(voltage, dtype=float))
+        return np.maximum(v, 1.0) / np.maximum(np.abs(self.steady_current(v)), 1e-15)
+
+    # —— 偏压与瞬态 -------------------------------------------------------
+    @property
+    def bias(self) -> float:
+        return self._bias
+
+    def set_bias(self, voltage: float) -> None:
+        """Apply ``voltage`` now; the current relaxes from the step with ``settle_time``."""
+        voltage = float(voltage)
+        with self._lock:
+            if voltage == self._bias:
+                return
+            now = self.clock.monotonic()
+            residual = self._transient * np.exp(-(now - self._step_time) / self.settle_time)
+            old = float(self.steady_current(self._bias))
+            new = float(self.steady_current(voltage))
+            # 位移电流：耗尽区电荷 Q(V) = ∫C dV 的变化在 settle_time 内流过
+            charge = (self.depletion_charge(voltage) - self.depletion_charge(self._bias)) / self.settle_time
+            self._transient = residual + charge + self.relaxation * (new - old)
+            self._bias = voltage
+            self._step_time = now
+
+    def currents(self, times, voltage: Optional[float] = None):
+        """Noisy currents at run-clock ``times`` (s) for the present bias."""
+        if voltage is not None:
+            self.set_bias(voltage)
+        times = np.asarray(times, dtype=float)
+        with self._lock:
+            steady = float(self.steady_current(self._bias))
+            transient = self._transient * np.exp(-np.maximum(times - self._step_time, 0.0) / self.settle_time)
+            noise = self._normals(times.size).reshape(times.shape)
+        value = steady + transient
+        return value + noise * np.hypot(self.noise * value, self.noise_floor)
+
+    def read_current(self, voltage: Optional[float] = None) -> float:
+        return float(self.currents(self.clock.monotonic(), voltage))
+
+    def read_burst(self, n: int, interval: float, voltage: Optional[float] = None) -> np.ndarray:
+        """``n`` readings spaced ``interval`` apart, starting now (a buffered trigger burst)."""
+        return self.currents(self.clock.monotonic() + interval * np.arange(n), voltage)
+
+    def read_cprp(self, frequency: float = 1e4) -> tuple[float, float]:
+        with self._lock:
+            bias = self._bias
+            noise = self._normals(2)
+        cp = float(self.capacitance(bias, frequency)) * (1.0 + self.capacitance_noise * noise[0])
+        rp = float(self.parallel_resistance(bias)) * (1.0 + 0.02 * noise[1])
+        return cp, rp
+
+    def _normals(self, n: int) -> np.ndarray:
+        # 成块生成正态噪声，逐次读数只做切片
+        if n > _NOISE_BUFFER:
+            return self._rng.standard_normal(n)
+        if self._noise_pos + n > self._noise.size:
+            self._noise = self._rng.standard_normal(_NOISE_BUFFER)
+            self._noise_pos = 0
+        out = self._noise[self._noise_pos:self._noise_pos + n]
+        self._noise_pos += n
+        return out
@@ -1,24 +1,28 @@
-"""Factory helpers that assemble instrument suites from configuration."""
+"""Factory helpers that assemble instrument suites from configuration.
+
+Driver modules (and with them usbtmc/pyusb/pyserial) are imported only
+when an instrument of that family is created, so a virtual suite or a
+browse-only session never loads hardware libraries.
+"""
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from .base import HVSource, PicoAmmeter, LCRMeter
-from .hv_sources import (
-    HVSourceOptions,
-    Keithley2470HVSource,
-    Keithley6487HVSource,
-    VirtualHVSource,
-)
-from .keithley6487 import Keithley6487Controller
-from .lcr_meters import KeysightE4980ALCRMeter, LCROptions, VirtualLCRMeter
-from .picoammeters import (
-    PicoOptions,
-    Keithley6485PicoAmmeter,
-    Keithley6487PicoAmmeter,
-    VirtualPicoAmmeter,
-)
+from .clock import REAL_CLOCK, Clock
+from .faults import FaultModel
+from .profiler import TransportProfiler
+
+if TYPE_CHECKING:
+    from .dut import LGADModel
+    from .keithley6487 import Keithley6487Controller
+
+logger = logging.getLogger(__name__)
+
+
+VIRTUAL_TYPES = {"virtual", "sim", "simulation"}
 
 
 @dataclass
@@ -29,6 +33,8 @@ class InstrumentSettings:
     hv_options: dict[str, Any] = field(default_factory=dict)
     pico_options: dict[str, Any] = field(default_factory=dict)
     lcr_options: dict[str, Any] = field(default_factory=dict)
+    dut: Any = None  # instruments.dut.LGADModel 的参数；缺省时虚拟仪器用固定电阻
+    profile: bool = False  # 记录每条命令的耗时（instruments.profiler）
 
     @classmethod
     def from_config(cls, config: dict[str, Any]) -> "InstrumentSettings":
@@ -40,14 +46,22 @@ class InstrumentSettings:
             hv_options=instruments_cfg.get("hv_options", {}),
             pico_options=instruments_cfg.get("pico_options", {}),
             lcr_options=instruments_cfg.get("lcr_options", {}),
+            dut=instruments_cfg.get("dut"),
+            profile=bool(instruments_cfg.get("profile", False)),
         )
 
+    def is_virtual(self, include_lcr: bool = True) -> bool:
+        """True when none of the instruments a run uses is real hardware."""
+        kinds = [self.hv_source, self.picoammeter] + ([self.lcr_meter] if include_lcr else [])
+        return all((kind or "virtual").lower() in VIRTUAL_TYPES | {"none", "disabled"} for kind in kinds)
+
 
 @dataclass
 class InstrumentSuite:
     hv_source: HVSource
     picoammeter: PicoAmmeter
     lcr_meter: Optional[LCRMeter] = None
+    profiler: Optional[TransportProfiler] = None
 
     def shutdown_all(self) -> None:
         self.hv_source.shutdown()
@@ -56,14 +70,21 @@ class InstrumentSuite:
             self.lcr_meter.shutdown()
 
 
-def create_instrument_suite(settings: InstrumentSettings) -> InstrumentSuite:
-    """Create instrument wrappers with optional shared controllers."""
+def create_instrument_suite(settings: InstrumentSettings, clock: Clock = REAL_CLOCK) -> InstrumentSuite:
+    """Create instrument wrappers with optional shared controllers.
+
+    ``clock`` drives the virtual instruments' latency and fault model.
+    With ``settings.profile`` the drivers' transport calls are timed by a
+    :class:`~instruments.profiler.TransportProfiler` on ``suite.profiler``.
+    """
     hv_type = (settings.hv_source or "virtual").lower()
     pico_type = (settings.picoammeter or "virtual").lower()
     lcr_type = (settings.lcr_meter or "virtual").lower() if settings.lcr_meter else None
 
     shared_6487: Optional[Keithley6487Controller] = None
     if "6487" in {hv_type, pico_type}:
+        from .keithley6487 import Keithley6487Controller
+
         shared_port = (
             settings.hv_options.get("serial_port")
             or settings.pico_options.get("serial_port")
@@ -71,18 +92,33 @@ def create_instrument_suite(settings: InstrumentSettings) -> InstrumentSuite:
         )
         shared_6487 = Keithley6487Controller(port=shared_port)
 
-    hv_source = _create_hv_source(hv_type, settings.hv_options, shared_6487)
-    picoammeter = _create_picoammeter(pico_type, settings.pico_options, shared_6487, hv_source)
-    lcr_meter = _create_lcr_meter(lcr_type, settings.lcr_options)
+    dut = None
+    if settings.dut:
+        from .dut import LGADModel
 
-    return InstrumentSuite(hv_source=hv_source, picoammeter=picoammeter, lcr_meter=lcr_meter)
+        dut = LGADModel.from_options(settings.dut, clock)
+    hv_source = _create_hv_source(hv_type, settings.hv_options, shared_6487, clock, dut)
+    picoammeter = _create_picoammeter(pico_type, settings.pico_options, shared_6487, hv_source, clock, dut)
+    lcr_meter = _create_lcr_meter(lcr_type, settings.lcr_options, clock, dut)
+
+    profiler = None
+    if settings.profile:
+        profiler = TransportProfiler(clock)
+        for name, driver in (("hv_source", hv_source), ("picoammeter", picoammeter), ("lcr_meter", lcr_meter)):
+            if driver is not None:
+                profiler.attach(driver, name)
+    return InstrumentSuite(hv_source=hv_source, picoammeter=picoammeter, lcr_meter=lcr_meter, profiler=profiler)
 
 
 def _create_hv_source(
     hv_type: str,
     options: dict[str, Any],
     shared_6487: Optional[Keithley6487Controller],
+    clock: Clock = REAL_CLOCK,
+    dut: Optional[LGADModel] = None,
 ) -> HVSource:
+    from .hv_sources import HVSourceOptions, Keithley2470HVSource, Keithley6487HVSource, VirtualHVSource
+
     if hv_type in {"keithley_2470", "keithley2470", "2470"}:
         hv_options = HVSourceOptions(
             voltage_range=options.get("voltage_range"),
@@ -90,7 +126,7 @@ def _create_hv_source(
         try:
             return Keithley2470HVSource(hv_options)
         except Exception as exc:
-            print(f"⚠️ Failed to initialize Keithley 2470 ({exc}); using virtual HV source.")
+            logger.warning("Failed to initialize Keithley 2470 (%s); using virtual HV source.", exc)
     if hv_type in {"keithley_6487", "keithley6487", "6487"}:
         hv_options = HVSourceOptions(
             serial_port=options.get("serial_port"),
@@ -99,11 +135,13 @@ def _create_hv_source(
         try:
             return Keithley6487HVSource(hv_options, controller=shared_6487)
         except Exception as exc:
-            print(f"⚠️ Failed to initialize Keithley 6487 HV source ({exc}); using virtual HV source.")
-    if hv_type in {"virtual", "sim", "simulation"}:
+            logger.warning("Failed to initialize Keithley 6487 HV source (%s); using virtual HV source.", exc)
+    if hv_type in VIRTUAL_TYPES:
         return VirtualHVSource(
             noise=options.get("noise", 5e-12),
             load_resistance=options.get("virtual_dut_resistance", options.get("load_resistance", 1e7)),
+            faults=FaultModel.from_options(options, clock),
+            dut=dut,
         )
     raise ValueError(f"Unsupported HV source type: {hv_type}")
 
@@ -113,31 +151,50 @@ def _create_picoammeter(
     options: dict[str, Any],
     shared_6487: Optional[Keithley6487Controller],
     hv_source: HVSource,
+    clock: Clock = REAL_CLOCK,
+    dut: Optional[LGADModel] = None,
 ) -> PicoAmmeter:
+    from .picoammeters import PicoOptions, Keithley6485PicoAmmeter, Keithley6487PicoAmmeter, VirtualPicoAmmeter
+
     if pico_type in {"keithley_6487", "keithley6487", "6487"}:
+        from .keithley6487 import Keithley6487Controller
+
         pico_options = PicoOptions(serial_port=options.get("serial_port"))
         try:
             controller = shared_6487 or Keithley6487Controller(port=pico_options.serial_port or "/dev/ttyUSB1")
             return Keithley6487PicoAmmeter(pico_options, controller)
         except Exception as exc:
-            print(f"⚠️ Failed to initialize Keithley 6487 picoammeter ({exc}); using virtual picoammeter.")
+            logger.warning("Failed to initialize Keithley 6487 picoammeter (%s); using virtual picoammeter.", exc)
     if pico_type in {"keithley_6485", "keithley6485", "6485"}:
         pico_options = PicoOptions(serial_port=options.get("serial_port"))
         try:
             return Keithley6485PicoAmmeter(pico_options)
         except Exception as exc:
-            print(f"⚠️ Failed to initialize Keithley 6485 picoammeter ({exc}); using virtual picoammeter.")
-    if pico_type in {"virtual", "sim", "simulation"}:
+            logger.warning("Failed to initialize Keithley 6485 picoammeter (%s); using virtual picoammeter.", exc)
+    if pico_type in VIRTUAL_TYPES:
         noise = options.get("noise", 2e-12)
         virtual_hv = hv_source if hasattr(hv_source, "get_voltage") else None
         resistance = options.get("virtual_dut_resistance", options.get("load_resistance", 1e7))
-        return VirtualPicoAmmeter(noise=noise, hv_source=virtual_hv, resistance_ohm=resistance)
+        return VirtualPicoAmmeter(
+            noise=noise,
+            hv_source=virtual_hv,
+            resistance_ohm=resistance,
+            faults=FaultModel.from_options(options, clock),
+            dut=dut,
+        )
     raise ValueError(f"Unsupported picoammeter type: {pico_type}")
 
 
-def _create_lcr_meter(lcr_type: Optional[str], options: dict[str, Any]) -> Optional[LCRMeter]:
+def _create_lcr_meter(
+    lcr_type: Optional[str],
+    options: dict[str, Any],
+    clock: Clock = REAL_CLOCK,
+    dut: Optional[LGADModel] = None,
+) -> Optional[LCRMeter]:
     if not lcr_type or lcr_type in {"none", "disabled"}:
         return None
+    from .lcr_meters import KeysightE4980ALCRMeter, LCROptions, VirtualLCRMeter
+
     if lcr_type in {"keysight_e4980a", "e4980a", "keysight"}:
         lcr_options = LCROptions(
             vid=_coerce_int(options.get("vid")),
@@ -147,11 +204,14 @@ def _create_lcr_meter(lcr_type: Optional[str], options: dict[str, Any]) -> Optio
         try:
             return KeysightE4980ALCRMeter(lcr_options)
         except Exception as exc:
-            print(f"⚠️ Failed to initialize Keysight E4980A ({exc}); using virtual LCR meter.")
-    if lcr_type in {"virtual", "sim", "simulation"}:
+            logger.warning("Failed to initialize Keysight E4980A (%s); using virtual LCR meter.", exc)
+    if lcr_type in VIRTUAL_TYPES:
         return VirtualLCRMeter(
             capacitance_pf=options.get("capacitance_pf", 50.0),
             resistance_kohm=options.get("resistance_kohm", 100.0),
+            faults=FaultModel.from_options(options, clock),
+            dut=dut,
+            frequency=float(options.get("frequency", 1e4)),
         )
     raise ValueError(f"Unsupported LCR meter type: {lcr_type}")
 
@@ -0,0 +1,163 @@
+"""Latency and fault model for the virtual instruments.
+
+Configured per instrument from a ``faults`` block in its ``*_options``::
+
+    instruments:
+      picoammeter: virtual
+      pico_options:
+        faults:
+          latency: {default: 0.004, read_current: 0.012}   # mean seconds per command
+          jitter: 0.002                                     # standard deviation
+          distribution: lognormal                           # fixed | normal | lognormal | uniform
+          timeout: 1.0            # commands slower than this raise InstrumentTimeout
+          timeout_rate: 0.001     # probability a command hangs until the timeout
+          garble_rate: 0.002      # probability a query returns an unparsable reply
+          disconnect_rate: 0.0005 # probability the link drops on a command
+          disconnect_duration: 2.0  # seconds until the link returns (omit: until connect())
+          trip_rate: 0.0          # HV source only: probability the output trips off
+          compliance_current: 1.0e-4  # HV source only: current limit in A
+          seed: 0
+
+Without a ``faults`` block the virtual instruments answer instantly and
+never fail, as before.
+"""
+from __future__ import annotations
+
+import math
+import random
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+from .clock import REAL_CLOCK, Clock
+
+DISTRIBUTIONS = ("fixed", "normal", "lognormal", "uniform")
+
+
+class InstrumentFault(RuntimeError):
+    """Base class of the errors injected into virtual instruments."""
+
+
+class InstrumentTimeout(InstrumentFault, TimeoutError):
+    """The instrument did not answer within the timeout."""
+
+
+class InstrumentDisconnected(InstrumentFault, ConnectionError):
+    """The link to the instrument is down."""
+
+
+class GarbledResponse(InstrumentFault, ValueError):
+    """The instrument's reply could not be parsed."""
+
+
+class ComplianceTrip(InstrumentFault):
+    """The HV source tripped its output off."""
+
+
+@dataclass
+class FaultModel:
+    latency: Mapping[str, float] = field(default_factory=dict)
+    jitter: float = 0.0
+    distribution: str = "fixed"
+    timeout: float = 2.0
+    timeout_rate: float = 0.0
+    garble_rate: float = 0.0
+    disconnect_rate: float = 0.0
+    disconnect_duration: Optional[float] = None
+    trip_rate: float = 0.0
+    compliance_current: Optional[float] = None
+    seed: Optional[int] = 0
+    clock: Clock = field(default=REAL_CLOCK, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.distribution!r}")
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self._down_until: Optional[float] = None
+        self.commands = 0
+        self.faults = 0
+
+    @classmethod
+    def from_options(cls, options: Optional[Mapping[str, Any]], clock: Clock = REAL_CLOCK) -> Optional["FaultModel"]:
+        """Build the model from an instrument's ``*_options``; ``None`` without a ``faults`` block."""
+        spec = (options or {}).get("faults")
+        if not spec:
+            return None
+        spec = dict(spec)
+        latency = spec.pop("latency", 0.0)
+        if not isinstance(latency, Mapping):
+            latency = {"default": latency}
+        known = set(cls.__dataclass_fields__) - {"latency", "clock"}
+        unknown = set(spec) - known
+        if unknown:
+            raise ValueError(f"Unknown fault options: {', '.join(sorted(unknown))}")
+        return cls(latency={k: float(v) for k, v in latency.items()}, clock=clock, **spec)
+
+    # —— 每条命令调用一次 -------------------------------------------------
+    def command(self, name: str) -> None:
+        """Wait out the command's latency and raise any injected link fault."""
+        with self._lock:
+            self.commands += 1
+            if self._down_until is not None:
+                if self.clock.monotonic() < self._down_until:
+                    self.faults += 1
+                    raise InstrumentDisconnected(f"{name}: link down")
+                self._down_until = None
+            if self._hit(self.disconnect_rate):
+                self.faults += 1
+                duration = self.disconnect_duration
+                self._down_until = self.clock.monotonic() + duration if duration is not None else float("inf")
+                raise InstrumentDisconnected(f"{name}: link dropped")
+            hang = self._hit(self.timeout_rate)
+            delay = self.timeout if hang else self._latency(name)
+
+        if delay > 0:
+            self.clock.sleep(min(delay, self.timeout))
+        if hang or delay > self.timeout:
+            with self._lock:
+                self.faults += 1
+            raise InstrumentTimeout(f"{name}: no reply within {self.timeout:g} s")
+
+    def query(self, name: str) -> None:
+        """As :meth:`command`, for commands that parse a reply."""
+        self.command(name)
+        with self._lock:
+            if self._hit(self.garble_rate):
+                self.faults += 1
+                raise GarbledResponse(f"{name}: could not parse reply {self._garbage()!r}")
+
+    def trip(self) -> bool:
+        """Whether the HV output trips on this command."""
+        with self._lock:
+            return self._hit(self.trip_rate)
+
+    def reconnect(self) -> None:
+        """``connect()`` restores a link that stays down until reconnected."""
+        with self._lock:
+            if self._down_until == float("inf"):
+                self._down_until = None
+
+    # Internal helpers -------------------------------------------------
+    def _hit(self, rate: float) -> bool:
+        return rate > 0 and self._rng.random() < rate
+
+    def _latency(self, name: str) -> float:
+        mean = self.latency.get(name, self.latency.get("default", 0.0))
+        if mean <= 0:
+            return 0.0
+        if self.distribution == "fixed" or self.jitter <= 0:
+            return mean
+        if self.distribution == "normal":
+            return max(0.0, self._rng.gauss(mean, self.jitter))
+        if self.distribution == "uniform":
+            return max(0.0, self._rng.uniform(mean - self.jitter, mean + self.jitter))
+        # 对数正态：给定均值与标准差反推参数，长尾更接近 USB/串口的实际延迟
+        sigma2 = math.log1p((self.jitter / mean) ** 2)
+        mu = math.log(mean) - sigma2 / 2
+        return self._rng.lognormvariate(mu, sigma2 ** 0.5)
+
+    def _garbage(self) -> str:
+        reply = f"{self._rng.uniform(-1, 1):+.6E}"
+        cut = self._rng.randrange(1, len(reply))
+        return reply[:cut] + "\x00#"
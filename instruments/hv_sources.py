@@ -5,11 +5,15 @@ import math
 import random
 import time
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from .base import HVSource
+from .faults import ComplianceTrip, FaultModel
 from .keithley6487 import Keithley6487Controller
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .dut import LGADModel
+
 try:
     import usbtmc  # type: ignore
     import usb.backend.libusb1 as libusb_backend  # type: ignore
@@ -129,38 +133,80 @@ class Keithley6487HVSource(HVSource):
 class VirtualHVSource(HVSource):
     """Simulated HV source for development without hardware."""
 
-    def __init__(self, noise: float = 5e-12, load_resistance: float = 1e7) -> None:
+    def __init__(
+        self,
+        noise: float = 5e-12,
+        load_resistance: float = 1e7,
+        faults: Optional[FaultModel] = None,
+        dut: Optional[LGADModel] = None,
+    ) -> None:
         self._voltage = 0.0
         self._output_enabled = False
         self._noise = noise
         self._seed = random.Random(42)
         self._load_resistance = load_resistance
+        self._faults = faults
+        self._dut = dut
 
     def connect(self) -> None:
+        if self._faults is not None:
+            self._faults.reconnect()
+            self._faults.command("connect")
         self._voltage = 0.0
         self._output_enabled = False
+        self._apply_bias()
 
     def enable_output(self, enable: bool) -> None:
+        if self._faults is not None:
+            self._faults.command("enable_output")
         self._output_enabled = enable
+        self._apply_bias()
 
     def set_voltage(self, voltage: float) -> None:
+        if self._faults is not None:
+            self._faults.command("set_voltage")
         self._voltage = voltage
+        self._apply_bias()
 
     def get_voltage(self) -> float:
+        if self._faults is not None:
+            self._faults.query("get_voltage")
         return self._voltage
 
+    @property
+    def applied_voltage(self) -> float:
+        """Voltage seen by the DUT (0 with the output off); not a bus command."""
+        return self._voltage if self._output_enabled else 0.0
+
     def measure_current(self) -> float:
+        if self._faults is not None:
+            self._faults.query("measure_current")
+            if self._output_enabled and self._faults.trip():
+                self._output_enabled = False
+                self._apply_bias()
+                raise ComplianceTrip("HV output tripped")
         if not self._output_enabled:
             return 0.0
         base = 0.0
-        if self._load_resistance:
+        if self._dut is not None:
+            base = self._dut.read_current(self._voltage)
+        elif self._load_resistance:
             base = self._voltage / self._load_resistance
+        limit = self._faults.compliance_current if self._faults is not None else None
+        if limit is not None and abs(base) > limit:
+            # 进入限流：源表把电流钳在限值上
+            base = math.copysign(limit, base)
         perturb = self._seed.gauss(0, self._noise)
         return base + perturb
 
     def shutdown(self) -> None:
         self._output_enabled = False
         self._voltage = 0.0
+        self._apply_bias()
+
+    def _apply_bias(self) -> None:
+        if self._dut is not None:
+            self._dut.set_bias(self.applied_voltage)
 
     def set_load_resistance(self, resistance_ohm: float) -> None:
         self._load_resistance = resistance_ohm
@@ -3,9 +3,13 @@ from __future__ import annotations
 
 import random
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from .base import LCRMeter
+from .faults import FaultModel
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .dut import LGADModel
 
 try:
     import usbtmc  # type: ignore
@@ -37,13 +41,11 @@ class KeysightE4980ALCRMeter(LCRMeter):
         if vid is None or pid is None:
             vid, pid = self._autodetect(backend)
         self._instrument = usbtmc.Instrument(vid, pid, backend=backend)
-        self._instrument.write("*CLS")
-        self._instrument.write("*RST")
+        self._write("*CLS")
+        self._write("*RST")
 
     def fetch_cprp(self) -> tuple[float, float]:
-        if self._instrument is None:
-            raise RuntimeError("LCR meter not connected")
-        response = self._instrument.ask("FETC:IMP:CPRP?")
+        response = self._ask("FETC:IMP:CPRP?")
         cp_str, rp_str, *_ = response.split(',')
         return float(cp_str), float(rp_str)
 
@@ -51,13 +53,24 @@ class KeysightE4980ALCRMeter(LCRMeter):
         if self._instrument is None:
             return
         try:
-            self._instrument.write("*CLS")
+            self._write("*CLS")
         finally:
             try:
                 self._instrument.close()
             finally:
                 self._instrument = None
 
+    # Internal helpers -------------------------------------------------
+    def _write(self, command: str) -> None:
+        if self._instrument is None:
+            raise RuntimeError("LCR meter not connected")
+        self._instrument.write(command)
+
+    def _ask(self, command: str) -> str:
+        if self._instrument is None:
+            raise RuntimeError("LCR meter not connected")
+        return self._instrument.ask(command)
+
     def _autodetect(self, backend) -> tuple[int, int]:
         if libusb_backend is None:  # pragma: no cover - hardware dependency
             raise RuntimeError("pyusb is required to auto-detect the LCR meter")
@@ -78,18 +91,35 @@ class KeysightE4980ALCRMeter(LCRMeter):
 class VirtualLCRMeter(LCRMeter):
     """Synthetic LCR data generator."""
 
-    def __init__(self, capacitance_pf: float = 50.0, resistance_kohm: float = 100.0) -> None:
+    def __init__(
+        self,
+        capacitance_pf: float = 50.0,
+        resistance_kohm: float = 100.0,
+        faults: Optional[FaultModel] = None,
+        dut: Optional[LGADModel] = None,
+        frequency: float = 1e4,
+    ) -> None:
         self._cap_pf = capacitance_pf
         self._res_ohm = resistance_kohm * 1e3
         self._seed = random.Random(7)
         self._connected = False
+        self._faults = faults
+        self._dut = dut
+        self._frequency = frequency
 
     def connect(self) -> None:
+        if self._faults is not None:
+            self._faults.reconnect()
+            self._faults.command("connect")
         self._connected = True
 
     def fetch_cprp(self) -> tuple[float, float]:
         if not self._connected:
             raise RuntimeError("Virtual LCR meter not connected")
+        if self._faults is not None:
+            self._faults.query("fetch_cprp")
+        if self._dut is not None:
+            return self._dut.read_cprp(self._frequency)
         cap = self._seed.gauss(self._cap_pf, self._cap_pf * 0.01)
         rp = self._seed.gauss(self._res_ohm, self._res_ohm * 0.02)
         return cap * 1e-12, rp
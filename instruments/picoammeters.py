@@ -6,7 +6,10 @@ import time
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Optional
 
+import numpy as np
+
 from .base import PicoAmmeter
+from .faults import FaultModel
 from .keithley6487 import Keithley6487Controller
 
 try:
@@ -16,6 +19,7 @@ except ImportError:  # pragma: no cover - optional dependency
 
 if TYPE_CHECKING:  # pragma: no cover - typing only
     from .base import HVSource
+    from .dut import LGADModel
 
 @dataclass
 class PicoOptions:
@@ -72,9 +76,7 @@ class Keithley6485PicoAmmeter(PicoAmmeter):
         self._write("SYST:ZCH OFF")
 
     def read_current(self) -> float:
-        self._ensure_serial()
-        self._write("READ?")
-        response = self._serial.readline().decode("ascii", errors="ignore").strip()
+        response = self._query("READ?")
         try:
             if response.endswith("A"):
                 response = response[:-1]
@@ -98,6 +100,10 @@ class Keithley6485PicoAmmeter(PicoAmmeter):
         self._serial.write(command.encode("ascii"))
         time.sleep(0.05)
 
+    def _query(self, command: str) -> str:
+        self._write(command)
+        return self._serial.readline().decode("ascii", errors="ignore").strip()
+
     def _ensure_serial(self) -> None:
         if self._serial is None:
             raise RuntimeError("Keithley 6485 picoammeter not connected")
@@ -111,27 +117,66 @@ class VirtualPicoAmmeter(PicoAmmeter):
         noise: float = 2e-12,
         hv_source: "HVSource | None" = None,
         resistance_ohm: Optional[float] = 1e7,
+        faults: Optional[FaultModel] = None,
+        dut: Optional[LGADModel] = None,
     ) -> None:
         self._seed = random.Random(1337)
         self._noise = noise
         self._connected = False
         self._hv_source = hv_source
         self._resistance = resistance_ohm
+        self._faults = faults
+        self._dut = dut
 
     def connect(self) -> None:
+        if self._faults is not None:
+            self._faults.reconnect()
+            self._faults.command("connect")
         self._connected = True
 
     def read_current(self) -> float:
         if not self._connected:
             raise RuntimeError("Virtual picoammeter not connected")
-        baseline = 0.0
-        if self._hv_source is not None and self._resistance:
-            try:
-                baseline = self._hv_source.get_voltage() / self._resistance
-            except Exception:
-                baseline = 0.0
+        if self._faults is not None:
+            self._faults.query("read_current")
+        voltage = self._bias_voltage()
+        if self._dut is not None:
+            baseline = self._dut.read_current(voltage)
+        elif voltage is not None and self._resistance:
+            baseline = voltage / self._resistance
+        else:
+            baseline = 0.0
         return baseline + self._seed.gauss(0, self._noise)
 
+    def read_burst(self, n: int, interval: float = 0.0):
+        """``n`` readings ``interval`` seconds apart from one buffered trigger."""
+        if not self._connected:
+            raise RuntimeError("Virtual picoammeter not connected")
+        if self._faults is not None:
+            self._faults.query("read_burst")
+        voltage = self._bias_voltage()
+        if self._dut is not None:
+            baseline = self._dut.read_burst(n, interval, voltage)
+        elif voltage is not None and self._resistance:
+            baseline = np.full(n, voltage / self._resistance)
+        else:
+            baseline = np.zeros(n)
+        return baseline + np.random.default_rng(self._seed.getrandbits(32)).normal(0.0, self._noise, n)
+
+    def _bias_voltage(self) -> Optional[float]:
+        # 注意：输出关闭时 applied_voltage 为 0（此前读的是设定值），
+        # 因此 enable_output(True) 之前的读数不再随设定电压变化
+        if self._hv_source is None:
+            return None
+        try:
+            # 虚拟源表直接给出施加在 DUT 上的电压，不经过（可能注入延迟的）总线命令
+            voltage = getattr(self._hv_source, "applied_voltage", None)
+            if voltage is None:
+                voltage = self._hv_source.get_voltage()
+            return float(voltage)
+        except Exception:
+            return None
+
     def shutdown(self) -> None:
         self._connected = False
 
@@ -0,0 +1,230 @@
+"""Per-command latency profiling of the instrument transports.
+
+Opt in with ``profile: true`` in the ``instruments`` section::
+
+    instruments:
+      hv_source: keithley_2470
+      picoammeter: keithley_6487
+      profile: true
+
+The factory then wraps every transport call of the suite's drivers
+(``_write``, ``_float_query``, ``_query``, ``_ask`` on the drivers;
+``send_command``, ``query``, ``read_current`` on a shared Keithley 6487
+controller; ``command``/``query`` of a virtual instrument's fault model)
+and records, per instrument and SCPI command header:
+
+- a latency histogram (fixed buckets from 100 µs to 10 s), from which the
+  summary estimates p50/p95/p99
+- errors (exceptions, and NaN from drivers that map failures to NaN) and
+  timeouts (timeout exceptions, and empty serial replies)
+- bytes sent and received; a reply the driver parses to a number is
+  counted as one 15-byte ASCII reading
+
+Only the outermost wrapped call is timed, so a ``query`` that calls
+``send_command`` counts once. A shared 6487 controller is reported under
+the first instrument that uses it. The engines publish the summary as a
+``transport`` event after every voltage step and store it with the run
+in the catalog.
+"""
+from __future__ import annotations
+
+import bisect
+import functools
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .clock import REAL_CLOCK, Clock
+
+# 直方图上界（秒），最后一个桶收集更慢的调用
+BUCKETS = (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (属性名, 方法, 是否计字节)；None 表示驱动本身
+TRANSPORT_TARGETS = (
+    (None, ("_write", "_float_query", "_query", "_ask"), True),
+    ("_controller", ("send_command", "query", "read_current"), True),
+    ("_faults", ("command", "query"), False),
+)
+
+_READING_BYTES = 15  # "+1.234567E-09\n"
+
+
+@dataclass
+class CommandStats:
+    count: int = 0
+    total: float = 0.0
+    maximum: float = 0.0
+    errors: int = 0
+    timeouts: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS) + 1))
+
+    def add(self, seconds: float, sent: int = 0, received: int = 0, error: bool = False, timeout: bool = False) -> None:
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+        self.errors += error
+        self.timeouts += timeout
+        self.bytes_sent += sent
+        self.bytes_received += received
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Latency quantile (s), interpolated linearly inside its bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for k, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = BUCKETS[k - 1] if k else 0.0
+                upper = BUCKETS[k] if k < len(BUCKETS) else self.maximum
+                return min(lower + (upper - lower) * (rank - seen) / n, self.maximum)
+            seen += n
+        return self.maximum
+
+    def as_dict(self) -> dict[str, Any]:
+        def ms(value):
+            return None if value is None else round(value * 1e3, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "max_ms": ms(self.maximum),
+            "total_s": round(self.total, 6),
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+class TransportProfiler:
+    """Collects :class:`CommandStats` per ``(instrument, command)``; thread-safe."""
+
+    def __init__(self, clock: Clock = REAL_CLOCK) -> None:
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._stats: dict[tuple[str, str], CommandStats] = {}
+        self._local = threading.local()
+
+    def attach(self, driver: Any, instrument: str) -> int:
+        """Wrap the transport methods of ``driver``; returns how many were wrapped."""
+        wrapped = 0
+        for attribute, methods, count_bytes in TRANSPORT_TARGETS:
+            target = driver if attribute is None else getattr(driver, attribute, None)
+            if target is None:
+                continue
+            for method in methods:
+                wrapped += self._wrap(target, method, instrument, count_bytes)
+        return wrapped
+
+    def record(self, instrument: str, command: str, seconds: float, **counts: Any) -> None:
+        with self._lock:
+            stats = self._stats.get((instrument, command))
+            if stats is None:
+                stats = self._stats[(instrument, command)] = CommandStats()
+            stats.add(seconds, **counts)
+
+    def snapshot(self) -> dict[tuple[str, str], CommandStats]:
+        """Copies of the per-command statistics."""
+        with self._lock:
+            return {key: CommandStats(**{**vars(s), "buckets": list(s.buckets)}) for key, s in self._stats.items()}
+
+    def summary(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """``{instrument: {command: stats}}``, slowest command (by total time) first."""
+        out: dict[str, dict[str, dict[str, Any]]] = {}
+        items = sorted(self.snapshot().items(), key=lambda item: -item[1].total)
+        for (instrument, command), stats in items:
+            out.setdefault(instrument, {})[command] = stats.as_dict()
+        return out
+
+    def busy_time(self) -> dict[str, float]:
+        """Seconds each instrument spent in transport calls."""
+        busy: dict[str, float] = {}
+        for (instrument, _), stats in self.snapshot().items():
+            busy[instrument] = busy.get(instrument, 0.0) + stats.total
+        return busy
+
+    def report(self, limit: int = 5) -> str:
+        """A short text table of the slowest commands."""
+        rows = sorted(self.snapshot().items(), key=lambda item: -item[1].total)[:limit]
+        lines = ["⏱️ Transport profile (slowest commands):"]
+        for (instrument, command), stats in rows:
+            d = stats.as_dict()
+            lines.append(
+                f"   {instrument:<12} {command:<20} n={d['count']:<6} mean {d['mean_ms']:.2f} ms"
+                f"  p95 {d['p95_ms']:.2f} ms  errors {d['errors']}  timeouts {d['timeouts']}"
+            )
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    # Internal helpers -------------------------------------------------
+    def _wrap(self, target: Any, method: str, instrument: str, count_bytes: bool) -> int:
+        call = getattr(target, method, None)
+        if call is None or not callable(call) or getattr(call, "_profiled", False):
+            return 0
+
+        @functools.wraps(call)
+        def profiled(*args, **kwargs):
+            # 只计最外层调用：query 内部的 send_command 不重复计时
+            depth = getattr(self._local, "depth", 0)
+            if depth:
+                return call(*args, **kwargs)
+            command = _header(args[0]) if args and isinstance(args[0], str) else method
+            self._local.depth = 1
+            start = self.clock.monotonic()
+            try:
+                result = call(*args, **kwargs)
+            except Exception as exc:
+                self.record(instrument, command, self.clock.monotonic() - start,
+                            sent=_sent(args) if count_bytes else 0, error=True, timeout=_is_timeout(exc))
+                raise
+            finally:
+                self._local.depth = 0
+            elapsed = self.clock.monotonic() - start
+            received, error, timeout = _reply(result)
+            self.record(instrument, command, elapsed,
+                        sent=_sent(args) if count_bytes else 0,
+                        received=received if count_bytes else 0,
+                        error=error, timeout=timeout)
+            return result
+
+        profiled._profiled = True  # type: ignore[attr-defined]
+        setattr(target, method, profiled)
+        return 1
+
+
+def _header(command: str) -> str:
+    command = command.strip()
+    return command.split(None, 1)[0] if command else "(empty)"
+
+
+def _sent(args) -> int:
+    if args and isinstance(args[0], str):
+        return len(args[0].rstrip("\n")) + 1
+    return 0
+
+
+def _reply(result: Any) -> tuple[int, bool, bool]:
+    """``(bytes received, error, timeout)`` for a call's return value."""
+    if isinstance(result, str):
+        # 串口 readline 超时返回空串
+        return (len(result) + 1 if result else 0), False, not result
+    if isinstance(result, float):
+        return _READING_BYTES, math.isnan(result), False
+    if isinstance(result, tuple):
+        return _READING_BYTES * len(result), False, False
+    return 0, False, False
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, TimeoutError) or "timeout" in type(exc).__name__.lower() or "timed out" in str(exc).lower()
@@ -0,0 +1,99 @@
+"""Multi-resolution rolling min/max/mean of a long current record.
+
+Samples land in 1 s buckets; each closed bucket is merged into the 1 min
+level and each closed minute into the 1 h level, so a sample touches one
+bucket. Every level keeps at most ``capacity`` closed buckets, so memory
+and the size of the display series do not grow with run length.
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Optional
+
+# (桶宽 s, 保留桶数)：1 s 约 24 min，1 min 24 h，1 h 60 天
+LEVELS = ((1.0, 1440), (60.0, 1440), (3600.0, 1440))
+
+Bucket = tuple[float, float, float, float, int]  # start, min, max, sum, n
+
+
+class _Level:
+    def __init__(self, width: float, capacity: int) -> None:
+        self.width = width
+        self.closed: deque[Bucket] = deque(maxlen=capacity)
+        self.open: Optional[list] = None  # [start, min, max, sum, n]
+
+    def merge(self, start: float, low: float, high: float, total: float, n: int) -> Optional[Bucket]:
+        """Fold a bucket (or one sample) in; return the bucket this closes, if any."""
+        bucket_start = math.floor(start / self.width) * self.width
+        current = self.open
+        if current is not None and current[0] == bucket_start:
+            if low < current[1]:
+                current[1] = low
+            if high > current[2]:
+                current[2] = high
+            current[3] += total
+            current[4] += n
+            return None
+        self.open = [bucket_start, low, high, total, n]
+        if current is None:
+            return None
+        finished = tuple(current)
+        self.closed.append(finished)
+        return finished
+
+    def buckets(self) -> list[Bucket]:
+        buckets = list(self.closed)
+        if self.open is not None:
+            buckets.append(tuple(self.open))
+        return buckets
+
+    @property
+    def first_start(self) -> Optional[float]:
+        if self.closed:
+            return self.closed[0][0]
+        return self.open[0] if self.open is not None else None
+
+
+class RollingAggregates:
+    """Min/max/mean per bucket at each of ``levels`` (``(width_s, capacity)`` pairs, finest first)."""
+
+    def __init__(self, levels=LEVELS) -> None:
+        self.levels = [_Level(width, capacity) for width, capacity in levels]
+        self.count = 0
+        self.first_time: Optional[float] = None
+
+    def add(self, t: float, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        if self.first_time is None:
+            self.first_time = t
+        self.count += 1
+        bucket: Optional[Bucket] = (t, value, value, value, 1)
+        for level in self.levels:
+            bucket = level.merge(*bucket)
+            if bucket is None:
+                break
+
+    def series(self, width: float) -> dict[str, list[float]]:
+        """``{"t", "min", "max", "mean"}`` of the level with bucket width ``width`` (bucket start times)."""
+        level = next(level for level in self.levels if level.width == width)
+        buckets = level.buckets()
+        return {
+            "t": [b[0] for b in buckets],
+            "min": [b[1] for b in buckets],
+            "max": [b[2] for b in buckets],
+            "mean": [b[3] / b[4] for b in buckets],
+        }
+
+    def display_width(self) -> float:
+        """Finest bucket width whose retained buckets still reach back to the first sample."""
+        for level in self.levels:
+            start = level.first_start
+            if start is not None and start <= self.first_time:
+                return level.width
+        return self.levels[-1].width
+
+    def display_series(self) -> dict:
+        width = self.display_width()
+        return {"width": width, **self.series(width)}
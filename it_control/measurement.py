@@ -0,0 +1,259 @@
+import csv
+import logging
+import math
+import os
+from datetime import datetime
+
+from instruments import create_instrument_suite
+from instruments.clock import REAL_CLOCK, clock_for
+from instruments.picoammeters import VirtualPicoAmmeter
+from iv_control.config import get_config
+from iv_control.measurement import _ensure_hv_source, _ensure_picoammeter, ramp_voltage
+from it_control.aggregates import RollingAggregates
+from it_control.trend import DriftEstimator, JumpDetector
+from runs.catalog import new_run_dir, record_run
+from state import push_sample
+from telemetry import ACQUISITION
+from telemetry.logs import bind_run, set_step, unbind_run
+
+logger = logging.getLogger(__name__)
+
+LIVE_WINDOW = 600  # 实时图保留的全速率样本数
+STATUS_SECONDS = 10.0  # 聚合序列写入 shared_status、数据文件落盘的间隔（运行时间）
+TREND_SECONDS = 60.0  # 发布 trend 事件的间隔
+ENV_MAX_AGE = 10.0  # 更旧的温湿度读数记为缺失
+
+DATA_COLUMNS = ["Time(s)", "Current(A)", "SourceCurrent(A)", "Temperature(°C)", "Humidity(%RH)"]
+EVENT_COLUMNS = ["Time(s)", "From(A)", "To(A)", "Delta(A)", "Sigma"]
+
+
+def perform_it_measurement(shared_status, time_series, current_series, it_curve, stop_event, broadcaster=None, catalog=None, env_sampler=None, config=None, clock=None, metrics=None, output_root="outputs"):
+    """
+    I–t 稳定性测试：在固定偏压（it_voltage）下持续记录电流 it_duration 秒。
+
+    全速率数据逐行写入 IT_Data.csv；内存中只保留多分辨率滚动聚合
+    （1 s / 1 min / 1 h 的 min/max/mean）与最近 LIVE_WINDOW 个样本，
+    因此数天的运行内存与界面开销保持不变。在线估计漂移率并检测电流跳变。
+
+    参数与 iv_control.measurement.perform_measurement 相同；it_curve 仅被清空
+    （I–t 没有逐电压点曲线），time_series / current_series 只保留最近的窗口。
+    """
+    started_at = datetime.now().isoformat(timespec="seconds")
+    output_dir = new_run_dir("it", output_root)
+    run_id = os.path.basename(output_dir)
+    bind_run(run_id, "it")
+    cfg = config or get_config()
+    clock = clock or clock_for(cfg.instruments, cfg.clock, cfg.clock_scale, include_lcr=False)
+    metrics = metrics or ACQUISITION
+
+    bias = cfg.it_voltage
+    duration = cfg.it_duration
+    sample_interval = cfg.sample_interval
+    maximum_current = cfg.maximum_current * 1e-6
+
+    instruments_cfg = cfg.instruments
+    suite = create_instrument_suite(instruments_cfg, clock)
+    hv_source = _ensure_hv_source(suite.hv_source, suite, instruments_cfg.hv_options)
+    picoammeter = _ensure_picoammeter(suite.picoammeter, suite, hv_source, instruments_cfg.pico_options)
+
+    logger.info(
+        "▶️ Starting I–t stability run at %.2f V for %.0f s using %s HV and %s ammeter",
+        bias, duration, hv_source.__class__.__name__, picoammeter.__class__.__name__,
+    )
+
+    it_curve.clear()
+    time_series.clear()
+    current_series.clear()
+    aggregates = RollingAggregates()
+    drift = DriftEstimator(cfg.it_drift_window)
+    jumps = JumpDetector(sigma=cfg.it_jump_sigma)
+    live_count = 0
+    elapsed = 0.0
+
+    _publish(broadcaster, "status", {"state": "running", "mode": "it", "run": run_id})
+    recorder = metrics.start_run("it", suite.profiler, sample_interval, ("hv_source", "picoammeter"))
+    run_state = "failed"
+    data_file = open(f"{output_dir}/IT_Data.csv", "w", newline="")
+    events_file = open(f"{output_dir}/IT_Events.csv", "w", newline="")
+    data_writer = csv.writer(data_file)
+    events_writer = csv.writer(events_file)
+    data_writer.writerow(DATA_COLUMNS)
+    events_writer.writerow(EVENT_COLUMNS)
+
+    try:
+        set_step(bias)
+        hv_source.enable_output(True)
+        if not ramp_voltage(hv_source, picoammeter, bias, step=30.0, delay=0.05,
+                            maximum_current=maximum_current, clock=clock):
+            return
+        _publish(broadcaster, "step", {"voltage": float(bias)})
+
+        over_current_count = 0
+        start_time = clock.monotonic()
+        next_status = STATUS_SECONDS
+        next_trend = TREND_SECONDS
+
+        while elapsed < duration:
+            if stop_event.is_set():
+                logger.info("I–t run stopped after %.0f s.", elapsed)
+                return
+            loop_start = clock.monotonic()
+            elapsed = loop_start - start_time
+
+            try:
+                source_reading = float(hv_source.measure_current())
+            except Exception as e:
+                logger.warning("Source read error: %s", e, extra={"instrument": "hv_source"})
+                source_reading = math.nan
+            source_done = clock.monotonic()
+            current_source = source_reading
+
+            try:
+                current = float(picoammeter.read_current())
+            except Exception as e:
+                logger.warning("Read error: %s", e, extra={"instrument": "picoammeter"})
+                current = math.nan
+            pico_done = clock.monotonic()
+
+            if isinstance(picoammeter, VirtualPicoAmmeter) and not math.isnan(current):
+                current_source = current
+
+            if _over_limit(current, maximum_current):
+                over_current_count += 1
+                logger.warning(
+                    "Over-current count: %d (%.3e A > %.3e A)", over_current_count, current, maximum_current,
+                    extra={"current": current, "limit": maximum_current},
+                )
+                if over_current_count > 3:
+                    logger.error("Triggering emergency stop due to 3 consecutive over-current readings.")
+                    stop_event.set()
+                    return
+            else:
+                over_current_count = 0
+
+            temperature, humidity = _env_now(env_sampler, shared_status)
+            data_writer.writerow((elapsed, current, current_source, temperature, humidity))
+
+            aggregates.add(elapsed, current)
+            jump = jumps.add(elapsed, current)
+            if jump is not None:
+                # 跳变前的样本会把台阶算成漂移，从新电平重新拟合
+                drift.reset()
+                events_writer.writerow((jump["t"], jump["from"], jump["to"], jump["delta"], jump["sigma"]))
+                events_file.flush()
+                logger.warning(
+                    "Current jump at %.0f s: %.3e A → %.3e A (%.1f σ)", jump["t"], jump["from"], jump["to"], jump["sigma"],
+                    extra={"jump": jump},
+                )
+                _publish(broadcaster, "jump", jump)
+            drift.add(elapsed, current)
+
+            push_sample(shared_status, time_series, current_series, broadcaster, elapsed, current,
+                        {"voltage": bias, "current": current, "time": elapsed},
+                        {"t": elapsed, "i": current, "v": float(bias)})
+            # 实时图只保留最近的窗口，成批删除以减少共享列表操作
+            live_count += 1
+            if live_count >= 2 * LIVE_WINDOW:
+                del time_series[:live_count - LIVE_WINDOW]
+                del current_series[:live_count - LIVE_WINDOW]
+                live_count = LIVE_WINDOW
+
+            if elapsed >= next_status:
+                next_status = elapsed + STATUS_SECONDS
+                data_file.flush()
+                shared_status["it"] = _trend_summary(bias, elapsed, aggregates, drift, jumps)
+                shared_status["it_series"] = aggregates.display_series()
+                _publish_transport(suite, shared_status, broadcaster)
+            if elapsed >= next_trend:
+                next_trend = elapsed + TREND_SECONDS
+                _publish(broadcaster, "trend", _trend_summary(bias, elapsed, aggregates, drift, jumps))
+
+            loop_end = clock.monotonic()
+            recorder.sample(loop_start, loop_end, source_done - loop_start, pico_done - source_done, source_reading, current)
+            loop_duration = loop_end - loop_start
+            sleep_time = sample_interval - loop_duration
+            if sleep_time > 0:
+                clock.sleep(sleep_time)
+
+        if not ramp_voltage(hv_source, picoammeter, 0, step=30.0, delay=0.05,
+                            maximum_current=maximum_current, clock=clock):
+            return
+        logger.info("✅ I–t stability run complete.")
+        run_state = "finished"
+    finally:
+        hv_source.enable_output(False)
+        suite.shutdown_all()
+        if stop_event.is_set():
+            run_state = "stopped"
+        data_file.close()
+        events_file.close()
+        write_start = REAL_CLOCK.monotonic()
+        _write_aggregates(f"{output_dir}/IT_Aggregates.csv", aggregates)
+        metrics.step_written(REAL_CLOCK.monotonic() - write_start)
+        shared_status.pop("it_series", None)
+        if suite.profiler is not None:
+            logger.info("%s", suite.profiler.report())
+        summary = _trend_summary(bias, elapsed, aggregates, drift, jumps)
+        record_run(output_dir, "it", started_at, run_state, cfg.as_dict(), suite, summary, catalog)
+        metrics.end_run("it", run_state)
+        unbind_run()
+        _publish(broadcaster, "status", {"state": run_state, "mode": "it", "run": run_id, "path": output_dir})
+
+
+def _trend_summary(bias, elapsed, aggregates, drift, jumps) -> dict:
+    slope = drift.slope
+    mean = drift.mean
+    return {
+        "bias_voltage": float(bias),
+        "elapsed_s": elapsed,
+        "n_samples": aggregates.count,
+        "mean_current": mean,
+        "drift_A_per_h": slope * 3600.0,
+        "drift_rel_per_h": slope * 3600.0 / abs(mean) if mean else math.nan,
+        "jumps": jumps.count,
+    }
+
+
+def _write_aggregates(path: str, aggregates: RollingAggregates) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Resolution(s)", "Time(s)", "Min(A)", "Max(A)", "Mean(A)"])
+        for level in aggregates.levels:
+            series = aggregates.series(level.width)
+            for row in zip(series["t"], series["min"], series["max"], series["mean"]):
+                writer.writerow((level.width, *row))
+
+
+def _env_now(env_sampler, shared_status) -> tuple[float, float]:
+    # 直接写入当前读数，不像 I–V 那样在内存中累积整条温湿度曲线
+    if env_sampler is not None:
+        reading = env_sampler.latest()
+        if reading.seq == 0 or reading.age > ENV_MAX_AGE:
+            return math.nan, math.nan
+        temperature, humidity = reading.temperature, reading.humidity
+    else:
+        temperature, humidity = shared_status.get("temperature"), shared_status.get("humidity")
+    return (
+        math.nan if temperature is None else float(temperature),
+        math.nan if humidity is None else float(humidity),
+    )
+
+
+def _over_limit(value: float, limit: float) -> bool:
+    if value is None or math.isnan(value):
+        return False
+    return abs(value) > limit
+
+
+def _publish(broadcaster, event: str, data: dict) -> None:
+    if broadcaster is not None:
+        broadcaster.publish(event, data)
+
+
+def _publish_transport(suite, shared_status, broadcaster) -> None:
+    # 每 STATUS_SECONDS 更新一次传输层统计（需 instruments.profile: true）
+    if suite.profiler is None:
+        return
+    transport = suite.profiler.summary()
+    shared_status["transport"] = transport
+    _publish(broadcaster, "transport", transport)
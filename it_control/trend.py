@@ -0,0 +1,118 @@
+"""Online trend detection for long I–t records: drift rate and current jumps.
+
+Both detectors are O(1) per sample and keep no history.
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+
+class DriftEstimator:
+    """Exponentially weighted least-squares slope of the current over time.
+
+    Samples older than about ``tau`` seconds fade out, so :attr:`slope` is
+    the drift over the recent ``tau`` rather than since the start. Call
+    :meth:`reset` after a current jump, otherwise the step reads as drift.
+    """
+
+    def __init__(self, tau: float) -> None:
+        self.tau = float(tau)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all samples; the next one starts a new fit."""
+        self._t0: Optional[float] = None
+        self._last: Optional[float] = None
+        self._w = self._t = self._y = self._tt = self._ty = 0.0
+
+    def add(self, t: float, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        if self._t0 is None:
+            self._t0 = self._last = t
+        decay = math.exp(-(t - self._last) / self.tau)
+        self._last = t
+        x = t - self._t0
+        self._w = self._w * decay + 1.0
+        self._t = self._t * decay + x
+        self._y = self._y * decay + value
+        self._tt = self._tt * decay + x * x
+        self._ty = self._ty * decay + x * value
+
+    @property
+    def slope(self) -> float:
+        """Drift in A/s; NaN until the samples span some time."""
+        if self._w < 2:
+            return math.nan
+        variance = self._tt - self._t * self._t / self._w
+        if variance <= 1e-12 * max(self._tt, 1.0):
+            return math.nan
+        return (self._ty - self._t * self._y / self._w) / variance
+
+    @property
+    def mean(self) -> float:
+        return self._y / self._w if self._w else math.nan
+
+
+class JumpDetector:
+    """Flag step changes of the current against an exponentially weighted baseline.
+
+    A jump is reported when ``confirm`` consecutive samples sit on the same
+    side of the baseline, further than ``sigma`` noise standard deviations
+    and ``min_relative`` of the baseline away. Single spikes therefore do
+    not count. The baseline then restarts at the new level.
+    """
+
+    def __init__(self, sigma: float = 6.0, tau: float = 60.0, confirm: int = 3, min_relative: float = 0.01, warmup: int = 20) -> None:
+        self.sigma = sigma
+        self.tau = tau
+        self.confirm = confirm
+        self.min_relative = min_relative
+        self.warmup = warmup
+        self.count = 0
+        self._mean = math.nan
+        self._var = 0.0
+        self._n = 0
+        self._last: Optional[float] = None
+        self._pending: list[tuple[float, float]] = []
+
+    def add(self, t: float, value: float) -> Optional[dict]:
+        """Update with one sample; returns the jump as a dict when one is confirmed."""
+        if not math.isfinite(value):
+            return None
+        if self._n == 0:
+            self._mean, self._last, self._n = value, t, 1
+            return None
+
+        deviation = value - self._mean
+        threshold = max(self.sigma * math.sqrt(self._var), self.min_relative * abs(self._mean))
+        if self._n >= self.warmup and abs(deviation) > threshold:
+            if self._pending and (self._pending[0][1] - self._mean) * deviation < 0:
+                self._pending.clear()
+            self._pending.append((t, value))
+            if len(self._pending) < self.confirm:
+                return None
+            level = sum(v for _, v in self._pending) / len(self._pending)
+            jump = {
+                "t": self._pending[0][0],
+                "from": self._mean,
+                "to": level,
+                "delta": level - self._mean,
+                "sigma": abs(level - self._mean) / math.sqrt(self._var) if self._var > 0 else math.inf,
+            }
+            self.count += 1
+            # 新电平作为基线重新开始，噪声估计保留
+            self._mean, self._last, self._n = level, t, self.warmup
+            self._pending.clear()
+            return jump
+
+        self._pending.clear()
+        alpha = 1.0 - math.exp(-(t - self._last) / self.tau) if t > self._last else 1.0 / (self._n + 1)
+        self._last = t
+        self._n += 1
+        # 前 warmup 个样本按等权平均，之后指数加权
+        alpha = max(alpha, 1.0 / self._n) if self._n <= self.warmup else alpha
+        self._var = (1.0 - alpha) * (self._var + alpha * deviation * deviation)
+        self._mean += alpha * deviation
+        return None
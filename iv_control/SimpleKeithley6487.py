@@ -1,11 +1,15 @@
+import logging
+
 import serial
 import time
 
+logger = logging.getLogger(__name__)
+
 class SimpleKeithley6487:
     def __init__(self, port='/dev/ttyUSB1', baudrate=9600):
         self.ser = serial.Serial(port=port, baudrate=baudrate, timeout=5)
         time.sleep(1)
-        print(f"连接到 {port}")
+        logger.info("连接到 %s", port)
     
     def send_command(self, command):
         if not command.endswith('\n'):
@@ -19,7 +23,7 @@ class SimpleKeithley6487:
     
 
     def old_setup_for_measurement(self):
-        print("设置测量并执行零点校正...")
+        logger.info("设置测量并执行零点校正...")
     
         self.send_command("*RST")                        # 重置仪器
         time.sleep(0.5)
@@ -41,12 +45,12 @@ class SimpleKeithley6487:
         time.sleep(0.3)
     
         # Step 4: 触发一次测量作为“校正值”
-        print("触发一次测量以获取零点偏移...")
+        logger.info("触发一次测量以获取零点偏移...")
         self.send_command("INIT")
         time.sleep(0.5)
     
         # Step 5: 采集校正值
-        print("采集零点偏移...")
+        logger.info("采集零点偏移...")
         self.send_command("SYST:ZCOR:ACQ")               # 获取当前偏移值
         self.send_command("SENS:FUNC 'CURR'")
         # 确保Zero Check关闭
@@ -76,7 +80,7 @@ class SimpleKeithley6487:
         time.sleep(0.3)
         
         # 执行零点校正
-        print("执行零点校正...")
+        logger.info("执行零点校正...")
         self.send_command("SYST:ZCOR:ACQ")              # 采集零点校正值
         time.sleep(1.0)                                 # 给足够时间完成校正
         
@@ -84,9 +88,10 @@ class SimpleKeithley6487:
         self.send_command("SYST:ZCH OFF")               # 关闭Zero Check，连接输入
         time.sleep(0.3)
         
-        print("电流测量模式配置完成")
+        logger.info("电流测量模式配置完成")
     def read_current(self):
         """读取电流"""
+        response = None
         try:
             response = self.query("READ?")
             if ',' in response:
@@ -94,5 +99,5 @@ class SimpleKeithley6487:
                 return float(current_str)
             return float(response)                       
         except:
-            print(f"读取失败: {response}")
+            logger.warning("读取失败: %r", response, extra={"instrument": "keithley6487"})
             return None
@@ -1,7 +1,199 @@
-import yaml
+"""Cached access to ``configs/config.yaml``.
+
+The file is parsed once and re-read only when its mtime or size changes,
+so request paths (page layout, plot callbacks) no longer parse YAML.
+Measurements take an immutable, validated :class:`MeasurementConfig`
+snapshot at start so edits made during a run do not affect it.
+"""
+from __future__ import annotations
+
+import copy
 import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+import numpy as np
+import yaml
+
+from instruments import FaultModel, InstrumentSettings
+from instruments.clock import CLOCK_MODES
+from instruments.dut import LGADModel
+
+DEFAULT_CONFIG_PATH = "configs/config.yaml"
+
+# Values used when a key is missing from the file.
+DEFAULTS: dict[str, Any] = {
+    "start_voltage": 0.0,
+    "stop_voltage": -50.0,
+    "step_voltage": 2.0,
+    "measurement_duration": 20.0,
+    "sample_interval": 0.5,
+    "stabilization_time": 5.0,
+    "maximum_current": 100.0,  # µA
+    "ac_voltage": 100.0,
+    "ac_frequency": 10.0,
+    "sensor_id": None,
+    "band_gap_energy": 1.21,  # eV
+    "clock": "real",  # real | scaled | simulated（后两者仅限虚拟仪器）
+    "clock_scale": 10.0,  # scaled 模式的加速倍数
+    "it_voltage": None,  # I–t 稳定性测试的偏压（V），缺省为 stop_voltage
+    "it_duration": 3600.0,  # I–t 总时长（s）
+    "it_drift_window": 1800.0,  # 漂移率估计的时间常数（s）
+    "it_jump_sigma": 6.0,  # 电流跳变阈值（噪声标准差的倍数）
+}
+
+_POSITIVE = (
+    "step_voltage", "measurement_duration", "sample_interval", "maximum_current", "clock_scale",
+    "it_duration", "it_drift_window", "it_jump_sigma",
+)
+
+
+class ConfigError(ValueError):
+    """The configuration file holds a value a measurement cannot run with."""
+
+
+@dataclass(frozen=True)
+class MeasurementConfig:
+    start_voltage: float
+    stop_voltage: float
+    step_voltage: float
+    measurement_duration: float
+    sample_interval: float
+    stabilization_time: float
+    maximum_current: float  # µA, as entered in the UI
+    ac_voltage: float
+    ac_frequency: float
+    sensor_id: Optional[str]
+    band_gap_energy: float
+    clock: str
+    clock_scale: float
+    it_voltage: float
+    it_duration: float
+    it_drift_window: float
+    it_jump_sigma: float
+    instruments: InstrumentSettings
+    raw: Mapping[str, Any] = field(repr=False)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "MeasurementConfig":
+        merged = {**DEFAULTS, **(data or {})}
+        values: dict[str, Any] = {}
+        for key in DEFAULTS:
+            value = merged[key]
+            if key == "sensor_id":
+                values[key] = str(value) if value not in (None, "") else None
+                continue
+            if key == "it_voltage" and value in (None, ""):
+                continue  # 循环结束后取 stop_voltage
+            if key == "clock":
+                values[key] = str(value or "real").lower()
+                if values[key] not in CLOCK_MODES:
+                    raise ConfigError(f"clock must be one of {', '.join(CLOCK_MODES)} (got {value!r})")
+                continue
+            try:
+                values[key] = float(value)
+            except (TypeError, ValueError):
+                raise ConfigError(f"Invalid config value for {key}: {value!r}") from None
+        values.setdefault("it_voltage", values["stop_voltage"])
+        for key in _POSITIVE:
+            if values[key] <= 0:
+                raise ConfigError(f"{key} must be positive (got {values[key]:g})")
+        if values["stabilization_time"] < 0:
+            raise ConfigError("stabilization_time must not be negative")
+
+        instruments = InstrumentSettings.from_config({"instruments": merged.get("instruments") or {}})
+        # 快照内的选项只读，避免一次测量修改影响其他读取者
+        instruments.hv_options = MappingProxyType(dict(instruments.hv_options or {}))
+        instruments.pico_options = MappingProxyType(dict(instruments.pico_options or {}))
+        instruments.lcr_options = MappingProxyType(dict(instruments.lcr_options or {}))
+        if isinstance(instruments.dut, Mapping):
+            instruments.dut = MappingProxyType(dict(instruments.dut))
+        try:
+            LGADModel.from_options(instruments.dut)
+        except (TypeError, ValueError) as exc:
+            raise ConfigError(f"Invalid instruments.dut: {exc}") from None
+        for name in ("hv_options", "pico_options", "lcr_options"):
+            try:
+                FaultModel.from_options(getattr(instruments, name))
+            except (TypeError, ValueError) as exc:
+                raise ConfigError(f"Invalid instruments.{name}.faults: {exc}") from None
+        return cls(instruments=instruments, raw=MappingProxyType(copy.deepcopy(dict(merged))), **values)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Plain mutable copy (for the run catalog and the config store)."""
+        return copy.deepcopy(dict(self.raw))
+
+    def sweep_voltages(self) -> np.ndarray:
+        if self.start_voltage < self.stop_voltage:
+            return np.arange(self.start_voltage, self.stop_voltage + self.step_voltage, self.step_voltage)
+        return np.arange(self.start_voltage, self.stop_voltage - self.step_voltage, -self.step_voltage)
+
+
+class ConfigService:
+    """Parse-once, mtime-invalidated view of one YAML config file."""
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp: Optional[tuple[int, int]] = None
+        self._data: dict[str, Any] = {}
+        self._snapshot: Optional[MeasurementConfig] = None
+
+    def raw(self) -> dict[str, Any]:
+        """The file's contents as a fresh dict (callers may modify it)."""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._data)
+
+    def snapshot(self) -> MeasurementConfig:
+        """Validated, immutable config; shared until the file changes."""
+        with self._lock:
+            self._refresh()
+            if self._snapshot is None:
+                self._snapshot = MeasurementConfig.from_dict(self._data)
+            return self._snapshot
+
+    def save(self, data: Mapping[str, Any]) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                yaml.safe_dump(dict(data), f)
+            os.replace(tmp_path, self.path)
+            self._stamp = None  # 下次读取时重新解析
+
+    def _refresh(self) -> None:
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+        with open(self.path, "r") as f:
+            self._data = yaml.safe_load(f) or {}
+        self._stamp = stamp
+        self._snapshot = None
+
+
+_services: dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def config_service(config_path: str = DEFAULT_CONFIG_PATH) -> ConfigService:
+    key = os.path.abspath(config_path)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = ConfigService(config_path)
+        return service
+
+
+def load_config(config_path=DEFAULT_CONFIG_PATH):
+    return config_service(config_path).raw()
+
+
+def get_config(config_path: str = DEFAULT_CONFIG_PATH) -> MeasurementConfig:
+    return config_service(config_path).snapshot()
 
-def load_config(config_path="configs/config.yaml"):
-    with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
 
+def save_config(data, config_path: str = DEFAULT_CONFIG_PATH) -> None:
+    config_service(config_path).save(data)
@@ -1,16 +1,24 @@
+import logging
 import math
 import os
-import time
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
-from instruments import InstrumentSettings, create_instrument_suite
+from instruments import create_instrument_suite
 from instruments.base import HVSource, PicoAmmeter
+from instruments.clock import REAL_CLOCK, Clock, clock_for
 from instruments.hv_sources import VirtualHVSource
 from instruments.picoammeters import VirtualPicoAmmeter
-from iv_control.config import load_config
+from iv_control.config import get_config
+from runs.catalog import new_run_dir, record_run
+from sensors.env_channel import EnvironmentChannel
+from state import push_sample
+from telemetry import ACQUISITION
+from telemetry.logs import bind_run, set_step, unbind_run
+
+logger = logging.getLogger(__name__)
 
 
 def _over_limit(value: float, limit: float) -> bool:
@@ -28,11 +36,12 @@ def ramp_voltage(
     step: float = 1.0,
     delay: float = 0.05,
     maximum_current: float = 10e-6,
+    clock: Clock = REAL_CLOCK,
 ) -> bool:
     try:
         current_voltage = float(hv_source.get_voltage())
     except Exception as e:
-        print(f"⚠️ Failed to read current voltage: {e}")
+        logger.warning("Failed to read current voltage: %s", e)
         current_voltage = 0.0
 
     if abs(current_voltage - target_voltage) < 1e-3:
@@ -43,17 +52,17 @@ def ramp_voltage(
     steps = np.arange(current_voltage, target_voltage, direction * step)
     steps = np.append(steps, target_voltage)
     
-    print(target_voltage, steps)
+    logger.debug("Ramping to %.2f V in %d steps", target_voltage, len(steps))
     for v in steps:
         hv_source.set_voltage(v)
-        time.sleep(delay)
+        clock.sleep(delay)
 
         # 每步测一次电流并限流保护
         try:
             current_source = float(hv_source.measure_current())
             current = float(picoammeter.read_current())
         except Exception as e:
-            print(f"⚠️ Current read error at {v:.2f}V: {e}")
+            logger.warning("Current read error at %.2f V during ramp: %s", v, e)
             current = 0.0  # fallback, allow next step
             current_source = 0.0
 
@@ -61,13 +70,16 @@ def ramp_voltage(
             _over_limit(current, maximum_current)
             or _over_limit(current_source, 3 * maximum_current)
         ):
-            print(f"🛑 Over-current during ramp: {current:.3e} A > {maximum_current:.3e} A")
+            logger.error(
+                "Over-current during ramp: %.3e A > %.3e A", current, maximum_current,
+                extra={"current": current, "limit": maximum_current},
+            )
             hv_source.enable_output(False)
             return False
 
     # 最终电压
     hv_source.set_voltage(target_voltage)
-    time.sleep(delay)
+    clock.sleep(delay)
     return True
 
 
@@ -76,7 +88,7 @@ def _ensure_hv_source(hv_source: HVSource, suite, hv_options) -> HVSource:
         hv_source.connect()
         return hv_source
     except Exception as exc:
-        print(f"⚠️ HV source unavailable ({exc}); switching to virtual source.")
+        logger.warning("HV source unavailable (%s); switching to virtual source.", exc)
         fallback = VirtualHVSource(
             noise=hv_options.get("noise", 5e-12),
             load_resistance=hv_options.get("virtual_dut_resistance", hv_options.get("load_resistance", 1e7)),
@@ -94,7 +106,7 @@ def _ensure_picoammeter(picoammeter: PicoAmmeter, suite, hv_source: HVSource, pi
             picoammeter.set_resistance(pico_options.get("virtual_dut_resistance", pico_options.get("load_resistance", 1e7)))
         return picoammeter
     except Exception as exc:
-        print(f"⚠️ Picoammeter unavailable ({exc}); using virtual DUT (10MΩ).")
+        logger.warning("Picoammeter unavailable (%s); using virtual DUT (10MΩ).", exc)
         fallback = VirtualPicoAmmeter(
             noise=pico_options.get("noise", 2e-12),
             hv_source=hv_source,
@@ -103,7 +115,38 @@ def _ensure_picoammeter(picoammeter: PicoAmmeter, suite, hv_source: HVSource, pi
         fallback.connect()
         suite.picoammeter = fallback
         return fallback
-def perform_measurement(shared_status, time_series, current_series, iv_curve, stop_event):
+
+
+def _publish(broadcaster, event: str, data: dict) -> None:
+    if broadcaster is not None:
+        broadcaster.publish(event, data)
+
+
+def _publish_transport(suite, shared_status, broadcaster) -> None:
+    # 每个电压点结束后更新一次传输层统计（需 instruments.profile: true）
+    if suite.profiler is None:
+        return
+    transport = suite.profiler.summary()
+    shared_status["transport"] = transport
+    _publish(broadcaster, "transport", transport)
+
+
+def _iv_summary(iv_curve) -> dict:
+    if not iv_curve:
+        return {"n_steps": 0}
+    voltages = np.array([v for v, _ in iv_curve], dtype=float)
+    currents = np.array([i for _, i in iv_curve], dtype=float)
+    last = int(np.argmax(np.abs(voltages)))
+    return {
+        "n_steps": len(iv_curve),
+        "min_voltage": float(voltages.min()),
+        "max_voltage": float(voltages.max()),
+        "max_abs_current": float(np.nanmax(np.abs(currents))) if np.isfinite(currents).any() else None,
+        "current_at_max_bias": float(currents[last]),
+    }
+
+
+def perform_measurement(shared_status, time_series, current_series, iv_curve, stop_event, broadcaster=None, catalog=None, env_sampler=None, config=None, clock=None, metrics=None, output_root="outputs"):
     """
     主测量函数，负责控制 Keithley 2470，记录数据并实时更新状态。
 
@@ -113,28 +156,30 @@ def perform_measurement(shared_status, time_series, current_series, iv_curve, st
         current_series: list，当前电压点的电流序列
         iv_curve: list，最终保存的 (V, I) 点
         stop_event: threading.Event，外部中止控制
+        broadcaster: streaming.LiveBroadcaster，可选，实时推送样本与状态
+        catalog: runs.RunCatalog，可选，结束时登记本次测量（默认 outputs/catalog.sqlite）
+        env_sampler: sensors.sampler.EnvironmentSampler，可选，温湿度来源（缺省时读取 shared_status）
+        config: iv_control.config.MeasurementConfig，可选，配置快照（缺省时读取当前配置）
+        clock: instruments.clock.Clock，可选，计时与等待所用的时钟（缺省时按配置的 clock 模式）
+        metrics: telemetry.AcquisitionMetrics，可选，/metrics 所用计数器（缺省为 telemetry.ACQUISITION）
+        output_root: str，结果目录的上级目录（缺省 outputs）
     """
-    timestamp = datetime.now().strftime("%m%d%H%M")
-    output_dir = f"outputs/iv_results_{timestamp}"
-    os.makedirs(output_dir, exist_ok=True)
-    cfg = load_config()  # ✅ 每次运行动态读取配置
-
-    start_voltage = cfg['start_voltage']
-    stop_voltage = cfg['stop_voltage']
-    step_voltage = cfg['step_voltage']
-    measurement_duration = cfg['measurement_duration']
-    sample_interval = cfg['sample_interval']
-    stabilization_time = cfg['stabilization_time']
-    maximum_current = cfg['maximum_current'] * 1e-6
-
-    if start_voltage < stop_voltage:
-        voltages = np.arange(start_voltage, stop_voltage + step_voltage, step_voltage)
-    else:
-        voltages = np.arange(start_voltage, stop_voltage - step_voltage, -step_voltage)
-
-
-    instruments_cfg = InstrumentSettings.from_config(cfg)
-    suite = create_instrument_suite(instruments_cfg)
+    started_at = datetime.now().isoformat(timespec="seconds")
+    output_dir = new_run_dir("iv", output_root)
+    run_id = os.path.basename(output_dir)
+    bind_run(run_id, "iv")
+    cfg = config or get_config()  # ✅ 本次运行使用的不可变配置快照
+    clock = clock or clock_for(cfg.instruments, cfg.clock, cfg.clock_scale, include_lcr=False)
+    metrics = metrics or ACQUISITION
+
+    measurement_duration = cfg.measurement_duration
+    sample_interval = cfg.sample_interval
+    stabilization_time = cfg.stabilization_time
+    maximum_current = cfg.maximum_current * 1e-6
+    voltages = cfg.sweep_voltages()
+
+    instruments_cfg = cfg.instruments
+    suite = create_instrument_suite(instruments_cfg, clock)
     hv_source = suite.hv_source
     picoammeter = suite.picoammeter
 
@@ -147,7 +192,7 @@ def perform_measurement(shared_status, time_series, current_series, iv_curve, st
     )
 
     if isinstance(hv_source, VirtualHVSource) and not isinstance(picoammeter, VirtualPicoAmmeter):
-        print("⚠️ HV source fallback detected; routing current through virtual 10MΩ DUT.")
+        logger.warning("HV source fallback detected; routing current through virtual 10MΩ DUT.")
         try:
             picoammeter.shutdown()
         except Exception:
@@ -160,22 +205,26 @@ def perform_measurement(shared_status, time_series, current_series, iv_curve, st
         picoammeter.connect()
         suite.picoammeter = picoammeter
 
-    print(
-        "▶️ Starting IV measurement using",
+    logger.info(
+        "▶️ Starting IV measurement using %s HV and %s ammeter",
         hv_source.__class__.__name__,
-        "HV and",
         picoammeter.__class__.__name__,
-        "ammeter",
     )
 
     iv_curve.clear()
+    _publish(broadcaster, "status", {"state": "running", "mode": "iv", "run": run_id})
+    recorder = metrics.start_run("iv", suite.profiler, sample_interval, ("hv_source", "picoammeter"))
+    run_state = "failed"
+    env_channel = EnvironmentChannel(env_sampler, shared_status, clock=clock)
+    run_t0 = clock.time()
 
     try:
         for v in voltages:
             if stop_event.is_set():
-                print("🔴 Measurement stopped before next voltage step.")
+                logger.info("Measurement stopped before next voltage step.")
                 return
 
+            set_step(v)
             hv_source.enable_output(True)
             voltage_output = ramp_voltage(
                 hv_source,
@@ -184,74 +233,84 @@ def perform_measurement(shared_status, time_series, current_series, iv_curve, st
                 step=30.0,
                 delay=0.05,
                 maximum_current=maximum_current,
+                clock=clock,
             )
 
             if not voltage_output:
                 break
             time_series.clear()
             current_series.clear()
+            _publish(broadcaster, "step", {"voltage": float(v)})
             timestamps = []
             current_data = []
             current_total = []
-            humi = []
-            temp = []
 
             # 初始化用于记录连续超限计数的变量（放在 while 循环前）
             over_current_count = 0
 
-            start_time = time.perf_counter()
+            start_time = clock.monotonic()
+            # 样本时间映射到温湿度读数所用的系统时钟
+            start_wall = clock.time()
+            env_channel.poll()
+            recorder.new_step()
             
-            while (time.perf_counter() - start_time) < measurement_duration:
+            while (clock.monotonic() - start_time) < measurement_duration:
                 if stop_event.is_set():
                     return
-                loop_start = time.perf_counter()
+                loop_start = clock.monotonic()
                 elapsed = loop_start - start_time
-            
-            try:
-                current_source = float(hv_source.measure_current())
-            except Exception as e:
-                print(f"⚠️ Source read error: {e}")
-                current_source = np.nan
-
-            try:
-                current = float(picoammeter.read_current())
-            except Exception as e:
-                print(f"⚠️ Read error: {e}")
-                current = np.nan
-
-            if isinstance(picoammeter, VirtualPicoAmmeter) and not math.isnan(current):
-                current_source = current
+
+                try:
+                    source_reading = float(hv_source.measure_current())
+                except Exception as e:
+                    logger.warning("Source read error: %s", e, extra={"instrument": "hv_source"})
+                    source_reading = np.nan
+                source_done = clock.monotonic()
+                current_source = source_reading
+
+                try:
+                    current = float(picoammeter.read_current())
+                except Exception as e:
+                    logger.warning("Read error: %s", e, extra={"instrument": "picoammeter"})
+                    current = np.nan
+                pico_done = clock.monotonic()
+
+                if isinstance(picoammeter, VirtualPicoAmmeter) and not math.isnan(current):
+                    current_source = current
+
                 if _over_limit(current, maximum_current):
                     over_current_count += 1
-                    print(f"⚠️ Over-current count: {over_current_count} ({current:.3e} A > {maximum_current:.3e} A)")
+                    logger.warning(
+                        "Over-current count: %d (%.3e A > %.3e A)", over_current_count, current, maximum_current,
+                        extra={"current": current, "limit": maximum_current},
+                    )
                     if over_current_count > 3:
-                        print("🔴 Triggering emergency stop due to 3 consecutive over-current readings.")
+                        logger.error("Triggering emergency stop due to 3 consecutive over-current readings.")
                         stop_event.set()
                         return
-            
-                # 获取当前温湿度
-                humidity = shared_status.get("humidity", "N/A")
-                temperature = shared_status.get("temperature", "N/A")
-            
+                else:
+                    over_current_count = 0
+
+                # 温湿度单独记录，写文件时按时间对齐
+                env_channel.poll()
+
                 # 记录数据
                 timestamps.append(elapsed)
                 current_data.append(current)
-                humi.append(humidity)
-                temp.append(temperature)
-                time_series.append(elapsed)
-                current_series.append(current)
                 current_total.append(current_source)
-            
-                # 更新状态
-                shared_status["voltage"] = v
-                shared_status["current"] = current
-                shared_status["time"] = elapsed
-            
+
+                # 更新状态（实时序列、状态与 sample 事件一次写入）
+                push_sample(shared_status, time_series, current_series, broadcaster, elapsed, current,
+                            {"voltage": v, "current": current, "time": elapsed},
+                            {"t": elapsed, "i": current, "v": float(v)})
+
                 # 计算睡眠时间（周期补偿）
-                loop_duration = time.perf_counter() - loop_start
+                loop_end = clock.monotonic()
+                recorder.sample(loop_start, loop_end, source_done - loop_start, pico_done - source_done, source_reading, current)
+                loop_duration = loop_end - loop_start
                 sleep_time = sample_interval - loop_duration
                 if sleep_time > 0:
-                    time.sleep(sleep_time)
+                    clock.sleep(sleep_time)
 
 
             voltage_turnoff = ramp_voltage(
@@ -261,6 +320,7 @@ def perform_measurement(shared_status, time_series, current_series, iv_curve, st
                 step=30.0,
                 delay=0.05,
                 maximum_current=maximum_current,
+                clock=clock,
             )
             hv_source.enable_output(False)
             if not voltage_turnoff:
@@ -273,6 +333,7 @@ def perform_measurement(shared_status, time_series, current_series, iv_curve, st
             iv_curve.append((v, avg_current))
 
             # 保存 I-t 数据点
+            temp, humi = env_channel.align(start_wall + np.asarray(timestamps, dtype=float))
             df = pd.DataFrame({
                 'Time(s)': timestamps,
                 'Current(A)': current_data,
@@ -280,12 +341,26 @@ def perform_measurement(shared_status, time_series, current_series, iv_curve, st
                 'Humidity(%RH)': humi,
                 'SourceCurrent(A)': current_total,
             })
+            write_start = REAL_CLOCK.monotonic()
             df.to_csv(f"{output_dir}/results_{v:.2f}V.csv", index=False)
+            metrics.step_written(REAL_CLOCK.monotonic() - write_start)
+            _publish_transport(suite, shared_status, broadcaster)
 
         # 保存最终 I-V 曲线
-        pd.DataFrame(iv_curve, columns=["Voltage(V)", "Current(A)"]).to_csv(
+        pd.DataFrame(list(iv_curve), columns=["Voltage(V)", "Current(A)"]).to_csv(
             f"{output_dir}/IV_Curve.csv", index=False)
-        print("✅ Measurement complete.")
+        logger.info("✅ Measurement complete.")
+        run_state = "finished"
     finally:
         hv_source.enable_output(False)
         suite.shutdown_all()
+        if stop_event.is_set():
+            run_state = "stopped"
+        if env_channel.has_data:
+            env_channel.to_frame(run_t0).to_csv(f"{output_dir}/Environment.csv", index=False)
+        if suite.profiler is not None:
+            logger.info("%s", suite.profiler.report())
+        record_run(output_dir, "iv", started_at, run_state, cfg.as_dict(), suite, _iv_summary(iv_curve), catalog)
+        metrics.end_run("iv", run_state)
+        unbind_run()
+        _publish(broadcaster, "status", {"state": run_state, "mode": "iv", "run": run_id, "path": output_dir})
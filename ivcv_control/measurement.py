@@ -0,0 +1,245 @@
+import logging
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from cv_control.measurement import _cv_summary
+from instruments import create_instrument_suite
+from instruments.base import LCRMeter
+from instruments.clock import REAL_CLOCK, clock_for
+from instruments.picoammeters import VirtualPicoAmmeter
+from iv_control.config import get_config
+from iv_control.measurement import _ensure_hv_source, _ensure_picoammeter, _iv_summary, ramp_voltage
+from runs.catalog import new_run_dir, record_run
+from sensors.env_channel import EnvironmentChannel
+from state import push_sample
+from telemetry import ACQUISITION
+from telemetry.logs import bind_run, set_step, unbind_run
+
+logger = logging.getLogger(__name__)
+
+
+def perform_ivcv_measurement(shared_status, time_series, current_series, iv_curve, stop_event, broadcaster=None, catalog=None, env_sampler=None, config=None, clock=None, metrics=None, output_root="outputs"):
+    """
+    组合 I–V + C–V 扫描：每个偏压点只升压、驻留一次，同时读取皮安表电流与 LCR 的 Cp/Rp。
+
+    LCR 读数在后台线程中与电流读数并行进行，两者共用同一时间戳，
+    每个电压点写一个 results_<V>V.csv（电流、源电流、Cp、Rp、温湿度对齐），
+    结束时写 IV_Curve.csv 与 CV_Curve.csv，并在目录中登记为一次 ivcv 运行。
+
+    参数与 iv_control.measurement.perform_measurement 相同；iv_curve 接收 (V, I) 点。
+    """
+    started_at = datetime.now().isoformat(timespec="seconds")
+    output_dir = new_run_dir("ivcv", output_root)
+    run_id = os.path.basename(output_dir)
+    bind_run(run_id, "ivcv")
+    cfg = config or get_config()
+    clock = clock or clock_for(cfg.instruments, cfg.clock, cfg.clock_scale)
+    metrics = metrics or ACQUISITION
+
+    measurement_duration = cfg.measurement_duration
+    sample_interval = cfg.sample_interval
+    stabilization_time = cfg.stabilization_time
+    maximum_current = cfg.maximum_current * 1e-6
+    voltages = cfg.sweep_voltages()
+
+    instruments_cfg = cfg.instruments
+    suite = create_instrument_suite(instruments_cfg, clock)
+    hv_source = _ensure_hv_source(suite.hv_source, suite, instruments_cfg.hv_options)
+    picoammeter = _ensure_picoammeter(suite.picoammeter, suite, hv_source, instruments_cfg.pico_options)
+    lcr_meter = suite.lcr_meter
+    if lcr_meter is None:
+        raise RuntimeError("No LCR meter configured. Set instruments.lcr_meter in config.yaml")
+    lcr_meter.connect()
+
+    logger.info(
+        "▶️ Starting combined I–V + C–V measurement using %s HV, %s ammeter, and %s",
+        hv_source.__class__.__name__,
+        picoammeter.__class__.__name__,
+        lcr_meter.__class__.__name__,
+    )
+
+    iv_curve.clear()
+    cv_curve = []
+    _publish(broadcaster, "status", {"state": "running", "mode": "ivcv", "run": run_id})
+    recorder = metrics.start_run("ivcv", suite.profiler, sample_interval, ("hv_source", "picoammeter", "lcr_meter"))
+    run_state = "failed"
+    env_channel = EnvironmentChannel(env_sampler, shared_status, clock=clock)
+    run_t0 = clock.time()
+    # LCR 与皮安表/源表在不同总线上，单独一个线程即可让两路读数重叠
+    lcr_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lcr-read",
+                                  initializer=bind_run, initargs=(run_id, "ivcv"))
+
+    try:
+        for v in voltages:
+            if stop_event.is_set():
+                logger.info("Measurement stopped before next voltage step.")
+                return
+
+            set_step(v)
+            hv_source.enable_output(True)
+            # 逐点升压，不在点间回零：一次扫描覆盖两种测量
+            if not ramp_voltage(hv_source, picoammeter, v, step=30.0, delay=0.05,
+                                maximum_current=maximum_current, clock=clock):
+                break
+
+            time_series.clear()
+            current_series.clear()
+            _publish(broadcaster, "step", {"voltage": float(v)})
+            timestamps = []
+            current_data = []
+            current_total = []
+            cp_list = []
+            rp_list = []
+            over_current_count = 0
+
+            start_time = clock.monotonic()
+            # 样本时间映射到温湿度读数所用的系统时钟
+            start_wall = clock.time()
+            env_channel.poll()
+            recorder.new_step()
+
+            while (clock.monotonic() - start_time) < measurement_duration:
+                if stop_event.is_set():
+                    return
+                loop_start = clock.monotonic()
+                elapsed = loop_start - start_time
+                lcr_read = lcr_pool.submit(_fetch_cprp, lcr_meter, clock)
+
+                try:
+                    source_reading = float(hv_source.measure_current())
+                except Exception as e:
+                    logger.warning("Source read error: %s", e, extra={"instrument": "hv_source"})
+                    source_reading = math.nan
+                source_done = clock.monotonic()
+                current_source = source_reading
+
+                try:
+                    current = float(picoammeter.read_current())
+                except Exception as e:
+                    logger.warning("Read error: %s", e, extra={"instrument": "picoammeter"})
+                    current = math.nan
+                pico_done = clock.monotonic()
+
+                cp, rp, lcr_seconds = lcr_read.result()
+
+                if isinstance(picoammeter, VirtualPicoAmmeter) and not math.isnan(current):
+                    current_source = current
+
+                if _over_limit(current, maximum_current):
+                    over_current_count += 1
+                    logger.warning(
+                        "Over-current count: %d (%.3e A > %.3e A)", over_current_count, current, maximum_current,
+                        extra={"current": current, "limit": maximum_current},
+                    )
+                    if over_current_count > 3:
+                        logger.error("Triggering emergency stop due to 3 consecutive over-current readings.")
+                        stop_event.set()
+                        return
+                else:
+                    over_current_count = 0
+
+                env_channel.poll()
+
+                timestamps.append(elapsed)
+                current_data.append(current)
+                current_total.append(current_source)
+                cp_list.append(cp)
+                rp_list.append(rp)
+                push_sample(
+                    shared_status, time_series, current_series, broadcaster, elapsed, current,
+                    {"voltage": v, "current": current, "parallel-resistance": rp, "parallel-capacitance": cp, "time": elapsed},
+                    {"t": elapsed, "i": current, "v": float(v), "cp": cp, "rp": rp},
+                )
+
+                loop_end = clock.monotonic()
+                recorder.sample(loop_start, loop_end, source_done - loop_start, pico_done - source_done, lcr_seconds,
+                                source_reading, current, cp)
+                loop_duration = loop_end - loop_start
+                sleep_time = sample_interval - loop_duration
+                if sleep_time > 0:
+                    clock.sleep(sleep_time)
+
+            # 两条曲线取同一稳定窗口内的样本
+            stable = [k for k, t in enumerate(timestamps) if t > (measurement_duration - stabilization_time)]
+            if stable:
+                iv_curve.append((v, float(np.nanmean([current_data[k] for k in stable]))))
+                cv_curve.append((
+                    v,
+                    float(np.nanmean([cp_list[k] for k in stable])),
+                    float(np.nanmean([rp_list[k] for k in stable])),
+                ))
+
+            temp, humi = env_channel.align(start_wall + np.asarray(timestamps, dtype=float))
+            df = pd.DataFrame({
+                'Time(s)': timestamps,
+                'Current(A)': current_data,
+                'Cp(F)': cp_list,
+                'Rp(ohm)': rp_list,
+                'Temperature(°C)': temp,
+                'Humidity(%RH)': humi,
+                'SourceCurrent(A)': current_total,
+            })
+            write_start = REAL_CLOCK.monotonic()
+            df.to_csv(f"{output_dir}/results_{v:.2f}V.csv", index=False)
+            metrics.step_written(REAL_CLOCK.monotonic() - write_start)
+            _publish_transport(suite, shared_status, broadcaster)
+
+        ramp_voltage(hv_source, picoammeter, 0, step=30.0, delay=0.05,
+                     maximum_current=maximum_current, clock=clock)
+        pd.DataFrame(list(iv_curve), columns=["Voltage(V)", "Current(A)"]).to_csv(
+            f"{output_dir}/IV_Curve.csv", index=False)
+        pd.DataFrame(cv_curve, columns=["Voltage(V)", "Cp(F)", "Rp(ohm)"]).to_csv(
+            f"{output_dir}/CV_Curve.csv", index=False)
+        logger.info("✅ Combined I–V + C–V measurement complete.")
+        run_state = "finished"
+    finally:
+        lcr_pool.shutdown(wait=True)
+        hv_source.enable_output(False)
+        suite.shutdown_all()
+        if stop_event.is_set():
+            run_state = "stopped"
+        if env_channel.has_data:
+            env_channel.to_frame(run_t0).to_csv(f"{output_dir}/Environment.csv", index=False)
+        if suite.profiler is not None:
+            logger.info("%s", suite.profiler.report())
+        summary = {**_cv_summary(cv_curve), **_iv_summary(iv_curve)}
+        record_run(output_dir, "ivcv", started_at, run_state, cfg.as_dict(), suite, summary, catalog)
+        metrics.end_run("ivcv", run_state)
+        unbind_run()
+        _publish(broadcaster, "status", {"state": run_state, "mode": "ivcv", "run": run_id, "path": output_dir})
+
+
+def _fetch_cprp(lcr_meter: LCRMeter, clock) -> tuple[float, float, float]:
+    # 在读数线程中运行；耗时在此测量，计数器只在测量线程中更新
+    start = clock.monotonic()
+    try:
+        cp, rp = lcr_meter.fetch_cprp()
+    except Exception as e:
+        logger.warning("LCR read error: %s", e, extra={"instrument": "lcr_meter"})
+        cp, rp = math.nan, math.nan
+    return cp, rp, clock.monotonic() - start
+
+
+def _over_limit(value: float, limit: float) -> bool:
+    if value is None or math.isnan(value):
+        return False
+    return abs(value) > limit
+
+
+def _publish(broadcaster, event: str, data: dict) -> None:
+    if broadcaster is not None:
+        broadcaster.publish(event, data)
+
+
+def _publish_transport(suite, shared_status, broadcaster) -> None:
+    # 每个电压点结束后更新一次传输层统计（需 instruments.profile: true）
+    if suite.profiler is None:
+        return
+    transport = suite.profiler.summary()
+    shared_status["transport"] = transport
+    _publish(broadcaster, "transport", transport)
@@ -0,0 +1,15 @@
+"""Headless measurement jobs: specs from config files and overrides, and a runner."""
+from .runner import JobResult, run_job
+from .scheduler import Job, JobQueue
+from .spec import ENGINES, JobSpec, load_jobs, parse_assignment
+
+__all__ = [
+    "ENGINES",
+    "Job",
+    "JobQueue",
+    "JobResult",
+    "JobSpec",
+    "load_jobs",
+    "parse_assignment",
+    "run_job",
+]
@@ -0,0 +1,143 @@
+"""Run measurements from the command line, without the dashboard.
+
+Examples::
+
+    python -m jobs iv                                   # one I–V sweep with configs/config.yaml
+    python -m jobs iv cv --set stop_voltage=-200        # I–V then C–V with an override
+    python -m jobs it --set it_voltage=-150 --set it_duration=86400   # 24 h I–t stability run
+    python -m jobs --jobs batch.yaml --outputs /data/lgad
+
+A jobs file is a list of ``{kind, config, set, name, repeat}`` entries,
+optionally under ``jobs:`` with shared ``defaults:``. Jobs run one after
+another; Ctrl-C stops the running job and skips the rest. The exit
+status is 0 only if every job finished.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import threading
+from typing import Optional
+
+from iv_control.config import DEFAULT_CONFIG_PATH
+
+from .runner import JobResult, run_job
+from .spec import ENGINES, JobSpec, load_jobs, merge, parse_assignment, set_override
+
+
+class _Progress:
+    """Prints one line per voltage step of the running job."""
+
+    def __init__(self, label: str, steps: int) -> None:
+        self.label = label
+        self.steps = steps
+        self.done = 0
+
+    def __call__(self, event: str, data: dict) -> None:
+        if event == "step":
+            self.done += 1
+            print(f"  {self.label} step {self.done}/{self.steps}: {data['voltage']:.2f} V", flush=True)
+        elif event == "trend":
+            print(f"  {self.label} {data['elapsed_s'] / 60:.0f} min: I = {data['mean_current']:.3e} A, "
+                  f"drift {data['drift_A_per_h']:+.2e} A/h, {data['jumps']} jump(s)", flush=True)
+        elif event == "status" and data.get("state") == "running":
+            print(f"▶️ {self.label} → {data.get('run')}", flush=True)
+
+
+def _build_specs(args) -> list[JobSpec]:
+    overrides: dict = {}
+    for assignment in args.set:
+        key, value = parse_assignment(assignment)
+        set_override(overrides, key, value)
+    specs = load_jobs(args.jobs) if args.jobs else []
+    specs += [JobSpec(kind, args.config) for kind in args.kinds]
+    # --set 优先于任务文件中的 set
+    for spec in specs:
+        spec.overrides = merge(spec.overrides, overrides)
+    return specs
+
+
+def _run(spec: JobSpec, label: str, stop_event: threading.Event, args, env_sampler) -> JobResult:
+    progress = None
+    if not args.quiet:
+        try:
+            steps = 1 if spec.kind == "it" else len(spec.config().sweep_voltages())
+            progress = _Progress(label, steps)
+        except Exception:
+            pass  # 配置无效时由 run_job 报告
+    result: list[JobResult] = []
+    done = threading.Event()
+
+    def work() -> None:
+        try:
+            result.append(run_job(spec, stop_event, on_event=progress, env_sampler=env_sampler, output_root=args.outputs))
+        finally:
+            done.set()
+
+    threading.Thread(target=work, daemon=True).start()
+    # 测量在工作线程中进行，主线程只等待 Ctrl-C；停止后仍等仪器安全关闭
+    while not done.is_set():
+        try:
+            done.wait(0.2)
+        except KeyboardInterrupt:
+            if not stop_event.is_set():
+                print("\n⏹️ Stopping the running job…", flush=True)
+                stop_event.set()
+    return result[0]
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run I–V / C–V / I–V + C–V / I–t measurements without the dashboard.")
+    parser.add_argument("kinds", nargs="*", metavar="KIND",
+                        help=f"measurement to run, in order ({', '.join(sorted(ENGINES))})")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_PATH,
+                        help="config file for the KIND jobs")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override a config key, e.g. instruments.hv_source=virtual (repeatable)")
+    parser.add_argument("--jobs", metavar="FILE", help="YAML file with a list of jobs, run before any KIND")
+    parser.add_argument("--outputs", default="outputs", help="folder the run folders are created in")
+    parser.add_argument("--no-env", action="store_true", help="do not sample the SHT35 sensor")
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = _build_specs(args)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    if not specs:
+        parser.error("nothing to run: give a KIND or --jobs FILE")
+
+    from telemetry.logs import setup_logging
+
+    setup_logging(console=not args.quiet)
+    env_sampler = None
+    if not args.no_env:
+        from sensors.sampler import EnvironmentSampler
+
+        env_sampler = EnvironmentSampler()
+        env_sampler.start()
+
+    stop_event = threading.Event()
+    results: list[JobResult] = []
+    try:
+        for n, spec in enumerate(specs, 1):
+            label = f"[{n}/{len(specs)}] {spec.name}"
+            results.append(_run(spec, label, stop_event, args, env_sampler))
+            if stop_event.is_set():
+                break
+    finally:
+        if env_sampler is not None:
+            env_sampler.stop()
+
+    print("\nJob summary:")
+    for result in results:
+        where = result.run_dir or result.error or ""
+        print(f"  {result.name:<12} {result.state:<9} {result.duration_s:7.1f} s  {where}")
+    skipped = len(specs) - len(results)
+    if skipped:
+        print(f"  ({skipped} job(s) not run)")
+    return 0 if len(results) == len(specs) and all(r.ok for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
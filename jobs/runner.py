@@ -0,0 +1,112 @@
+"""Run a :class:`JobSpec` on the measurement engines without the dashboard.
+
+The engine runs in the calling thread with plain dicts and lists in place
+of the shared state, so nothing here imports Dash or polls a UI. Events
+the engine publishes (``status``, ``step``, ``sample``, ``transport``) are handed
+to ``on_event`` as they happen.
+"""
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from iv_control.config import ConfigError
+
+from .spec import ENGINES, JobSpec
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[str, dict], None]
+
+
+@dataclass
+class JobResult:
+    name: str
+    kind: str
+    state: str  # finished | stopped | failed | invalid
+    run_dir: Optional[str]
+    duration_s: float
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.state == "finished"
+
+
+class _Recorder:
+    """Broadcaster stand-in: remembers the final status and forwards every event."""
+
+    def __init__(self, on_event: Optional[EventHandler], broadcaster=None) -> None:
+        self._on_event = on_event
+        self._broadcaster = broadcaster
+        self.status: dict[str, Any] = {}
+
+    def publish(self, event: str, data: dict) -> None:
+        if event == "status":
+            self.status = data
+        if self._on_event is not None:
+            self._on_event(event, data)
+        if self._broadcaster is not None:
+            self._broadcaster.publish(event, data)
+
+
+def run_job(
+    spec: JobSpec,
+    stop_event: Optional[threading.Event] = None,
+    on_event: Optional[EventHandler] = None,
+    broadcaster=None,
+    env_sampler=None,
+    catalog=None,
+    output_root: str = "outputs",
+    shared_status=None,
+    time_series=None,
+    current_series=None,
+    curve=None,
+) -> JobResult:
+    """Run one job to completion (or until ``stop_event`` is set).
+
+    ``broadcaster`` and the shared containers are those of a running
+    dashboard when the job should show up on it; otherwise private ones
+    are used. An invalid config yields a result with ``state="invalid"``
+    instead of raising.
+    """
+    start = time.monotonic()
+    try:
+        config = spec.config()
+    except (ConfigError, OSError) as exc:
+        return JobResult(spec.name, spec.kind, "invalid", None, 0.0, str(exc))
+
+    module, function = ENGINES[spec.kind]
+    engine = getattr(importlib.import_module(module), function)
+    recorder = _Recorder(on_event, broadcaster)
+    error = None
+    try:
+        engine(
+            shared_status if shared_status is not None else {},
+            time_series if time_series is not None else [],
+            current_series if current_series is not None else [],
+            curve if curve is not None else [],
+            stop_event or threading.Event(),
+            broadcaster=recorder,
+            catalog=catalog,
+            env_sampler=env_sampler,
+            config=config,
+            output_root=output_root,
+        )
+    except Exception as exc:
+        # 引擎已在 finally 中发布 failed 状态；批处理继续下一个任务
+        logger.exception("Job %s failed", spec.name)
+        error = str(exc)
+    final = recorder.status
+    return JobResult(
+        name=spec.name,
+        kind=spec.kind,
+        state=final.get("state", "failed"),
+        run_dir=final.get("path"),
+        duration_s=time.monotonic() - start,
+        error=error,
+    )
@@ -0,0 +1,222 @@
+"""FIFO queue of measurement jobs run one at a time on the station.
+
+Used by the HTTP API: submitted jobs wait in order and a single worker
+thread runs them on the app's shared state, so they appear on the
+dashboard like a Start click. Job state changes are published as ``job``
+events on the live broadcaster.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from state import Station
+from state.broker import StationLock
+
+from .runner import JobResult, run_job
+from .spec import JobSpec
+
+logger = logging.getLogger(__name__)
+
+# queued → (waiting →) running → 以下之一
+FINAL_STATES = ("finished", "stopped", "failed", "invalid", "cancelled")
+
+
+@dataclass
+class Job:
+    spec: JobSpec
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    state: str = "queued"
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    run_dir: Optional[str] = None
+    error: Optional[str] = None
+    position: int = 0  # 提交序号
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.spec.name,
+            "kind": self.spec.kind,
+            "overrides": self.spec.overrides,
+            "state": self.state,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "run": self.run_dir.rstrip("/").rsplit("/", 1)[-1] if self.run_dir else None,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Run submitted :class:`JobSpec` objects in order on the shared state.
+
+    Parameters mirror what the dashboard's Start button hands the engines.
+    Each job holds ``station`` while it runs and waits while a dashboard
+    run (from any worker) holds it. At most ``keep`` finished jobs are
+    remembered.
+    """
+
+    OWNER_PREFIX = "job "
+
+    def __init__(
+        self,
+        shared_status,
+        time_series,
+        current_series,
+        curve,
+        stop_event,
+        broadcaster=None,
+        catalog=None,
+        env_sampler=None,
+        output_root: str = "outputs",
+        keep: int = 200,
+        station: Optional[Station] = None,
+    ) -> None:
+        self._shared = (shared_status, time_series, current_series, curve)
+        self._stop_event = stop_event
+        self._broadcaster = broadcaster
+        self._catalog = catalog
+        self._env_sampler = env_sampler
+        self._output_root = output_root
+        self._keep = keep
+        self._station = station or Station(StationLock())
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending: deque[Job] = deque()
+        self._current: Optional[Job] = None
+        self._counter = itertools.count(1)
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    # —— 提交与取消 --------------------------------------------------------
+    def submit(self, spec: JobSpec) -> Job:
+        """Queue ``spec``; its config is validated when the job starts."""
+        job = Job(spec, position=next(self._counter))
+        with self._cond:
+            self._jobs[job.id] = job
+            self._pending.append(job)
+            self._forget_old()
+            self._ensure_worker()
+            self._cond.notify()
+        self._announce(job)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Drop a queued job or stop the running one; ``None`` if unknown."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.state == "queued":
+                self._pending.remove(job)
+                self._finish(job, "cancelled")
+            elif job.state == "waiting":
+                self._finish(job, "cancelled")
+            elif job is self._current:
+                # 引擎在当前电压步结束后安全关闭输出
+                self._stop_event.set()
+                return job
+            else:
+                return job
+        self._announce(job)
+        return job
+
+    # —— 查询 ----------------------------------------------------------------
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    @property
+    def current(self) -> Optional[Job]:
+        return self._current
+
+    @property
+    def station(self) -> Station:
+        return self._station
+
+    def queued_ahead(self, job: Job) -> int:
+        with self._cond:
+            return sum(1 for j in self._pending if j.position < job.position)
+
+    # —— 工作线程 ------------------------------------------------------------
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._work, name="job-queue", daemon=True)
+            self._thread.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job = self._pending.popleft()
+                self._current = job
+                owner = self.OWNER_PREFIX + job.id
+                acquired = self._station.acquire(owner)
+                job.state = "running" if acquired else "waiting"
+            if not acquired:
+                self._announce(job)
+                # 仪表盘（任一 worker）上的测量或回放结束后再开始
+                while job.state == "waiting":
+                    acquired = self._station.acquire(owner)
+                    if acquired:
+                        break
+                    time.sleep(0.5)
+                with self._cond:
+                    if job.state == "cancelled":
+                        if acquired:
+                            self._station.release(owner)
+                        self._current = None
+                        continue
+                    job.state = "running"
+            job.started_at = datetime.now().isoformat(timespec="seconds")
+            self._announce(job)
+
+            try:
+                self._stop_event.clear()
+                shared_status, time_series, current_series, curve = self._shared
+                result: JobResult = run_job(
+                    job.spec,
+                    self._stop_event,
+                    broadcaster=self._broadcaster,
+                    env_sampler=self._env_sampler,
+                    catalog=self._catalog,
+                    output_root=self._output_root,
+                    shared_status=shared_status,
+                    time_series=time_series,
+                    current_series=current_series,
+                    curve=curve,
+                )
+            finally:
+                self._station.release(owner)
+            with self._cond:
+                job.run_dir = result.run_dir
+                job.error = result.error
+                self._finish(job, result.state)
+                self._current = None
+            logger.info("Job %s (%s) %s", job.id, job.spec.name, job.state)
+            self._announce(job)
+
+    def _finish(self, job: Job, state: str) -> None:
+        job.state = state
+        job.finished_at = datetime.now().isoformat(timespec="seconds")
+
+    def _forget_old(self) -> None:
+        finished = [j for j in self._jobs.values() if j.state in FINAL_STATES]
+        for job in finished[:max(0, len(finished) - self._keep)]:
+            del self._jobs[job.id]
+
+    def _announce(self, job: Job) -> None:
+        if self._broadcaster is not None:
+            self._broadcaster.publish("job", job.as_dict())
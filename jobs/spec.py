@@ -0,0 +1,101 @@
+"""Job descriptions for headless runs: a run type, a config file and overrides."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Mapping, Optional
+
+import yaml
+
+from iv_control.config import DEFAULT_CONFIG_PATH, MeasurementConfig, load_config
+
+# 运行类型 → (模块, 测量函数)，首次运行时才导入
+ENGINES = {
+    "iv": ("iv_control.measurement", "perform_measurement"),
+    "cv": ("cv_control.measurement", "perform_cv_measurement"),
+    "it": ("it_control.measurement", "perform_it_measurement"),
+    "ivcv": ("ivcv_control.measurement", "perform_ivcv_measurement"),
+}
+
+
+@dataclass
+class JobSpec:
+    kind: str
+    config_path: str = DEFAULT_CONFIG_PATH
+    overrides: dict[str, Any] = field(default_factory=dict)
+    name: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.kind = self.kind.lower()
+        if self.kind not in ENGINES:
+            raise ValueError(f"Unknown job kind {self.kind!r} (expected one of {', '.join(ENGINES)})")
+        if self.name is None:
+            self.name = self.kind
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any], base_dir: str = ".", defaults: Optional[Mapping[str, Any]] = None) -> "JobSpec":
+        """``{kind, config, set, name}``; relative config paths resolve against ``base_dir``."""
+        data = {**(defaults or {}), **data}
+        unknown = set(data) - {"kind", "config", "set", "name", "repeat"}
+        if unknown:
+            raise ValueError(f"Unknown job keys: {', '.join(sorted(unknown))}")
+        if "kind" not in data:
+            raise ValueError("job needs a 'kind'")
+        config_path = data.get("config") or DEFAULT_CONFIG_PATH
+        if "config" in data and not os.path.isabs(config_path):
+            config_path = os.path.join(base_dir, config_path)
+        overrides: dict[str, Any] = {}
+        for key, value in (data.get("set") or {}).items():
+            set_override(overrides, key, value)
+        return cls(kind=str(data["kind"]), config_path=config_path, overrides=overrides, name=data.get("name"))
+
+    def config(self) -> MeasurementConfig:
+        """The config file with the overrides applied, validated (raises ConfigError)."""
+        return MeasurementConfig.from_dict(merge(load_config(self.config_path), self.overrides))
+
+
+def set_override(overrides: dict[str, Any], dotted_key: str, value: Any) -> None:
+    """Set ``instruments.hv_source``-style keys in a nested override dict."""
+    target = overrides
+    *parents, leaf = dotted_key.split(".")
+    for part in parents:
+        target = target.setdefault(part, {})
+    target[leaf] = value
+
+
+def parse_assignment(text: str) -> tuple[str, Any]:
+    """``key=value`` from the command line; the value is parsed as YAML (numbers, booleans, lists)."""
+    key, sep, value = text.partition("=")
+    if not sep or not key:
+        raise ValueError(f"expected KEY=VALUE, got {text!r}")
+    return key.strip(), yaml.safe_load(value) if value.strip() else None
+
+
+def merge(base: Mapping[str, Any], overrides: Mapping[str, Any]) -> dict[str, Any]:
+    merged = dict(base)
+    for key, value in overrides.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_jobs(path: str) -> list[JobSpec]:
+    """Jobs from a YAML file: a list of jobs, or ``{defaults: {...}, jobs: [...]}``.
+
+    A job may carry ``repeat: N`` to run N times in a row.
+    """
+    with open(path) as f:
+        data = yaml.safe_load(f) or []
+    defaults: Mapping[str, Any] = {}
+    if isinstance(data, Mapping):
+        defaults = data.get("defaults") or {}
+        data = data.get("jobs") or []
+    base_dir = os.path.dirname(os.path.abspath(path))
+    specs = []
+    for entry in data:
+        entry = {"kind": entry} if isinstance(entry, str) else entry
+        repeat = int({**defaults, **entry}.get("repeat", 1))
+        specs.extend(JobSpec.from_dict(entry, base_dir, defaults) for _ in range(repeat))
+    return specs
@@ -0,0 +1,10 @@
+"""Run storage helpers: catalog of completed measurement runs."""
+from .catalog import RunCatalog, RunRecord, describe_suite, new_run_dir, record_run
+
+__all__ = [
+    "RunCatalog",
+    "RunRecord",
+    "describe_suite",
+    "new_run_dir",
+    "record_run",
+]
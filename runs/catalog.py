@@ -0,0 +1,296 @@
+"""Persistent SQLite index of measurement runs under ``outputs/``."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = "catalog.sqlite"
+
+# Folder prefix written by each measurement engine.
+RUN_PREFIXES = {
+    "iv": "iv_results_",
+    "cv": "cv_results_",
+    "it": "it_results_",
+    "ivcv": "ivcv_results_",
+}
+
+
+def new_run_dir(run_type: str, root: str = "outputs") -> str:
+    """Create and return a fresh ``<root>/<prefix><MMDDHHMM>`` folder.
+
+    Runs started within the same minute get ``_2``, ``_3``, … suffixes
+    instead of writing into each other's folder.
+    """
+    base = f"{root}/{RUN_PREFIXES[run_type]}{datetime.now().strftime('%m%d%H%M')}"
+    path, n = base, 1
+    while True:
+        try:
+            os.makedirs(path)
+            return path
+        except FileExistsError:
+            n += 1
+            path = f"{base}_{n}"
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    path TEXT PRIMARY KEY,
+    run_type TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    status TEXT,
+    sensor_id TEXT,
+    config_json TEXT,
+    instruments_json TEXT,
+    summary_json TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_type_started ON runs (run_type, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_runs_sensor ON runs (sensor_id);
+"""
+
+
+@dataclass
+class RunRecord:
+    path: str
+    run_type: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    status: Optional[str] = None
+    sensor_id: Optional[str] = None
+    config: dict[str, Any] = field(default_factory=dict)
+    instruments: dict[str, Any] = field(default_factory=dict)
+    summary: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path.rstrip("/"))
+
+    @classmethod
+    def _from_row(cls, row: sqlite3.Row) -> "RunRecord":
+        return cls(
+            path=row["path"],
+            run_type=row["run_type"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            status=row["status"],
+            sensor_id=row["sensor_id"],
+            config=json.loads(row["config_json"] or "{}"),
+            instruments=json.loads(row["instruments_json"] or "{}"),
+            summary=json.loads(row["summary_json"] or "{}"),
+        )
+
+
+class RunCatalog:
+    """Index of runs stored next to the data in ``<root>/catalog.sqlite``.
+
+    Engines call :meth:`record` when a run finishes; the dashboard pages
+    through :meth:`query` instead of listing the outputs directory.
+    Connections are opened per call so the catalog is safe to share across
+    threads.
+    """
+
+    def __init__(self, root: str = "outputs") -> None:
+        self.root = root
+        self.db_path = os.path.join(root, CATALOG_FILENAME)
+        self._init_lock = threading.Lock()
+        self._initialised = False
+
+    # Writing ----------------------------------------------------------
+    def record(self, *records: RunRecord) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO runs (path, run_type, started_at, finished_at, status, sensor_id,"
+                " config_json, instruments_json, summary_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        record.path,
+                        record.run_type,
+                        record.started_at,
+                        record.finished_at,
+                        record.status,
+                        record.sensor_id,
+                        json.dumps(record.config, default=str),
+                        json.dumps(record.instruments, default=str),
+                        json.dumps(record.summary, default=_json_default),
+                    )
+                    for record in records
+                ],
+            )
+
+    def sync_directory(self) -> int:
+        """Index run folders that predate the catalog; returns how many were added."""
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return 0
+        with self._connect() as conn:
+            known = {row[0] for row in conn.execute("SELECT path FROM runs")}
+        imported = []
+        for entry in entries:
+            run_type = _run_type_for(entry.name)
+            path = f"{self.root}/{entry.name}"
+            if run_type is None or path in known or not entry.is_dir():
+                continue
+            started = datetime.fromtimestamp(entry.stat().st_mtime).isoformat(timespec="seconds")
+            imported.append(RunRecord(
+                path=path,
+                run_type=run_type,
+                started_at=started,
+                finished_at=started,
+                status="imported",
+                summary=_summary_from_filenames(entry.path),
+            ))
+        if imported:
+            self.record(*imported)
+        return len(imported)
+
+    # Reading ----------------------------------------------------------
+    def get(self, path: str) -> Optional[RunRecord]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE path = ?", (path,)).fetchone()
+        return RunRecord._from_row(row) if row is not None else None
+
+    def query(
+        self,
+        run_type: Union[str, tuple[str, ...], None] = None,
+        search: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> tuple[list[RunRecord], int]:
+        """Return one page of runs (newest first) and the total match count.
+
+        ``run_type`` is one type or a tuple of types (e.g. ``("iv", "ivcv")``).
+        """
+        clauses, params = [], []
+        if run_type:
+            types = (run_type,) if isinstance(run_type, str) else tuple(run_type)
+            clauses.append(f"run_type IN ({', '.join('?' * len(types))})")
+            params.extend(types)
+        if search:
+            # 按字面匹配：W5_P3 中的 "_" 不能当作通配符
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            clauses.append(
+                "(path LIKE ? ESCAPE '\\' OR sensor_id LIKE ? ESCAPE '\\' OR started_at LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern, pattern, pattern])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM runs{where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT * FROM runs{where} ORDER BY started_at DESC, path DESC LIMIT ? OFFSET ?",
+                [*params, int(limit), int(offset)],
+            ).fetchall()
+        return [RunRecord._from_row(row) for row in rows], total
+
+    # Internal helpers -------------------------------------------------
+    def _connect(self) -> "_ClosingConnection":
+        os.makedirs(self.root, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._initialised:
+            with self._init_lock:
+                if not self._initialised:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._initialised = True
+        return _ClosingConnection(conn)
+
+
+class _ClosingConnection:
+    """``with`` support that commits *and* closes, unlike ``sqlite3.Connection``."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self._conn
+
+    def __exit__(self, exc_type, *exc) -> None:
+        try:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        finally:
+            self._conn.close()
+
+
+def record_run(
+    output_dir: str,
+    run_type: str,
+    started_at: str,
+    status: str,
+    config: dict[str, Any],
+    suite,
+    summary: dict[str, Any],
+    catalog: Optional[RunCatalog] = None,
+) -> None:
+    """Record a finished run; failures are reported but never raised."""
+    catalog = catalog or RunCatalog(os.path.dirname(output_dir) or ".")
+    try:
+        catalog.record(RunRecord(
+            path=output_dir,
+            run_type=run_type,
+            started_at=started_at,
+            finished_at=datetime.now().isoformat(timespec="seconds"),
+            status=status,
+            sensor_id=config.get("sensor_id"),
+            config=config,
+            instruments=describe_suite(suite),
+            summary=summary,
+        ))
+    except Exception as exc:
+        logger.warning("Failed to record run in catalog (%s)", exc)
+
+
+def describe_suite(suite) -> dict[str, Any]:
+    """Instrument model names of an ``InstrumentSuite`` for the catalog.
+
+    With transport profiling on, the per-command timing summary is
+    included under ``transport``.
+    """
+    described = {
+        "hv_source": type(suite.hv_source).__name__,
+        "picoammeter": type(suite.picoammeter).__name__,
+        "lcr_meter": type(suite.lcr_meter).__name__ if suite.lcr_meter is not None else None,
+    }
+    profiler = getattr(suite, "profiler", None)
+    if profiler is not None:
+        described["transport"] = profiler.summary()
+    return described
+
+
+def _run_type_for(folder_name: str) -> Optional[str]:
+    for run_type, prefix in RUN_PREFIXES.items():
+        if folder_name.startswith(prefix):
+            return run_type
+    return None
+
+
+def _summary_from_filenames(run_dir: str) -> dict[str, Any]:
+    voltages = []
+    for name in os.listdir(run_dir):
+        if name.endswith("V.csv") and name.startswith(("results_", "reuslts_")):
+            try:
+                voltages.append(float(name.split("_")[-1].replace("V.csv", "")))
+            except ValueError:
+                continue
+    if not voltages:
+        return {"n_steps": 0}
+    return {"n_steps": len(voltages), "min_voltage": min(voltages), "max_voltage": max(voltages)}
+
+
+def _json_default(value: Any) -> Any:
+    # NumPy scalars from the engines
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
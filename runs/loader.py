@@ -0,0 +1,126 @@
+"""Bulk loader for legacy per-voltage ``results_<V>V.csv`` run folders.
+
+Files from one or many runs are parsed in parallel (threads by default;
+the pyarrow CSV reader releases the GIL), concatenated once as Arrow
+tables and returned as a single typed pandas table with ``Run`` and
+``Voltage(V)`` columns prepended.
+"""
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.csv as pa_csv  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pa_csv = None
+
+# Placeholders older runs wrote for missing environment readings.
+NA_VALUES = ["", "N/A", "None", "nan", "NaN"]
+
+
+def _step_files(run_dir: str) -> list[tuple[str, float]]:
+    files = []
+    for fname in sorted(os.listdir(run_dir)):
+        if fname.endswith("V.csv") and fname.startswith(("results_", "reuslts_")):
+            try:
+                voltage = float(fname.split('_')[-1].replace('V.csv', ''))
+            except ValueError:
+                continue
+            files.append((os.path.join(run_dir, fname), voltage))
+    return files
+
+
+def _read_step_arrow(path: str):
+    # 每个文件单线程解析，并行度由外层线程池提供
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=False),
+        convert_options=pa_csv.ConvertOptions(null_values=NA_VALUES, strings_can_be_null=True),
+    )
+    for k, column in enumerate(table.schema):
+        if pa.types.is_null(column.type):
+            table = table.set_column(k, column.name, table.column(k).cast(pa.float64()))
+    return table
+
+
+def _read_step_pandas(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, na_values=NA_VALUES)
+
+
+def load_runs(
+    run_dirs: Iterable[str],
+    max_workers: Optional[int] = None,
+    executor: str = "thread",
+) -> pd.DataFrame:
+    """Load every per-voltage file of ``run_dirs`` into one table.
+
+    Parameters:
+        run_dirs: run folders such as ``outputs/iv_results_06121530``
+        max_workers: pool size (defaults to the executor's own default)
+        executor: ``"thread"`` or ``"process"``
+    """
+    run_dirs = list(dict.fromkeys(run_dirs))
+    jobs = [(run_dir, path, voltage) for run_dir in run_dirs for path, voltage in _step_files(run_dir)]
+    if not jobs:
+        return pd.DataFrame({
+            "Run": pd.Categorical([], categories=run_dirs),
+            "Voltage(V)": np.array([], dtype=float),
+        })
+
+    if executor == "thread":
+        pool_cls = ThreadPoolExecutor
+    elif executor == "process":
+        pool_cls = ProcessPoolExecutor
+    else:
+        raise ValueError(f"Unsupported executor: {executor}")
+
+    read_step = _read_step_arrow if pa_csv is not None else _read_step_pandas
+    paths = [path for _, path, _ in jobs]
+    if len(jobs) == 1:
+        frames = [read_step(paths[0])]
+    else:
+        with pool_cls(max_workers=max_workers) as pool:
+            # 仅对进程池有效：减少进程间往返
+            chunksize = max(len(paths) // (4 * (max_workers or os.cpu_count() or 1)), 1)
+            frames = list(pool.map(read_step, paths, chunksize=chunksize))
+
+    lengths = np.fromiter((len(frame) for frame in frames), dtype=np.intp, count=len(frames))
+    codes = {run_dir: k for k, run_dir in enumerate(run_dirs)}
+    run_codes = np.repeat([codes[run_dir] for run_dir, _, _ in jobs], lengths)
+    voltages = np.repeat([voltage for _, _, voltage in jobs], lengths)
+
+    if pa_csv is not None:
+        # 不同时期的文件列可能不同（如 Cp(uF) / Cp(F)），缺失列补空
+        table = pa.concat_tables(frames, promote_options="permissive").combine_chunks().to_pandas()
+    else:
+        table = pd.concat(frames, ignore_index=True)
+    # 旧文件里温湿度列可能混有字符串，统一为浮点
+    for column in table.columns:
+        if table[column].dtype == object:
+            table[column] = pd.to_numeric(table[column], errors="coerce")
+    table.insert(0, "Voltage(V)", voltages.astype(float))
+    table.insert(0, "Run", pd.Categorical.from_codes(run_codes, categories=run_dirs))
+    return table
+
+
+def stable_means(table: pd.DataFrame, column, stab_time: float) -> pd.DataFrame:
+    """Mean of ``column`` over the last ``stab_time`` seconds of each run/voltage step.
+
+    ``column`` may be a single name or a list of names. Steps whose window
+    is empty fall back to the mean of the whole step. Returns a frame with
+    ``Run``, ``Voltage(V)`` and the requested column(s).
+    """
+    keys = ["Run", "Voltage(V)"]
+    groups = table.groupby(keys, observed=True, sort=True)
+    t_max = groups["Time(s)"].transform("max")
+    window = table[table["Time(s)"] > t_max - stab_time]
+    means = window.groupby(keys, observed=True, sort=True)[column].mean()
+    full = groups[column].mean()
+    return means.reindex(full.index).fillna(full).reset_index()
@@ -0,0 +1,179 @@
+"""Replay a recorded run through the live pipeline.
+
+The samples of an ``outputs/iv_results_*`` (or ``cv_results_*``) folder are
+written into ``shared_status`` and the live series and published on the
+broadcaster with their recorded timing, divided by ``speed``, exactly as
+the measurement engines do. The dashboard's live graph, status line and
+SSE stream therefore see production data at production rates (or faster)
+without instruments. Nothing is written to ``outputs/``.
+
+From the dashboard use "Replay Selected Run" in the I–V plot panel. From
+a shell, against a multi-worker deployment's state broker::
+
+    LGAD_STATE_BACKEND=manager python -m runs.replay outputs/iv_results_06011230 --speed 10
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+from typing import Optional
+
+import numpy as np
+
+from instruments.clock import REAL_CLOCK, Clock, ScaledClock, SimulatedClock
+from runs.loader import NA_VALUES, _step_files
+from state import push_sample
+from telemetry.logs import bind_run, set_step, unbind_run
+
+logger = logging.getLogger(__name__)
+
+
+def replay_clock(speed: Optional[float]) -> Clock:
+    """Real time for ``speed == 1``, N× faster for ``speed > 1``, no waits for ``0``/``None``."""
+    if not speed or speed <= 0:
+        return SimulatedClock()
+    if speed == 1:
+        return REAL_CLOCK
+    return ScaledClock(speed)
+
+
+def _publish(broadcaster, event: str, data: dict) -> None:
+    if broadcaster is not None:
+        broadcaster.publish(event, data)
+
+
+_COLUMNS = ("Time(s)", "Current(A)", "Cp(F)", "Rp(ohm)")
+
+
+def _read_step(path: str) -> dict[str, np.ndarray]:
+    import pandas as pd
+
+    frame = pd.read_csv(path, na_values=NA_VALUES)
+    return {column: frame[column].to_numpy(dtype=float) for column in frame.columns if column in _COLUMNS}
+
+
+def replay_run(
+    run_dir: str,
+    shared_status,
+    time_series,
+    current_series,
+    curve,
+    stop_event,
+    speed: Optional[float] = 1.0,
+    broadcaster=None,
+    stabilization_time: Optional[float] = None,
+    clock: Optional[Clock] = None,
+) -> str:
+    """Stream ``run_dir`` into the live state; returns ``"finished"``, ``"stopped"`` or ``"failed"``.
+
+    ``curve`` receives ``(V, mean I)`` per step (the stable-window mean,
+    as in ``IV_Curve.csv``) so the live I–V view fills in as it would
+    during the run.
+    """
+    clock = clock or replay_clock(speed)
+    if stabilization_time is None:
+        from iv_control.config import get_config
+
+        stabilization_time = get_config().stabilization_time
+
+    # 文件名按字母排序；回放按扫描顺序（|V| 递增）
+    steps = sorted(_step_files(run_dir), key=lambda step: abs(step[1]))
+    if not steps:
+        logger.warning("Nothing to replay in %s", run_dir)
+        return "failed"
+
+    name = os.path.basename(os.path.normpath(run_dir))
+    bind_run(name, "replay")
+    logger.info("▶️ Replaying %s (%d steps) at %s speed", name, len(steps), "max" if not speed or speed <= 0 else f"{speed:g}×")
+    curve.clear()
+    _publish(broadcaster, "status", {"state": "running", "mode": "replay", "run": name})
+    state = "failed"
+    try:
+        for path, v in steps:
+            if stop_event.is_set():
+                break
+            try:
+                step = _read_step(path)
+            except Exception as e:
+                logger.warning("Skipping unreadable step %s: %s", os.path.basename(path), e)
+                continue
+            times = step.get("Time(s)")
+            currents = step.get("Current(A)")
+            if times is None or currents is None:
+                continue
+
+            set_step(v)
+            time_series.clear()
+            current_series.clear()
+            _publish(broadcaster, "step", {"voltage": float(v)})
+            cp = step.get("Cp(F)")
+            rp = step.get("Rp(ohm)")
+
+            start = clock.monotonic()
+            for k in range(len(times)):
+                if stop_event.is_set():
+                    break
+                # 按记录的时间戳调度，累计误差不随样本数增长
+                clock.sleep(times[k] - (clock.monotonic() - start))
+                t, i = float(times[k]), float(currents[k])
+                status = {"voltage": v, "current": i, "time": t}
+                sample = {"t": t, "i": i, "v": float(v)}
+                if cp is not None and rp is not None:
+                    status["parallel-capacitance"] = sample["cp"] = float(cp[k])
+                    status["parallel-resistance"] = sample["rp"] = float(rp[k])
+                push_sample(shared_status, time_series, current_series, broadcaster, t, i, status, sample)
+            if stop_event.is_set():
+                break
+
+            stable = times > times[-1] - stabilization_time if len(times) else np.zeros(0, dtype=bool)
+            if stable.any():
+                curve.append((v, float(np.nanmean(currents[stable]))))
+
+        state = "stopped" if stop_event.is_set() else "finished"
+        logger.info("✅ Replay %s.", state)
+        return state
+    finally:
+        unbind_run()
+        _publish(broadcaster, "status", {"state": state, "mode": "replay", "run": name})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded run into the shared measurement state.")
+    parser.add_argument("run_dir")
+    parser.add_argument("--speed", type=float, default=1.0, help="speed-up factor; 0 replays without waiting")
+    parser.add_argument("--stabilization-time", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    from state import create_state_backend
+    from telemetry.logs import setup_logging
+
+    setup_logging()
+    state = create_state_backend()
+    if os.environ.get("LGAD_STATE_BACKEND", "local").lower() != "manager":
+        logger.warning("LGAD_STATE_BACKEND is not 'manager': the replay only reaches this process, not a running app.")
+    # 与仪表盘回放相同：测量或 API 任务运行时不能清除其 Stop 标志、曲线与实时序列
+    if not state.station.acquire("replay"):
+        logger.error("Station busy (%s); replay not started.", state.station.holder)
+        return 1
+    try:
+        state.stop_event.clear()
+        result = replay_run(
+            args.run_dir,
+            state.status,
+            state.time_series,
+            state.current_series,
+            state.iv_curve,
+            state.stop_event,
+            speed=args.speed,
+            broadcaster=state.broadcaster,
+            stabilization_time=args.stabilization_time,
+        )
+    finally:
+        state.station.release("replay")
+    return 1 if result == "failed" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
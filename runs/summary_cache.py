@@ -0,0 +1,211 @@
+"""Memoised per-run (V, I) / (V, C) summaries for the plot callbacks.
+
+Summaries are keyed by run path and invalidated by the names, sizes and
+mtimes of the run's CSV files. An in-memory LRU serves repeat requests
+(re-checking the files at most every ``SIGNATURE_TTL`` seconds) and an
+``.npz`` tier under ``<root>/.summary_cache`` survives restarts.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from iv_control.config import load_config
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIRNAME = ".summary_cache"
+CACHE_VERSION = 1
+SIGNATURE_TTL = 2.0  # 内存命中后多久重新扫描一次运行目录（秒）
+
+Summary = tuple[np.ndarray, np.ndarray]
+
+
+def step_files(run_dir: str) -> list[str]:
+    """Per-voltage result files of a run folder, sorted by name."""
+    return sorted(
+        f for f in os.listdir(run_dir)
+        if f.endswith(".csv") and (f.startswith("results_") or f.startswith("reuslts_"))
+    )
+
+
+def compute_iv_summary(run_dir: str, stab_time: float) -> Optional[Summary]:
+    """Sorted (|V|, |I|) from a run folder, preferring its ``IV_Curve.csv``."""
+    import pandas as pd
+    from runs.loader import load_runs, stable_means
+
+    files = step_files(run_dir)
+    if not files:
+        return None
+
+    curve_path = os.path.join(run_dir, "IV_Curve.csv")
+    if os.path.exists(curve_path):
+        curve = pd.read_csv(curve_path)
+        # 只有完整运行写出的汇总才可直接使用
+        if len(curve) == len(files) and {"Voltage(V)", "Current(A)"} <= set(curve.columns):
+            voltages = np.abs(curve["Voltage(V)"].to_numpy(dtype=float))
+            currents = np.abs(curve["Current(A)"].to_numpy(dtype=float))
+            order = np.argsort(voltages, kind="stable")
+            return voltages[order], currents[order]
+
+    means = stable_means(load_runs([run_dir]), "Current(A)", stab_time)
+    voltages = np.abs(means["Voltage(V)"].to_numpy(dtype=float))
+    currents = np.abs(means["Current(A)"].to_numpy(dtype=float))
+    order = np.argsort(voltages, kind="stable")
+    return voltages[order], currents[order]
+
+
+def compute_iv_temperature(run_dir: str, stab_time: float) -> Optional[Summary]:
+    """Sorted (|V|, stable-window temperature in °C); ``None`` without temperature data."""
+    from runs.loader import load_runs, stable_means
+
+    table = load_runs([run_dir])
+    column = "Temperature(°C)"
+    if column not in table.columns:
+        return None
+    means = stable_means(table, column, stab_time).dropna(subset=[column])
+    if means.empty:
+        return None
+    voltages = np.abs(means["Voltage(V)"].to_numpy(dtype=float))
+    order = np.argsort(voltages, kind="stable")
+    return voltages[order], means[column].to_numpy(dtype=float)[order]
+
+
+def compute_cv_summary(run_dir: str, stab_time: float) -> Optional[Summary]:
+    """Sorted (V, Cp in pF) from a run folder."""
+    from runs.loader import load_runs, stable_means
+
+    table = load_runs([run_dir])
+    if "Cp(F)" in table.columns:
+        column, scale_to_pf = "Cp(F)", 1e12
+    elif "Cp(uF)" in table.columns:
+        column, scale_to_pf = "Cp(uF)", 1e6
+    else:
+        return None
+    means = stable_means(table, column, stab_time).dropna(subset=[column])
+    if means.empty:
+        return None
+    # 已按 (Run, Voltage) 排序
+    return means["Voltage(V)"].to_numpy(dtype=float), means[column].to_numpy(dtype=float) * scale_to_pf
+
+
+_COMPUTE: dict[str, Callable[[str, float], Optional[Summary]]] = {
+    "iv": compute_iv_summary,
+    "iv_temperature": compute_iv_temperature,
+    "cv": compute_cv_summary,
+}
+
+
+class RunSummaryCache:
+    """LRU + on-disk cache of run summaries shared by the plot callbacks."""
+
+    def __init__(self, catalog=None, root: str = "outputs", max_entries: int = 256) -> None:
+        self._catalog = catalog
+        self._cache_dir = os.path.join(root, CACHE_DIRNAME)
+        self._max_entries = max_entries
+        # key → (signature, summary, stabilization time, monotonic time of the last signature check)
+        self._entries: "OrderedDict[tuple[str, str], tuple[str, Summary, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def iv_curve(self, run_dir: str) -> Optional[Summary]:
+        return self._get("iv", run_dir)
+
+    def iv_temperature(self, run_dir: str) -> Optional[Summary]:
+        return self._get("iv_temperature", run_dir)
+
+    def cv_curve(self, run_dir: str) -> Optional[Summary]:
+        return self._get("cv", run_dir)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # Internal helpers -------------------------------------------------
+    def _get(self, kind: str, run_dir: str) -> Optional[Summary]:
+        key = (kind, os.path.abspath(run_dir))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[3] < SIGNATURE_TTL:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        # TTL 过期：用缓存的稳定时间重新扫描目录，不查询目录数据库
+        if entry is not None:
+            signature = self._signature(run_dir, entry[2])
+            if signature == entry[0]:
+                with self._lock:
+                    if key in self._entries:
+                        self._entries[key] = (signature, entry[1], entry[2], now)
+                        self._entries.move_to_end(key)
+                return entry[1]
+
+        stab_time = self._stabilization_time(run_dir)
+        signature = self._signature(run_dir, stab_time)
+
+        summary = self._load_disk(kind, key[1], signature)
+        if summary is None:
+            summary = _COMPUTE[kind](run_dir, stab_time)
+            if summary is None:
+                return None
+            self._store_disk(kind, key[1], signature, summary)
+
+        with self._lock:
+            self._entries[key] = (signature, summary, stab_time, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return summary
+
+    def _stabilization_time(self, run_dir: str) -> float:
+        # 优先使用该次运行登记的配置，历史运行回退到当前配置
+        if self._catalog is not None:
+            try:
+                record = self._catalog.get(run_dir)
+            except Exception:
+                record = None
+            if record is not None and "stabilization_time" in record.config:
+                return float(record.config["stabilization_time"])
+        return float(load_config().get("stabilization_time", 2))
+
+    @staticmethod
+    def _signature(run_dir: str, stab_time: float) -> str:
+        parts = [CACHE_VERSION, stab_time]
+        with os.scandir(run_dir) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.name.endswith(".csv"):
+                    stat = entry.stat()
+                    parts.append((entry.name, stat.st_size, stat.st_mtime_ns))
+        return json.dumps(parts)
+
+    def _disk_path(self, kind: str, abs_run_dir: str) -> str:
+        digest = hashlib.sha1(f"{kind}:{abs_run_dir}".encode()).hexdigest()
+        return os.path.join(self._cache_dir, f"{digest}.npz")
+
+    def _load_disk(self, kind: str, abs_run_dir: str, signature: str) -> Optional[Summary]:
+        try:
+            with np.load(self._disk_path(kind, abs_run_dir), allow_pickle=False) as data:
+                if str(data["signature"]) != signature:
+                    return None
+                return data["x"], data["y"]
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _store_disk(self, kind: str, abs_run_dir: str, signature: str, summary: Summary) -> None:
+        path = self._disk_path(kind, abs_run_dir)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            np.savez(tmp_path, signature=np.array(signature), x=summary[0], y=summary[1])
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning("Failed to write summary cache (%s)", exc)
@@ -0,0 +1,127 @@
+"""Timestamped temperature / humidity channel recorded alongside a measurement.
+
+The measurement loops poll the channel once per sample; it only stores a
+point when the background sampler has produced a new reading. At write
+time the channel is joined to the current samples by time, so the CSV
+columns are plain floats (NaN when no reading is close enough).
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from instruments.clock import REAL_CLOCK
+
+ENV_COLUMNS = ("Temperature(°C)", "Humidity(%RH)")
+
+
+def _as_float(value) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value
+
+
+class EnvironmentChannel:
+    """Environment readings of one run, on the run clock's ``time()``.
+
+    Parameters:
+        sampler: :class:`sensors.sampler.EnvironmentSampler`; new readings
+            are detected by its sequence number
+        shared_status: fallback source when no sampler is given; its
+            ``temperature`` / ``humidity`` are recorded at most every
+            ``fallback_interval`` seconds
+        max_gap: samples further than this (seconds) from any reading get NaN
+        fallback_interval: minimum spacing (seconds) of ``shared_status`` readings
+        clock: :class:`instruments.clock.Clock` of the run; with a scaled or
+            simulated clock, readings are timestamped when they are polled
+    """
+
+    def __init__(
+        self,
+        sampler=None,
+        shared_status: Optional[dict] = None,
+        max_gap: float = 10.0,
+        fallback_interval: float = 1.0,
+        clock=REAL_CLOCK,
+    ) -> None:
+        self._sampler = sampler
+        self._shared_status = shared_status
+        self._max_gap = max_gap
+        self._fallback_interval = fallback_interval
+        self._clock = clock
+        self._last_seq = -1
+        self._times: list[float] = []
+        self._temperature: list[float] = []
+        self._humidity: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    @property
+    def has_data(self) -> bool:
+        """True once any finite temperature or humidity has been recorded."""
+        return bool(np.isfinite(self._temperature).any() or np.isfinite(self._humidity).any())
+
+    def poll(self) -> None:
+        """Record the latest reading if it is new; cheap enough to call per sample."""
+        if self._sampler is not None:
+            reading = self._sampler.latest()
+            if reading.seq == self._last_seq or reading.seq == 0:
+                return
+            self._last_seq = reading.seq
+            # 非实时时钟下传感器仍按真实时间采样，只能以轮询时刻对齐
+            timestamp = reading.timestamp if self._clock.is_real else self._clock.time()
+            self._append(timestamp, reading.temperature, reading.humidity)
+        elif self._shared_status is not None:
+            now = self._clock.time()
+            if self._times and now - self._times[-1] < self._fallback_interval:
+                return
+            self._append(
+                now,
+                self._shared_status.get("temperature"),
+                self._shared_status.get("humidity"),
+            )
+
+    def align(self, times) -> tuple[np.ndarray, np.ndarray]:
+        """Interpolate temperature and humidity at ``times`` (the run clock's ``time()``)."""
+        times = np.asarray(times, dtype=float)
+        if not self._times:
+            nan = np.full(times.shape, np.nan)
+            return nan, nan.copy()
+
+        t = np.asarray(self._times)
+        temperature = np.interp(times, t, self._temperature)
+        humidity = np.interp(times, t, self._humidity)
+
+        # 远离任何读数的样本（如采样线程停顿）记为缺失，而不是外推
+        k = np.searchsorted(t, times)
+        left = t[np.clip(k - 1, 0, len(t) - 1)]
+        right = t[np.clip(k, 0, len(t) - 1)]
+        far = np.minimum(np.abs(times - left), np.abs(times - right)) > self._max_gap
+        temperature[far] = np.nan
+        humidity[far] = np.nan
+        return temperature, humidity
+
+    def to_frame(self, t0: float) -> pd.DataFrame:
+        """Raw readings with ``Time(s)`` relative to ``t0``."""
+        return pd.DataFrame({
+            "Time(s)": np.asarray(self._times) - t0,
+            ENV_COLUMNS[0]: np.asarray(self._temperature, dtype=float),
+            ENV_COLUMNS[1]: np.asarray(self._humidity, dtype=float),
+        })
+
+    def _append(self, timestamp, temperature, humidity) -> None:
+        timestamp = _as_float(timestamp)
+        if math.isnan(timestamp):
+            return
+        if self._times and timestamp < self._times[-1]:
+            # 系统时钟回拨：保持时间单调，便于插值
+            timestamp = self._times[-1]
+        self._times.append(timestamp)
+        self._temperature.append(_as_float(temperature))
+        self._humidity.append(_as_float(humidity))
@@ -0,0 +1,127 @@
+"""Background temperature / humidity sampler.
+
+A single daemon thread owns the I²C bus and refreshes a timestamped
+reading at a fixed rate. Dash callbacks and measurement loops read the
+latest value with :meth:`EnvironmentSampler.latest`, which never touches
+the bus, so sensor traffic no longer scales with the number of viewers.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from sensors.sht35 import read_sht35
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERIOD = 1.0
+
+
+@dataclass(frozen=True)
+class EnvReading:
+    timestamp: float  # time.time() of the read; NaN before the first sample
+    temperature: Optional[float]
+    humidity: Optional[float]
+    seq: int  # increments on every completed read
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+
+class EnvironmentSampler:
+    """Sample ``read()`` every ``period`` seconds into a shared cache.
+
+    Parameters:
+        read: callable returning ``(temperature, humidity)``; ``None`` values
+            mean the sensor is unavailable
+        period: sampling period in seconds
+        shared_status: optional dict whose ``temperature`` / ``humidity``
+            keys are kept in sync for existing readers; the full reading is
+            stored under ``env`` so a sampler that is not started (another
+            worker owns the bus) can serve :meth:`latest` from it
+        broadcaster: optional :class:`streaming.LiveBroadcaster`; each
+            reading is published as an ``env`` event
+    """
+
+    def __init__(
+        self,
+        read: Callable[[], tuple[Optional[float], Optional[float]]] = read_sht35,
+        period: float = DEFAULT_PERIOD,
+        shared_status: Optional[dict] = None,
+        broadcaster=None,
+    ) -> None:
+        self._read = read
+        self._period = float(period)
+        self._shared_status = shared_status
+        self._broadcaster = broadcaster
+        self._latest = EnvReading(math.nan, None, None, 0)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def period(self) -> float:
+        return self._period
+
+    def latest(self) -> EnvReading:
+        """Most recent reading; never blocks on the sensor."""
+        if self._thread is None and self._shared_status is not None:
+            shared = self._shared_status.get("env")
+            if shared is not None:
+                return EnvReading(*shared)
+        with self._lock:
+            return self._latest
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="env-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def sample_once(self) -> EnvReading:
+        """Read the sensor once and update the cache."""
+        try:
+            temperature, humidity = self._read()
+        except Exception as exc:
+            logger.warning("Environment read failed: %s", exc)
+            temperature, humidity = None, None
+
+        with self._lock:
+            reading = EnvReading(time.time(), temperature, humidity, self._latest.seq + 1)
+            self._latest = reading
+
+        if self._shared_status is not None:
+            self._shared_status["temperature"] = temperature
+            self._shared_status["humidity"] = humidity
+            self._shared_status["env"] = (reading.timestamp, temperature, humidity, reading.seq)
+        if self._broadcaster is not None:
+            self._broadcaster.publish("env", {
+                "t": reading.timestamp,
+                "temperature": temperature,
+                "humidity": humidity,
+            })
+        return reading
+
+    # Internal helpers -------------------------------------------------
+    def _run(self) -> None:
+        next_due = time.monotonic()
+        while not self._stop_event.is_set():
+            self.sample_once()
+            # 固定节拍采样；读数偶尔超时则跳过错过的节拍
+            next_due += self._period
+            now = time.monotonic()
+            if next_due < now:
+                next_due = now + self._period
+            self._stop_event.wait(next_due - now)
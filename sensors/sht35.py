@@ -1,4 +1,6 @@
+import errno
 import logging
+import threading
 import time
 
 try:
@@ -8,24 +10,165 @@ except ImportError:  # pragma: no cover - dependency missing during simulation
 
 logger = logging.getLogger(__name__)
 
+SHT35_ADDRESS = 0x44
+
+# Periodic data acquisition, high repeatability: measurements per second -> command
+PERIODIC_COMMANDS = {
+    0.5: (0x20, 0x32),
+    1: (0x21, 0x30),
+    2: (0x22, 0x36),
+    4: (0x23, 0x34),
+    10: (0x27, 0x37),
+}
+FETCH_COMMAND = (0xE0, 0x00)
+BREAK_COMMAND = (0x30, 0x93)
+
+# errno of a NACKed read on Linux (EREMOTEIO is not defined everywhere).
+# EIO is a bus fault (sensor unplugged, bus locked up), not "no new data".
+_NACK_ERRNO = getattr(errno, "EREMOTEIO", 121)
+# NACKs longer than this many measurement periods mean the sensor stopped converting
+STALE_PERIODS = 5
+
+
+def crc8(data):
+    """Sensirion CRC-8 (polynomial 0x31, init 0xFF) over ``data``."""
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def convert(data):
+    """Six raw bytes (T msb, T lsb, CRC, RH msb, RH lsb, CRC) to (°C, %RH).
+
+    Raises ``ValueError`` if either CRC does not match.
+    """
+    if crc8(data[0:2]) != data[2] or crc8(data[3:5]) != data[5]:
+        raise ValueError(f"SHT35 CRC mismatch: {bytes(data).hex()}")
+    temperature = -45 + (175 * ((data[0] << 8) + data[1]) / 65535.0)
+    humidity = 100 * ((data[3] << 8) + data[4]) / 65535.0
+    return round(temperature, 2), round(humidity, 2)
+
+
+class SHT35:
+    """SHT35 in periodic acquisition mode on a bus that stays open.
+
+    The sensor converts on its own clock; :meth:`read` only fetches the
+    latest result (no conversion sleep). ``smbus_module`` replaces the
+    ``smbus2`` module, so tests can pass a fake providing ``SMBus`` and
+    ``i2c_msg``.
+    """
+
+    def __init__(self, bus=1, address=SHT35_ADDRESS, mps=2, smbus_module=None):
+        if mps not in PERIODIC_COMMANDS:
+            raise ValueError(f"Unsupported measurement rate: {mps} (choose from {sorted(PERIODIC_COMMANDS)})")
+        self.bus_number = bus
+        self.address = address
+        self.mps = mps
+        self._smbus = smbus_module or smbus2
+        self._bus = None
+        self._last = (None, None)
+        self._last_time = None  # time.monotonic() of the last result (or of open())
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._bus is not None
+
+    def open(self):
+        if self._bus is not None:
+            return
+        if self._smbus is None:
+            raise RuntimeError("smbus2 is not installed")
+        bus = self._smbus.SMBus(self.bus_number)
+        try:
+            # 先停止可能残留的周期测量，再按设定频率启动
+            self._write(bus, BREAK_COMMAND)
+            time.sleep(0.001)
+            self._write(bus, PERIODIC_COMMANDS[self.mps])
+        except Exception:
+            bus.close()
+            raise
+        self._bus = bus
+        self._last = (None, None)
+        self._last_time = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            bus, self._bus = self._bus, None
+        if bus is None:
+            return
+        try:
+            self._write(bus, BREAK_COMMAND)
+        except OSError:
+            pass
+        finally:
+            bus.close()
+
+    def read(self):
+        """Return the latest ``(temperature, humidity)``.
+
+        When the sensor has no new result yet the previous reading is
+        returned; ``(None, None)`` until the first result arrives. Raises
+        ``OSError`` once no result has arrived for ``STALE_PERIODS``
+        measurement periods.
+        """
+        with self._lock:
+            if self._bus is None:
+                self.open()
+            self._write(self._bus, FETCH_COMMAND)
+            message = self._smbus.i2c_msg.read(self.address, 6)
+            try:
+                self._bus.i2c_rdwr(message)
+            except OSError as exc:
+                # 周期模式下无新数据时传感器返回 NACK；持续过久则视为故障
+                if exc.errno != _NACK_ERRNO:
+                    raise
+                stale = time.monotonic() - self._last_time
+                if stale > STALE_PERIODS / self.mps:
+                    raise OSError(exc.errno, f"SHT35 returned no new data for {stale:.1f} s") from exc
+                return self._last
+            self._last = convert(list(message))
+            self._last_time = time.monotonic()
+            return self._last
+
+    def _write(self, bus, command):
+        bus.i2c_rdwr(self._smbus.i2c_msg.write(self.address, list(command)))
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_sensor = None
+_bus_missing_logged = False
+
 
 def read_sht35():
+    global _sensor, _bus_missing_logged
     if smbus2 is None:
         logger.debug("smbus2 not available; returning virtual env readings")
         return None, None
 
+    if _sensor is None:
+        _sensor = SHT35()
     try:
-        with smbus2.SMBus(1) as bus:
-            bus.write_i2c_block_data(0x44, 0x24, [0x00])
-            time.sleep(0.015)
-            data = bus.read_i2c_block_data(0x44, 0x00, 6)
+        return _sensor.read()
     except FileNotFoundError:
-        logger.warning("I2C bus /dev/i2c-1 not found; SHT35 readings unavailable")
+        if not _bus_missing_logged:
+            logger.warning("I2C bus /dev/i2c-1 not found; SHT35 readings unavailable")
+            _bus_missing_logged = True
+        return None, None
+    except ValueError as exc:
+        logger.warning("Discarding SHT35 reading: %s", exc)
         return None, None
     except Exception as exc:
         logger.warning("Failed to read SHT35 sensor: %s", exc)
+        # 下次读取时重新打开总线并重新配置传感器
+        _sensor.close()
         return None, None
-
-    temperature = -45 + (175 * ((data[0] << 8) + data[1]) / 65535.0)
-    humidity = 100 * ((data[3] << 8) + data[4]) / 65535.0
-    return round(temperature, 2), round(humidity, 2)
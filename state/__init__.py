@@ -0,0 +1,18 @@
+"""Measurement state shared between the web tier and the measurement engines."""
+from .backend import (
+    LocalStateBackend,
+    ManagerStateBackend,
+    StateBackend,
+    Station,
+    create_state_backend,
+    push_sample,
+)
+
+__all__ = [
+    "LocalStateBackend",
+    "ManagerStateBackend",
+    "StateBackend",
+    "Station",
+    "create_state_backend",
+    "push_sample",
+]
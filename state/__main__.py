@@ -0,0 +1,3 @@
+from state.broker import main
+
+main()
@@ -0,0 +1,199 @@
+"""State backends shared by the Dash callbacks and the measurement engines.
+
+Every backend exposes the same objects the app used to keep at module
+level: ``status`` (dict-like), ``time_series`` / ``current_series`` /
+``iv_curve`` (list-like), ``stop_event`` (Event-like) and a
+``broadcaster`` with the :class:`streaming.LiveBroadcaster` interface,
+plus the :class:`Station` lock every run acquires before using the
+instruments.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Optional
+
+from streaming import LiveBroadcaster, Subscription
+from state.broker import DEFAULT_ADDRESS, DEFAULT_AUTHKEY, StateManager, StationLock, parse_address
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATUS = {
+    "voltage": None,
+    "current": None,
+    "time": None,
+    "parallel-resistance": None,
+    "parallel-capacitance": None,
+    "temperature": None,
+    "humidity": None,
+}
+
+
+class Station:
+    """Exclusive use of the HV source, picoammeter and LCR meter.
+
+    Dashboard starts, replays and API jobs acquire it before touching the
+    instruments or the live series, and release it when the run ends.
+    ``owner`` is a label shown to whoever is turned away (e.g. ``"job 3f2a…"``).
+    """
+
+    def __init__(self, lock) -> None:
+        self._lock = lock
+
+    def acquire(self, owner: str) -> bool:
+        return self._lock.acquire(owner, os.getpid())
+
+    def release(self, owner: str) -> None:
+        self._lock.release(owner)
+
+    @property
+    def holder(self) -> Optional[str]:
+        """Label of the current run, ``None`` when the station is free."""
+        return self._lock.holder()
+
+
+class StateBackend:
+    """Base class; subclasses set the shared objects in ``__init__``."""
+
+    status: Any
+    time_series: Any
+    current_series: Any
+    iv_curve: Any
+    stop_event: Any
+    broadcaster: Any
+    station: Station
+
+    def claim(self, name: str) -> bool:
+        """Whether this process should own the singleton ``name`` (e.g. the sensor bus)."""
+        return True
+
+
+class LocalStateBackend(StateBackend):
+    """Plain in-process objects; the default for a single web process."""
+
+    def __init__(self) -> None:
+        self.status = dict(DEFAULT_STATUS)
+        self.time_series = []
+        self.current_series = []
+        self.iv_curve = []
+        self.stop_event = threading.Event()
+        self.broadcaster = LiveBroadcaster()
+        self.station = Station(StationLock())
+
+
+def push_sample(shared_status, time_series, current_series, broadcaster, t, current, status, event) -> None:
+    """Append one live sample, update ``shared_status`` and publish a ``sample`` event.
+
+    With the manager backend (:class:`RelayBroadcaster`) this is a single
+    broker call instead of one round trip per key, append and event.
+    """
+    push = getattr(broadcaster, "push_sample", None)
+    if push is not None:
+        push(t, current, status, event)
+        return
+    time_series.append(t)
+    current_series.append(current)
+    shared_status.update(status)
+    if broadcaster is not None:
+        broadcaster.publish("sample", event)
+
+
+class RelayBroadcaster:
+    """Publish to the broker's event log; fan out locally to this worker's viewers.
+
+    A relay thread (started on the first local subscription, so it always
+    runs in the worker process) copies broker events into a local
+    :class:`LiveBroadcaster`. :meth:`push_sample` writes to the broker's
+    status and series, the objects the manager backend hands the engines.
+    """
+
+    POLL_SECONDS = 5.0
+
+    def __init__(self, events, live=None, max_queue: int = 4096) -> None:
+        # 代理对象在每个线程各自建立连接，可以跨线程共享
+        self._events = events
+        self._live = live
+        self._local = LiveBroadcaster(max_queue=max_queue)
+        self._relay_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._local.subscriber_count
+
+    @property
+    def queue_depth(self) -> int:
+        return self._local.queue_depth
+
+    def subscribe(self) -> Subscription:
+        self._ensure_relay()
+        return self._local.subscribe()
+
+    def publish(self, event: str, data: dict[str, Any]) -> None:
+        try:
+            self._events.append(event, data)
+        except (OSError, EOFError) as exc:
+            logger.warning("State broker unreachable (%s); live event dropped", exc)
+
+    def push_sample(self, t: float, current: float, status: dict[str, Any], event: dict[str, Any]) -> None:
+        try:
+            self._live.sample(t, current, status, event)
+        except (OSError, EOFError) as exc:
+            logger.warning("State broker unreachable (%s); live sample dropped", exc)
+
+    def _ensure_relay(self) -> None:
+        with self._lock:
+            if self._relay_pid == os.getpid():
+                return
+            self._relay_pid = os.getpid()
+        threading.Thread(target=self._relay, name="state-relay", daemon=True).start()
+
+    def _relay(self) -> None:
+        cursor, _ = self._events.read(None, 0)
+        while True:
+            try:
+                cursor, batch = self._events.read(cursor, self.POLL_SECONDS)
+            except (OSError, EOFError) as exc:
+                logger.warning("State broker relay stopped (%s)", exc)
+                self._local.publish("reset", {})
+                with self._lock:
+                    self._relay_pid = None
+                return
+            for event, data in batch:
+                self._local.publish(event, data)
+
+
+class ManagerStateBackend(StateBackend):
+    """Objects living in a :mod:`state.broker` process, shared by all workers."""
+
+    def __init__(self, address: str = DEFAULT_ADDRESS, authkey: str = DEFAULT_AUTHKEY) -> None:
+        self._manager = StateManager(address=parse_address(address), authkey=authkey.encode())
+        self._manager.connect()
+        self.status = self._manager.status()
+        for key, value in DEFAULT_STATUS.items():
+            # 其他 worker 可能已在测量，不能覆盖
+            self.status.setdefault(key, value)
+        self.time_series = self._manager.time_series()
+        self.current_series = self._manager.current_series()
+        self.iv_curve = self._manager.iv_curve()
+        self.stop_event = self._manager.stop_event()
+        self.broadcaster = RelayBroadcaster(self._manager.events(), self._manager.live())
+        self.station = Station(self._manager.station())
+        self._claims = self._manager.claims()
+
+    def claim(self, name: str) -> bool:
+        return self._claims.claim(name, os.getpid())
+
+
+def create_state_backend(kind: Optional[str] = None) -> StateBackend:
+    """Backend selected by ``kind`` or ``$LGAD_STATE_BACKEND`` (``local`` / ``manager``)."""
+    kind = (kind or os.environ.get("LGAD_STATE_BACKEND", "local")).lower()
+    if kind == "local":
+        return LocalStateBackend()
+    if kind == "manager":
+        return ManagerStateBackend(
+            os.environ.get("LGAD_STATE_ADDRESS", DEFAULT_ADDRESS),
+            os.environ.get("LGAD_STATE_AUTHKEY", DEFAULT_AUTHKEY),
+        )
+    raise ValueError(f"Unsupported state backend: {kind}")
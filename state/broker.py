@@ -0,0 +1,193 @@
+"""Local broker process holding the measurement state for several web workers.
+
+Run it next to a multi-worker deployment::
+
+    python -m state --address 127.0.0.1:50505
+
+and start the app with ``LGAD_STATE_BACKEND=manager``. The broker owns
+the status dict, the live series, the stop flag, the live event log and
+the single-owner claims (e.g. which worker drives the I²C sensor), the
+station lock that keeps runs from sharing the instruments. A
+live sample updates the status, both series and the event log in one
+call (:class:`LiveState`).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+from collections import deque
+from itertools import islice
+from multiprocessing.managers import BaseManager, DictProxy, EventProxy, ListProxy
+from typing import Any, Optional
+
+DEFAULT_ADDRESS = "127.0.0.1:50505"
+DEFAULT_AUTHKEY = "lgad-state"
+
+SERIES = ("time_series", "current_series", "iv_curve")
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class EventLog:
+    """Bounded, sequence-numbered log of live events.
+
+    Readers keep a cursor and block until events past it arrive; a reader
+    that fell further behind than ``capacity`` gets a single ``reset``.
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        self._events: deque = deque(maxlen=capacity)
+        self._next = 0
+        self._cond = threading.Condition()
+
+    def append(self, event: str, data: dict[str, Any]) -> None:
+        with self._cond:
+            self._events.append((event, data))
+            self._next += 1
+            self._cond.notify_all()
+
+    def read(self, cursor: Optional[int], timeout: float) -> tuple[int, list]:
+        """Return ``(new_cursor, events)``; ``cursor=None`` starts at the tail."""
+        with self._cond:
+            if cursor is None:
+                return self._next, []
+            self._cond.wait_for(lambda: self._next > cursor, timeout)
+            first = self._next - len(self._events)
+            if cursor < first:
+                return self._next, [("reset", {})]
+            return self._next, list(islice(self._events, cursor - first, None))
+
+
+class ClaimTable:
+    """First-come ownership of named singletons, released when the owner exits."""
+
+    def __init__(self) -> None:
+        self._owners: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, name: str, pid: int) -> bool:
+        with self._lock:
+            owner = self._owners.get(name)
+            if owner is None or owner == pid or not _alive(owner):
+                self._owners[name] = pid
+                return True
+            return False
+
+
+class StationLock:
+    """Exclusive use of the instruments by one run; a holder whose process exited is replaced."""
+
+    def __init__(self) -> None:
+        self._holder: Optional[tuple[str, int]] = None
+        self._lock = threading.Lock()
+
+    def acquire(self, owner: str, pid: int) -> bool:
+        with self._lock:
+            if self._holder is not None and _alive(self._holder[1]):
+                return False
+            self._holder = (owner, pid)
+            return True
+
+    def release(self, owner: str) -> None:
+        with self._lock:
+            if self._holder is not None and self._holder[0] == owner:
+                self._holder = None
+
+    def holder(self) -> Optional[str]:
+        with self._lock:
+            if self._holder is None or not _alive(self._holder[1]):
+                return None
+            return self._holder[0]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LiveState:
+    """Applies one live sample inside the broker (one round trip per sample)."""
+
+    def __init__(self, status: dict, time_series: list, current_series: list, events: EventLog) -> None:
+        self._status = status
+        self._time_series = time_series
+        self._current_series = current_series
+        self._events = events
+
+    def sample(self, t: float, current: float, status: dict[str, Any], event: dict[str, Any]) -> None:
+        self._time_series.append(t)
+        self._current_series.append(current)
+        self._status.update(status)
+        self._events.append("sample", event)
+
+
+class SeriesProxy(ListProxy):
+    # ListProxy 没有暴露 clear()，测量引擎每个电压点都会调用
+    _exposed_ = ListProxy._exposed_ + ("clear",)
+
+    def clear(self):
+        return self._callmethod("clear")
+
+
+class StateManager(BaseManager):
+    """Client side: connects to a running broker."""
+
+
+class _BrokerManager(BaseManager):
+    """Server side: owns the shared objects."""
+
+
+def _register(manager_cls, objects: Optional[dict[str, Any]] = None) -> None:
+    def factory(name):
+        return (lambda: objects[name]) if objects is not None else None
+
+    manager_cls.register("status", factory("status"), proxytype=DictProxy)
+    for name in SERIES:
+        manager_cls.register(name, factory(name), proxytype=SeriesProxy)
+    manager_cls.register("stop_event", factory("stop_event"), proxytype=EventProxy)
+    manager_cls.register("events", factory("events"), exposed=("append", "read"))
+    manager_cls.register("claims", factory("claims"), exposed=("claim",))
+    manager_cls.register("live", factory("live"), exposed=("sample",))
+    manager_cls.register("station", factory("station"), exposed=("acquire", "release", "holder"))
+
+
+_register(StateManager)
+
+
+def serve(address: str = DEFAULT_ADDRESS, authkey: str = DEFAULT_AUTHKEY) -> None:
+    """Run the broker in the current process until interrupted."""
+    objects = {
+        "status": {},
+        "stop_event": threading.Event(),
+        "events": EventLog(),
+        "claims": ClaimTable(),
+        "station": StationLock(),
+        **{name: [] for name in SERIES},
+    }
+    objects["live"] = LiveState(objects["status"], objects["time_series"], objects["current_series"], objects["events"])
+    _register(_BrokerManager, objects)
+    manager = _BrokerManager(address=parse_address(address), authkey=authkey.encode())
+    server = manager.get_server()
+    print(f"🧩 State broker listening on {address}")
+    server.serve_forever()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Shared measurement state for multi-worker deployments.")
+    parser.add_argument("--address", default=os.environ.get("LGAD_STATE_ADDRESS", DEFAULT_ADDRESS))
+    parser.add_argument("--authkey", default=os.environ.get("LGAD_STATE_AUTHKEY", DEFAULT_AUTHKEY))
+    args = parser.parse_args(argv)
+    serve(args.address, args.authkey)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Live data streaming from the measurement engine to the dashboard."""
+from .broadcaster import LiveBroadcaster, Subscription
+
+__all__ = [
+    "LiveBroadcaster",
+    "Subscription",
+]
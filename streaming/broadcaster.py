@@ -0,0 +1,83 @@
+"""In-process fan-out of live measurement events."""
+from __future__ import annotations
+
+import queue
+import threading
+from typing import Any, Optional
+
+Event = tuple[str, dict[str, Any]]
+
+
+class Subscription:
+    """Bounded per-viewer queue handed out by :class:`LiveBroadcaster`."""
+
+    def __init__(self, broadcaster: "LiveBroadcaster", max_queue: int) -> None:
+        self._broadcaster = broadcaster
+        self._queue: "queue.Queue[Event]" = queue.Queue(maxsize=max_queue)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Block until the next event arrives; ``None`` on timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self._broadcaster._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _offer(self, event: Event) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # The viewer fell behind: drop the backlog and ask it to re-sync
+            # from a full snapshot instead of stalling the publisher.
+            with self._queue.mutex:
+                self._queue.queue.clear()
+            self._queue.put_nowait(("reset", {}))
+
+
+class LiveBroadcaster:
+    """Publish measurement events to every connected viewer.
+
+    Publishing never blocks: with no subscribers it returns immediately and
+    slow subscribers are reset rather than back-pressuring the acquisition
+    loop.
+    """
+
+    def __init__(self, max_queue: int = 4096) -> None:
+        self._max_queue = max_queue
+        self._lock = threading.Lock()
+        self._subscribers: tuple[Subscription, ...] = ()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def queue_depth(self) -> int:
+        """Largest number of undelivered events held for any viewer."""
+        return max((s._queue.qsize() for s in self._subscribers), default=0)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self._max_queue)
+        with self._lock:
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def publish(self, event: str, data: dict[str, Any]) -> None:
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        message = (event, data)
+        for subscription in subscribers:
+            subscription._offer(message)
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
@@ -0,0 +1,15 @@
+"""Acquisition and dashboard health metrics (``/metrics``) and structured logging."""
+from .collectors import ACQUISITION, CALLBACKS, AcquisitionMetrics, CallbackTimings
+from .exposition import CONTENT_TYPE, Exposition, Window
+from .logs import setup_logging
+
+__all__ = [
+    "ACQUISITION",
+    "CALLBACKS",
+    "AcquisitionMetrics",
+    "CallbackTimings",
+    "CONTENT_TYPE",
+    "Exposition",
+    "Window",
+    "setup_logging",
+]
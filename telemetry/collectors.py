@@ -0,0 +1,204 @@
+"""Counters updated by the measurement engines and the dashboard callbacks.
+
+The engines own the writes (one acquisition thread at a time), so the hot
+path takes no lock. ``start_run`` returns a :class:`SampleRecorder`; a
+sample is one buffered tuple, folded into the windows in batches.
+``/metrics`` reads the values when scraped, at most about a second behind.
+"""
+from __future__ import annotations
+
+import functools
+import time
+from operator import sub
+from typing import Callable, Optional, Sequence
+
+from .exposition import Exposition, Window
+
+
+class SampleRecorder:
+    """Per-run hot path of :class:`AcquisitionMetrics` (one engine thread).
+
+    A sample is one tuple appended to a buffer; the buffer is folded into
+    the windows and counters column by column every ``FLUSH_SAMPLES``
+    samples, ``FLUSH_SECONDS`` of run time, voltage step and at the end of
+    the run.
+    """
+
+    FLUSH_SAMPLES = 256
+    FLUSH_SECONDS = 1.0
+
+    __slots__ = ("_metrics", "_mode", "_interval", "_instruments", "_reads", "_buffer", "_previous", "_flushed")
+
+    def __init__(self, metrics: "AcquisitionMetrics", mode: str, interval: float, instruments: Sequence[str]) -> None:
+        self._metrics = metrics
+        self._mode = mode
+        self._interval = float(interval)
+        self._instruments = tuple(instruments)
+        self._reads = tuple(metrics.read_window(name) for name in self._instruments)
+        self._buffer: list[tuple[float, ...]] = []
+        self._previous: Optional[float] = None
+        self._flushed: Optional[float] = None
+        metrics.samples.setdefault(mode, 0)
+        metrics.overruns.setdefault(mode, 0)
+
+    def sample(self, *row: float) -> None:
+        """One acquired sample: ``loop_start, loop_end, *durations, *values``.
+
+        The read durations and the values read follow the ``instruments``
+        order given to :meth:`AcquisitionMetrics.start_run`; a NaN value
+        counts as a read error.
+        """
+        buffer = self._buffer
+        buffer.append(row)
+        if len(buffer) >= self.FLUSH_SAMPLES or row[1] - (self._flushed or row[0]) > self.FLUSH_SECONDS:
+            self.flush()
+
+    def new_step(self) -> None:
+        """Flush; the pause between voltage steps does not count as jitter."""
+        self.flush()
+        self._previous = None
+
+    def flush(self) -> None:
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        metrics, interval = self._metrics, self._interval
+        # 按列折叠；纯 Python 比先转换成 numpy 数组更快
+        starts, ends, *columns = zip(*rows)
+        self._flushed = ends[-1]
+        durations = list(map(sub, ends, starts))
+        metrics.samples[self._mode] += len(rows)
+        metrics.overruns[self._mode] += sum(map(interval.__lt__, durations))
+        metrics.loop.extend(durations)
+        if self._previous is None:
+            earlier, later = starts[:-1], starts[1:]
+        else:
+            earlier, later = (self._previous,) + starts[:-1], starts
+        metrics.jitter.extend([b - a - interval for a, b in zip(earlier, later)])
+        self._previous = starts[-1]
+        n = len(self._reads)
+        for name, window, seconds, values in zip(self._instruments, self._reads, columns[:n], columns[n:]):
+            window.extend(seconds)
+            errors = sum(1 for value in values if value != value)  # NaN
+            if errors:
+                metrics.read_errors[name] = metrics.read_errors.get(name, 0) + errors
+
+
+class AcquisitionMetrics:
+    """Acquisition-loop health of the measurement engines in this process."""
+
+    def __init__(self, window: int = 2048) -> None:
+        self._window = window
+        self.samples: dict[str, int] = {}
+        self.overruns: dict[str, int] = {}
+        self.runs: dict[tuple[str, str], int] = {}
+        self.jitter = Window(window)
+        self.loop = Window(window)
+        self.reads: dict[str, Window] = {}
+        self.read_errors: dict[str, int] = {}
+        self.step_writes = Window(window)
+        self.active: Optional[str] = None
+        self.profiler = None  # 当前运行的 instruments.profiler.TransportProfiler
+        self._recorder: Optional[SampleRecorder] = None
+
+    # —— 测量线程调用 -----------------------------------------------------
+    def start_run(self, mode: str, profiler=None, interval: float = 0.0, instruments: Sequence[str] = ()) -> SampleRecorder:
+        """Mark ``mode`` active; the returned recorder takes the run's samples."""
+        self.active = mode
+        self.profiler = profiler
+        self._recorder = SampleRecorder(self, mode, interval, instruments)
+        return self._recorder
+
+    def end_run(self, mode: str, state: str) -> None:
+        if self._recorder is not None:
+            self._recorder.flush()
+            self._recorder = None
+        key = (mode, state)
+        self.runs[key] = self.runs.get(key, 0) + 1
+        self.active = None
+
+    def read_window(self, instrument: str) -> Window:
+        window = self.reads.get(instrument)
+        if window is None:
+            window = self.reads[instrument] = Window(self._window)
+        return window
+
+    def step_written(self, seconds: float) -> None:
+        self.step_writes.observe(seconds)
+
+    # —— /metrics ---------------------------------------------------------
+    def expose(self, out: Exposition) -> None:
+        for mode in ("iv", "cv", "it", "ivcv"):
+            out.gauge("lgad_run_active", "1 while a measurement of this mode runs in this process.",
+                      1 if self.active == mode else 0, mode=mode)
+        for (mode, state), n in sorted(self.runs.items()):
+            out.counter("lgad_runs", "Finished measurement runs by final state.", n, mode=mode, state=state)
+        for mode, n in sorted(self.samples.items()):
+            out.counter("lgad_samples", "Samples acquired.", n, mode=mode)
+        for mode in sorted(self.samples):
+            out.counter("lgad_loop_overruns", "Samples whose loop took longer than the sample interval.",
+                        self.overruns.get(mode, 0), mode=mode)
+        out.summary("lgad_sample_jitter_seconds",
+                    "Spacing between consecutive samples minus the sample interval (recent samples).", self.jitter)
+        out.summary("lgad_loop_duration_seconds", "Time spent acquiring one sample (recent samples).", self.loop)
+        for instrument, window in sorted(self.reads.items()):
+            out.summary("lgad_instrument_read_seconds", "Duration of one instrument read in the acquisition loop.",
+                        window, instrument=instrument)
+        for instrument in sorted(self.reads):
+            out.counter("lgad_instrument_read_errors", "Instrument reads that raised or returned NaN.",
+                        self.read_errors.get(instrument, 0), instrument=instrument)
+        out.summary("lgad_step_write_seconds", "Time to write one voltage step's CSV file.", self.step_writes)
+        if self.profiler is not None:
+            self._expose_transport(out)
+
+    def _expose_transport(self, out: Exposition) -> None:
+        from instruments.profiler import BUCKETS
+
+        stats = sorted(self.profiler.snapshot().items())
+        for (instrument, command), s in stats:
+            out.histogram("lgad_transport_latency_seconds", "Instrument transport call latency (instruments.profile).",
+                          BUCKETS, s.buckets, s.total, instrument=instrument, command=command)
+        for (instrument, command), s in stats:
+            out.counter("lgad_transport_errors", "Failed instrument transport calls.", s.errors,
+                        instrument=instrument, command=command)
+        for (instrument, command), s in stats:
+            out.counter("lgad_transport_timeouts", "Timed-out instrument transport calls.", s.timeouts,
+                        instrument=instrument, command=command)
+        for (instrument, command), s in stats:
+            out.counter("lgad_transport_bytes", "Bytes exchanged with the instrument.", s.bytes_sent,
+                        instrument=instrument, command=command, direction="sent")
+            out.counter("lgad_transport_bytes", "Bytes exchanged with the instrument.", s.bytes_received,
+                        instrument=instrument, command=command, direction="received")
+
+
+class CallbackTimings:
+    """Durations of selected Dash callbacks."""
+
+    def __init__(self, window: int = 512) -> None:
+        self._window = window
+        self.durations: dict[str, Window] = {}
+
+    def timed(self, name: str) -> Callable:
+        """Decorator recording the wrapped callback's duration under ``name``."""
+        window = self.durations.setdefault(name, Window(self._window))
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    window.observe(time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    def expose(self, out: Exposition) -> None:
+        for name, window in sorted(self.durations.items()):
+            out.summary("lgad_callback_duration_seconds", "Dash callback duration (recent calls).", window, callback=name)
+
+
+ACQUISITION = AcquisitionMetrics()
+CALLBACKS = CallbackTimings()
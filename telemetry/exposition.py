@@ -0,0 +1,118 @@
+"""Prometheus text exposition format (version 0.0.4), without a client library."""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Window:
+    """Running count and sum plus the last ``size`` observations for quantiles.
+
+    ``observe`` is a deque append and two additions, cheap enough for the
+    acquisition loop; quantiles are computed only when scraped.
+    """
+
+    def __init__(self, size: int = 2048) -> None:
+        self._values: deque[float] = deque(maxlen=size)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self._values.append(value)
+        self.count += 1
+        self.sum += value
+
+    def extend(self, values: Sequence[float]) -> None:
+        """Observe a batch of values at once."""
+        self._values.extend(values)
+        self.count += len(values)
+        self.sum += sum(values)
+
+    def quantiles(self, qs: Sequence[float] = QUANTILES) -> list[float]:
+        values = np.fromiter(tuple(self._values), dtype=float)
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return [math.nan] * len(qs)
+        return [float(v) for v in np.quantile(values, qs)]
+
+
+def _format_value(value: Optional[float]) -> str:
+    if value is None:
+        return "NaN"
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value) if not value.is_integer() else str(int(value))
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, object]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Exposition:
+    """Collects metric families and renders them as one text document."""
+
+    def __init__(self) -> None:
+        self._lines: list[str] = []
+        self._declared: set[str] = set()
+
+    def _declare(self, name: str, kind: str, help_text: str) -> None:
+        if name not in self._declared:
+            self._declared.add(name)
+            self._lines.append(f"# HELP {name} {help_text}")
+            self._lines.append(f"# TYPE {name} {kind}")
+
+    def _sample(self, name: str, value: Optional[float], labels: dict[str, object]) -> None:
+        self._lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    def gauge(self, name: str, help_text: str, value: Optional[float], **labels: object) -> None:
+        self._declare(name, "gauge", help_text)
+        self._sample(name, value, labels)
+
+    def counter(self, name: str, help_text: str, value: float, **labels: object) -> None:
+        name = name if name.endswith("_total") else f"{name}_total"
+        self._declare(name, "counter", help_text)
+        self._sample(name, value, labels)
+
+    def summary(self, name: str, help_text: str, window: Window, **labels: object) -> None:
+        self._declare(name, "summary", help_text)
+        for q, value in zip(QUANTILES, window.quantiles()):
+            self._sample(name, value, {**labels, "quantile": q})
+        self._sample(f"{name}_sum", window.sum, labels)
+        self._sample(f"{name}_count", window.count, labels)
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        bounds: Iterable[float],
+        counts: Sequence[int],
+        total: float,
+        **labels: object,
+    ) -> None:
+        """``counts`` per bucket (not cumulative), one more than ``bounds`` for ``+Inf``."""
+        self._declare(name, "histogram", help_text)
+        cumulative = 0
+        for bound, n in zip(list(bounds) + [math.inf], counts):
+            cumulative += n
+            self._sample(f"{name}_bucket", cumulative, {**labels, "le": _format_value(bound)})
+        self._sample(f"{name}_sum", total, labels)
+        self._sample(f"{name}_count", cumulative, labels)
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
@@ -0,0 +1,205 @@
+"""Queue-backed structured logging for the measurement engines and drivers.
+
+The acquisition thread only puts ``LogRecord`` objects on an in-process
+queue; a listener thread formats them and does all I/O:
+
+- ``outputs/logs/lgad.jsonl``: one JSON object per record, with the run ID,
+  mode and voltage step of the thread that logged it, any ``extra=``
+  fields and the traceback (rotated at 10 MB)
+- stdout: the message with a level prefix, as the old prints looked
+
+Repeats of the same message (same logger, level and format string) are
+rate-limited on the logging thread before they are queued: at most
+``burst`` per ``interval`` seconds, and the next record that passes
+carries ``suppressed=<count>``.
+
+Call :func:`setup_logging` once per process (the app and the CLI do).
+Without it, records follow Python's defaults (warnings to stderr).
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+# 本仓库记录日志的顶层包；其他库（werkzeug 等）的日志不经过该管线
+PACKAGES = ("iv_control", "cv_control", "it_control", "ivcv_control", "instruments", "jobs", "runs", "sensors", "state", "streaming", "telemetry")
+
+DEFAULT_LOG_PATH = os.path.join("outputs", "logs", "lgad.jsonl")
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_CONTEXT_ATTRS = ("run_id", "mode", "voltage", "suppressed")
+
+_context = threading.local()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+_setup_lock = threading.Lock()
+
+
+# —— 运行上下文（每个线程各自一份） ------------------------------------------
+def bind_run(run_id: str, mode: str) -> None:
+    """Tag this thread's records with ``run_id`` and ``mode`` until :func:`unbind_run`."""
+    _context.run_id = run_id
+    _context.mode = mode
+    _context.voltage = None
+
+
+def set_step(voltage: Optional[float]) -> None:
+    _context.voltage = None if voltage is None else float(voltage)
+
+
+def unbind_run() -> None:
+    _context.run_id = _context.mode = _context.voltage = None
+
+
+class ContextFilter(logging.Filter):
+    """Copies the thread's run context onto the record (the listener runs on another thread)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = getattr(_context, "run_id", None)
+        record.mode = getattr(_context, "mode", None)
+        record.voltage = getattr(_context, "voltage", None)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most ``burst`` records of one message through per ``interval`` seconds."""
+
+    def __init__(self, burst: int = 5, interval: float = 10.0) -> None:
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self._windows: dict[tuple, list] = {}  # key -> [window_start, passed, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record untouched; formatting happens on the listener thread.
+
+    The queue is in-process, so the record does not need to be pickled
+    and the stock ``prepare()`` (which formats on the caller's thread)
+    is skipped.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for attr in _CONTEXT_ATTRS:
+            value = getattr(record, attr, None)
+            if value is not None:
+                entry[attr] = value
+        for attr, value in vars(record).items():
+            if attr not in _STANDARD_ATTRS and attr not in entry and attr not in _CONTEXT_ATTRS:
+                entry[attr] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps({k: _finite(v) for k, v in entry.items()}, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    PREFIX = {logging.WARNING: "⚠️ ", logging.ERROR: "🔴 ", logging.CRITICAL: "🔴 "}
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = self.PREFIX.get(record.levelno, "") + record.getMessage()
+        suppressed = getattr(record, "suppressed", None)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+def _finite(value):
+    # NaN/inf 不是合法 JSON
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def setup_logging(
+    path: Optional[str] = DEFAULT_LOG_PATH,
+    level: int = logging.INFO,
+    console: bool = True,
+    burst: int = 5,
+    interval: float = 10.0,
+) -> None:
+    """Route the repo's loggers through the queue; idempotent per process."""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is not None:
+            return
+        handlers: list[logging.Handler] = []
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=10 * 2 ** 20, backupCount=5, encoding="utf-8")
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(ConsoleFormatter())
+            handlers.append(console_handler)
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        _queue_handler = DeferredQueueHandler(log_queue)
+        _queue_handler.addFilter(RateLimitFilter(burst, interval))
+        _queue_handler.addFilter(ContextFilter())
+        for name in PACKAGES:
+            logger = logging.getLogger(name)
+            logger.addHandler(_queue_handler)
+            logger.setLevel(level)
+            logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _listener is None:
+            return
+        for name in PACKAGES:
+            logger = logging.getLogger(name)
+            logger.removeHandler(_queue_handler)
+            logger.propagate = True
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = _queue_handler = None
@@ -8,15 +8,19 @@ def generate_layout():
 #        # 图表显示区域
         # 控制按钮
         html.Button("Start Measurement", id="start-button"),
+        html.Button("Start I–V + C–V", id="start-ivcv-button"),
+        html.Button("Start I–t Stability", id="start-it-button"),
         html.Button("Stop Measurement", id="stop-button", disabled=True),
         html.Button("Config Parameters", id='config-button', n_clicks=0),
         html.Button("Plot IV Curve", id='plot-iv-button'),
+        html.Div(id='control-status', style={'color': 'darkred', 'marginTop': '5px'}),
         # 容器：IV 绘图配置区域（初始隐藏）
         html.Div(id='iv-config-panel', style={'display': 'none'}, children=[
             dcc.Dropdown(
                 id='iv-directory-dropdown',
-                placeholder="Select IV result folder",
+                placeholder="Select IV result folder (type to search run, sensor ID or date)",
                 value=None,
+                searchable=True,
                 style={'width': '60%', 'marginTop': '10px'}
             ),
                         # 新增一个“隐藏”按钮
@@ -25,15 +29,53 @@ def generate_layout():
                 id='iv-hide-button',
                 n_clicks=0,
                 style={'marginLeft': '10px', 'display': 'inline-block', 'verticalAlign': 'middle'}
-            )
+            ),
+            # 分页浏览运行目录（来自 outputs/catalog.sqlite）
+            html.Button('◀ Newer', id='iv-page-prev', n_clicks=0, style={'marginLeft': '10px'}),
+            html.Span(id='iv-page-label', style={'margin': '0 10px'}),
+            html.Button('Older ▶', id='iv-page-next', n_clicks=0),
+            dcc.Store(id='iv-catalog-page', data=0),
+            # 按记录的温度把漏电流换算到参考温度，便于跨天比较
+            html.Div(style={'marginTop': '10px'}, children=[
+                dcc.Checklist(
+                    id='iv-temperature-normalise',
+                    options=[{'label': ' Normalise current to', 'value': 'on'}],
+                    value=[],
+                    inline=True,
+                    style={'display': 'inline-block'},
+                ),
+                dcc.Input(
+                    id='iv-reference-temperature',
+                    type='number',
+                    value=20,
+                    step=0.5,
+                    debounce=True,
+                    style={'width': '80px', 'marginLeft': '6px'},
+                ),
+                html.Span(' °C'),
+            ]),
+            # 回放所选运行：按记录的时序（N 倍速）驱动实时图与状态
+            html.Div(style={'marginTop': '10px'}, children=[
+                html.Button('Replay Selected Run', id='replay-button', n_clicks=0),
+                dcc.Input(
+                    id='replay-speed',
+                    type='number',
+                    value=10,
+                    min=0,
+                    step=1,
+                    style={'width': '80px', 'marginLeft': '6px'},
+                ),
+                html.Span(' × speed (0 = no waits)'),
+            ]),
         ]),
         html.Button("Plot CV Curve", id='plot-cv-button'),
         # 容器：IV 绘图配置区域（初始隐藏）
         html.Div(id='cv-config-panel', style={'display': 'none'}, children=[
             dcc.Dropdown(
                 id='cv-directory-dropdown',
-                placeholder="Select IV result folder",
+                placeholder="Select CV result folder (type to search run, sensor ID or date)",
                 value=None,
+                searchable=True,
                 style={'width': '60%', 'marginTop': '10px'}
             ),
                         # 新增一个“隐藏”按钮
@@ -42,7 +84,12 @@ def generate_layout():
                 id='cv-hide-button',
                 n_clicks=0,
                 style={'marginLeft': '10px', 'display': 'inline-block', 'verticalAlign': 'middle'}
-            )
+            ),
+            # 分页浏览运行目录（来自 outputs/catalog.sqlite）
+            html.Button('◀ Newer', id='cv-page-prev', n_clicks=0, style={'marginLeft': '10px'}),
+            html.Span(id='cv-page-label', style={'margin': '0 10px'}),
+            html.Button('Older ▶', id='cv-page-next', n_clicks=0),
+            dcc.Store(id='cv-catalog-page', data=0),
         ]),
 
         
@@ -50,6 +97,7 @@ def generate_layout():
         html.Div(id='config-panel', style={'display': 'none'}, children=[
             html.H4("Measurement Configuration"),
         
+            html.Div([html.Label("Sensor ID:"), dcc.Input(id='input-sensor-id', type='text')]),
             html.Div([html.Label("Start Voltage:"), dcc.Input(id='input-start-voltage', type='number')]),
             html.Div([html.Label("Stop Voltage:"), dcc.Input(id='input-stop-voltage', type='number')]),
             html.Div([html.Label("Step Voltage:"), dcc.Input(id='input-step-voltage', type='number')]),
@@ -106,8 +154,14 @@ def generate_layout():
         dcc.Graph(id='cv-graph', 
                   style={'width': '90vw', 'height': '40vh'}
                  ),
-        # 定时器组件
+        # 定时器组件：实时数据通过 /stream/live 推送，此定时器仅在推送断开时兜底轮询
         dcc.Interval(id='interval', interval=1000, n_intervals=0),
+        # 温湿度读数刷新（较慢）
+        dcc.Interval(id='env-interval', interval=5000, n_intervals=0),
+        # 推送端请求重新绘制完整实时图像（电压步进、状态变化）
+        dcc.Store(id='live-refresh'),
+        # 浏览器视口宽度，决定降采样后的点数
+        dcc.Store(id='viewport-width'),
         #
         dcc.Store(id='config-store', data=load_config()),
     ])
@@ -0,0 +1,41 @@
+"""Dropdown options for run folders, served page by page from the run catalog."""
+from __future__ import annotations
+
+import math
+from typing import Any, Optional
+
+PAGE_SIZE = 50
+
+
+def _label(record) -> str:
+    parts = [record.name]
+    if record.sensor_id:
+        parts.append(str(record.sensor_id))
+    if record.started_at:
+        parts.append(record.started_at.replace("T", " "))
+    return "  ·  ".join(parts)
+
+
+def catalog_page(
+    catalog,
+    run_type,
+    search: Optional[str],
+    page: int,
+    selected: Optional[str] = None,
+) -> tuple[list[dict[str, Any]], int, str]:
+    """Return ``(options, page, page_label)`` for one page of matching runs.
+
+    The selected run is always kept in the options so paging or searching
+    does not clear the dropdown value.
+    """
+    page = max(int(page or 0), 0)
+    records, total = catalog.query(run_type, search or None, limit=PAGE_SIZE, offset=page * PAGE_SIZE)
+    n_pages = max(math.ceil(total / PAGE_SIZE), 1)
+    if page >= n_pages:
+        page = n_pages - 1
+        records, total = catalog.query(run_type, search or None, limit=PAGE_SIZE, offset=page * PAGE_SIZE)
+
+    options = [{'label': _label(r), 'value': r.path} for r in records]
+    if selected and all(o['value'] != selected for o in options):
+        options.insert(0, {'label': selected.split("/")[-1], 'value': selected})
+    return options, page, f"Page {page + 1}/{n_pages} · {total} runs"
@@ -0,0 +1,46 @@
+"""Helpers that translate browser viewport state into plot point budgets."""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+DEFAULT_VIEWPORT_WIDTH = 1600
+POINTS_PER_PIXEL = 2
+MIN_POINT_BUDGET = 500
+
+
+def point_budget(viewport_width: Optional[float]) -> int:
+    """Number of points worth sending for a plot spanning the viewport."""
+    try:
+        width = float(viewport_width) if viewport_width else DEFAULT_VIEWPORT_WIDTH
+    except (TypeError, ValueError):
+        width = DEFAULT_VIEWPORT_WIDTH
+    return max(int(width * POINTS_PER_PIXEL), MIN_POINT_BUDGET)
+
+
+def relayout_xrange(relayout_data: Optional[dict[str, Any]], margin: float = 0.1) -> Optional[tuple[float, float]]:
+    """Extract the zoomed x-range from Plotly ``relayoutData``.
+
+    Returns ``None`` when the axis is autoscaled. The range is widened by
+    ``margin`` on each side so short pans do not reveal empty plot area.
+    """
+    if not relayout_data or relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        lo, hi = relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    elif isinstance(relayout_data.get("xaxis.range"), (list, tuple)):
+        lo, hi = relayout_data["xaxis.range"][:2]
+    else:
+        return None
+    try:
+        lo, hi = sorted((float(lo), float(hi)))
+    except (TypeError, ValueError):
+        return None
+    pad = (hi - lo) * margin
+    return lo - pad, hi + pad
+
+
+def is_zoom_event(relayout_data: Optional[dict[str, Any]]) -> bool:
+    """True when ``relayoutData`` reflects a user zoom/pan/reset of the x-axis."""
+    if not relayout_data:
+        return False
+    return any(key.startswith("xaxis.range") or key == "xaxis.autorange" for key in relayout_data)